@@ -1,3 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
 # BASE CACHE KEYS
 IMAGE_PREVIEW_CACHE = "image.preview."
 RENDERED_CONTENT_CACHE = "rendered.content."
+CACHE_TAG_PRE_KEY = "cache_tag"
+
+
+# Cache tags
+#
+# A group of cache keys (e.g. the resized versions of a photo) is tagged
+# by embedding the current generation of the tag in every key of the group.
+# Invalidating the tag increments its generation, atomically, so all the
+# keys of the group stop being used at once and simply expire from the cache.
+
+def get_cache_tag_key(tag):
+    return '.'.join((settings.CACHE_PRE_KEY, CACHE_TAG_PRE_KEY, tag))
+
+
+def get_cache_tag_generation(tag):
+    """
+    Returns the current generation of the tag, initializing it if missing.
+    """
+    key = get_cache_tag_key(tag)
+    generation = cache.get(key)
+    if generation is None:
+        # a time based initial value avoids reusing a generation
+        # that was in use before the key got evicted
+        cache.add(key, int(time.time() * 1000), None)
+        generation = cache.get(key)
+    return generation
+
+
+def tagged_cache_key(key, tag):
+    """
+    Returns the cache key to use for key in the group of tag.
+    e.g. tendenci.photo.12.100x100..90..g1639412345678
+    """
+    return '%s.g%s' % (key, get_cache_tag_generation(tag))
+
+
+def tagged_cache_keys(keys_and_tags):
+    """
+    Returns the cache keys to use for a list of (key, tag), as a dict by key,
+    like tagged_cache_key but getting the generations of all the tags at once.
+    """
+    tag_keys = {get_cache_tag_key(tag): tag for key, tag in keys_and_tags}
+    found = cache.get_many(list(tag_keys))
+    generations = {}
+    for tag_key, tag in tag_keys.items():
+        if tag_key in found:
+            generations[tag] = found[tag_key]
+        else:
+            generations[tag] = get_cache_tag_generation(tag)
+    return {key: '%s.g%s' % (key, generations[tag]) for key, tag in keys_and_tags}
+
+
+def invalidate_cache_tag(tag):
+    """
+    Invalidates all the cache keys tagged with tag.
+    """
+    key = get_cache_tag_key(tag)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # key is not in the cache
+        cache.set(key, int(time.time() * 1000), None)
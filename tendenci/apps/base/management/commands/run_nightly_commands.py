@@ -31,6 +31,7 @@ class Command(BaseCommand):
                     'cleanup_expired_dbdumps',
                     'clearsessions',
                     'make_recurring_payment_transactions',
+                    'sitemap_cache',
                     )
 
         if get_setting('module', 'chapters', 'membershipsenabled'):
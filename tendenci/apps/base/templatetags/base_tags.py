@@ -15,11 +15,13 @@ from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 from django.core.files.storage import default_storage
 
+from tendenci.apps.base.cache import tagged_cache_key
 from tendenci.apps.base.template_tags import parse_tag_kwargs
 from tendenci.apps.base.utils import url_exists, google_cmap_sign_url
 from tendenci.apps.profiles.models import Profile
 
-from tendenci.apps.files.cache import FILE_IMAGE_PRE_KEY
+from tendenci.apps.files.cache import FILE_IMAGE_PRE_KEY, FILE_CACHE_TAG
+from tendenci.apps.photos.cache import PHOTO_CACHE_TAG
 from tendenci.apps.files.utils import generate_image_cache_key
 from tendenci.apps.site_settings.utils import get_setting
 from tendenci.apps.theme.templatetags.static import static
@@ -623,6 +625,32 @@ def nowhitespace(parser, token):
     return NoWhiteSpaceNode(nodelist)
 
 
+def parse_image_url_tag(token):
+    """
+    Parses the arguments of the photo_image_url and image_url tags.
+    Returns a tuple of (variable, args, kwargs).
+    """
+    args, kwargs = [], {}
+    bits = token.split_contents()
+    var = bits[1]
+
+    for bit in bits:
+        if "size=" in bit:
+            kwargs["size"] = bit.split("=")[1]
+        if "crop=" in bit:
+            kwargs["crop"] = bool(bit.split("=")[1])
+        if "constrain=" in bit:
+            kwargs["constrain"] = bool(bit.split("=")[1])
+        if "quality=" in bit:
+            kwargs["quality"] = bit.split("=")[1]
+
+    if len(bits) < 1:
+        message = "'%s' tag requires more than 1 argument" % bits[0]
+        raise TemplateSyntaxError(_(message))
+
+    return var, args, kwargs
+
+
 class PhotoImageURL(Node):
     def __init__(self, photo, *args, **kwargs):
         self.size = kwargs.get("size", "100x100")
@@ -644,7 +672,12 @@ class PhotoImageURL(Node):
             return static(settings.DEFAULT_IMAGE_URL)
 
         cache_key = generate_image_cache_key(file=str(photo.pk), size=self.size, pre_key="photo", crop=self.crop, unique_key=str(photo.pk), quality=self.quality, constrain=self.constrain)
-        cached_image_url = cache.get(cache_key)
+        # prefetched with prefetch_photo_urls
+        prefetched = getattr(photo, '_image_urls', {})
+        if cache_key in prefetched:
+            cached_image_url = prefetched[cache_key]
+        else:
+            cached_image_url = cache.get(tagged_cache_key(cache_key, PHOTO_CACHE_TAG % photo.pk))
         if cached_image_url:
             if settings.USE_S3_STORAGE:
                 return default_storage.url(cached_image_url)
@@ -674,25 +707,36 @@ def photo_image_url(parser, token):
             <img src="{% photo_image_url photo size=100x100 crop=True constrain=True %}" />
         {% endfor %}
     """
-    args, kwargs = [], {}
-    bits = token.split_contents()
-    photo = bits[1]
+    photo, args, kwargs = parse_image_url_tag(token)
+    return PhotoImageURL(photo, *args, **kwargs)
 
-    for bit in bits:
-        if "size=" in bit:
-            kwargs["size"] = bit.split("=")[1]
-        if "crop=" in bit:
-            kwargs["crop"] = bool(bit.split("=")[1])
-        if "constrain=" in bit:
-            kwargs["constrain"] = bool(bit.split("=")[1])
-        if "quality=" in bit:
-            kwargs["quality"] = bit.split("=")[1]
 
-    if len(bits) < 1:
-        message = "'%s' tag requires more than 1 argument" % bits[0]
-        raise TemplateSyntaxError(_(message))
+class PrefetchPhotoURLs(PhotoImageURL):
+    def render(self, context):
+        from tendenci.apps.photos.utils.caching import prefetch_photo_urls
 
-    return PhotoImageURL(photo, *args, **kwargs)
+        photos = self.photo.resolve(context)
+        if photos:
+            prefetch_photo_urls(photos, size=self.size, crop=self.crop,
+                                constrain=self.constrain, quality=self.quality)
+        return ''
+
+
+@register.tag
+def prefetch_photo_urls(parser, token):
+    """
+    Gets the cached urls of a list of photos at once, for the
+    photo_image_url tags with the same options that follow.
+
+    Example::
+
+        {% prefetch_photo_urls photos size=100x100 crop=True %}
+        {% for photo in photos %}
+            <img src="{% photo_image_url photo size=100x100 crop=True %}" />
+        {% endfor %}
+    """
+    photos, args, kwargs = parse_image_url_tag(token)
+    return PrefetchPhotoURLs(photos, *args, **kwargs)
 
 
 class ImageURL(Node):
@@ -709,7 +753,12 @@ class ImageURL(Node):
         if file and file.pk:
 
             cache_key = generate_image_cache_key(file=str(file.id), size=self.size, pre_key=FILE_IMAGE_PRE_KEY, crop=self.crop, unique_key=str(file.id), quality=self.quality, constrain=self.constrain)
-            cached_image_url = cache.get(cache_key)
+            # prefetched with prefetch_file_image_urls
+            prefetched = getattr(file, '_image_urls', {})
+            if cache_key in prefetched:
+                cached_image_url = prefetched[cache_key]
+            else:
+                cached_image_url = cache.get(tagged_cache_key(cache_key, FILE_CACHE_TAG % file.id))
             if cached_image_url:
                 if settings.USE_S3_STORAGE:
                     return default_storage.url(cached_image_url)
@@ -760,25 +809,36 @@ def image_url(parser, token):
 
         <img src="{% image_url file size=150x100 crop=True quality=90 %}" />
     """
-    args, kwargs = [], {}
-    bits = token.split_contents()
-    file = bits[1]
+    file, args, kwargs = parse_image_url_tag(token)
+    return ImageURL(file, *args, **kwargs)
 
-    for bit in bits:
-        if "size=" in bit:
-            kwargs["size"] = bit.split("=")[1]
-        if "crop=" in bit:
-            kwargs["crop"] = bool(bit.split("=")[1])
-        if "constrain=" in bit:
-            kwargs["constrain"] = bool(bit.split("=")[1])
-        if "quality=" in bit:
-            kwargs["quality"] = bit.split("=")[1]
 
-    if len(bits) < 1:
-        message = "'%s' tag requires more than 1 argument" % bits[0]
-        raise TemplateSyntaxError(_(message))
+class PrefetchImageURLs(ImageURL):
+    def render(self, context):
+        from tendenci.apps.files.utils import prefetch_file_image_urls
 
-    return ImageURL(file, *args, **kwargs)
+        files = self.file.resolve(context)
+        if files:
+            prefetch_file_image_urls(files, size=self.size, crop=self.crop,
+                                     constrain=self.constrain, quality=self.quality)
+        return ''
+
+
+@register.tag
+def prefetch_image_urls(parser, token):
+    """
+    Gets the cached urls of a list of files at once, for the
+    image_url tags with the same options that follow.
+
+    Example::
+
+        {% prefetch_image_urls files size=150x150 crop=True quality=88 %}
+        {% for file in files %}
+            <img src="{% image_url file size=150x150 crop=True quality=88 %}" />
+        {% endfor %}
+    """
+    files, args, kwargs = parse_image_url_tag(token)
+    return PrefetchImageURLs(files, *args, **kwargs)
 
 class NonHashedTagsNode(TagsForObjectNode):
     def render(self, context):
@@ -359,6 +359,20 @@ def day_validate(dt, day):
     return day
 
 
+def get_day_range_filter(field_name, dt):
+    """
+    Returns the lookups matching the day of dt on the datetime field
+    field_name, as a half-open range [day_start, day_end) so an index
+    on the column can be used (unlike __year/__month/__day).
+
+    e.g. MembershipDefault.objects.filter(**get_day_range_filter('join_dt', dt))
+    """
+    day_start = datetime(dt.year, dt.month, dt.day)
+    day_end = day_start + timedelta(days=1)
+    return {'%s__gte' % field_name: day_start,
+            '%s__lt' % field_name: day_end}
+
+
 def get_unique_username(user):
     import uuid
     from django.contrib.auth.models import User
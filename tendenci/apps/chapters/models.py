@@ -41,7 +41,8 @@ from tendenci.apps.perms.models import TendenciBaseModel
 from tendenci.apps.payments.models import PaymentMethod
 from tendenci.apps.invoices.models import Invoice
 from tendenci.apps.files.validators import FileValidator
-from tendenci.apps.base.utils import tcurrency, day_validate
+from tendenci.apps.base.utils import tcurrency, day_validate, get_day_range_filter
+from tendenci.apps.email_blocks.utils import filter_blocked
 from tendenci.apps.site_settings.utils import get_setting
 from tendenci.apps.base.utils import fieldify
 from tendenci.apps.base.utils import validate_email
@@ -1774,15 +1775,19 @@ class Notice(models.Model):
         Replace values in a string and return the updated content
         Values are pulled from chapter_membership, user, profile, and site_settings
         """
-        content = fieldify(content)
-        template = engines['django'].from_string(content)
+        # compiled once per content, and reused for every chapter member
+        if not hasattr(self, '_templates'):
+            self._templates = {}
+        if content not in self._templates:
+            self._templates[content] = engines['django'].from_string(fieldify(content))
+        template = self._templates[content]
 
         context = kwargs.get('context') or {}
 
         return template.render(context=context)
 
 
-    def email_chapter_member(self, chapter_membership, verbosity=1):
+    def email_chapter_member(self, chapter_membership, verbosity=1, blocked_emails=None):
         """
         Send emails (with the content of this notice) to this chapter member.
         """
@@ -1801,6 +1806,8 @@ class Notice(models.Model):
         # skip if not a valid email address
         if not validate_email(email_recipient):
             return False
+        if blocked_emails and email_recipient in blocked_emails:
+            return False
 
         context.update({'first_name': user.first_name})
         subject = self.get_subject(chapter_membership, context=context)
@@ -1832,6 +1839,7 @@ class Notice(models.Model):
         """
         self.chapter_memberships_processed = []
         num_sent = 0
+        start_time = time.time()
         now = datetime.now()
         if self.notice_time in ['before', 'after']:
             if self.notice_time == 'before':
@@ -1844,32 +1852,23 @@ class Notice(models.Model):
             if self.notice_type == 'reject' or self.notice_type == 'reject_renewal':
                 chapter_memberships = chapter_memberships.filter(
                                     rejected=True,
-                                    rejected_dt__year=start_dt.year,
-                                    rejected_dt__month=start_dt.month,
-                                    rejected_dt__day=start_dt.day,
-                                    )
+                                    **get_day_range_filter('rejected_dt', start_dt))
                 if self.notice_type == 'reject':
                     chapter_memberships = chapter_memberships.filter(renewal=False)
                 else:
                     chapter_memberships = chapter_memberships.filter(renewal=True)
             elif self.notice_type == 'apply':
                 chapter_memberships = chapter_memberships.filter(
-                                    create_dt__year=start_dt.year,
-                                    create_dt__month=start_dt.month,
-                                    create_dt__day=start_dt.day,
-                                    renewal=False)
+                                    renewal=False,
+                                    **get_day_range_filter('create_dt', start_dt))
             elif self.notice_type == 'renewal':
                 chapter_memberships = chapter_memberships.filter(
-                                    renew_dt__year=start_dt.year,
-                                    renew_dt__month=start_dt.month,
-                                    renew_dt__day=start_dt.day,
-                                    renewal=True)
+                                    renewal=True,
+                                    **get_day_range_filter('renew_dt', start_dt))
             elif self.notice_type == 'approve' or self.notice_type == 'approve_renewal':
                 chapter_memberships = chapter_memberships.filter(
-                                    approve_dt__year=start_dt.year,
-                                    approve_dt__month=start_dt.month,
-                                    approve_dt__day=start_dt.day,
-                                    approved=True)
+                                    approved=True,
+                                    **get_day_range_filter('approve_dt', start_dt))
                 if self.notice_type == 'approve':
                     chapter_memberships = chapter_memberships.filter(renewal=False)
                 else:
@@ -1877,9 +1876,7 @@ class Notice(models.Model):
             else:
                 # notice_type == 'expiration'
                 chapter_memberships = chapter_memberships.filter(
-                                    expire_dt__year=start_dt.year,
-                                    expire_dt__month=start_dt.month,
-                                    expire_dt__day=start_dt.day,)
+                                    **get_day_range_filter('expire_dt', start_dt))
 
 
             # filter by chapter membership type
@@ -1891,12 +1888,20 @@ class Notice(models.Model):
                                 chapter=self.chapter)
 
             memberships_count = chapter_memberships.count()
+            if memberships_count > 0:
+                # screen the recipients against the block list at once
+                emails = set(chapter_memberships.values_list('user__email', flat=True))
+                blocked_emails = emails - set(filter_blocked(list(emails)))
+                chapter_memberships = chapter_memberships.select_related(
+                                            'user', 'membership_type', 'chapter',
+                                            'payment_method', 'invoice')
         else:
             # notice_time == 'attimeof'
             if not chapter_membership:
                 return
             chapter_memberships = [chapter_membership]
             memberships_count = 1
+            blocked_emails = None
 
         if memberships_count > 0:
             # log notice sent
@@ -1904,29 +1909,36 @@ class Notice(models.Model):
                                    num_sent=0)
             notice_log.save()
             self.log = notice_log
+            log_records = []
 
             for chapter_membership in chapter_memberships:
                 try:
-                    boo_sent = self.email_chapter_member(chapter_membership, verbosity=verbosity)
+                    boo_sent = self.email_chapter_member(chapter_membership, verbosity=verbosity,
+                                                         blocked_emails=blocked_emails)
                     if boo_sent:
                         num_sent += 1
                         if memberships_count <= 50:
                             self.chapter_memberships_processed.append(chapter_membership)
 
                         # log record
-                        notice_log_record = NoticeDefaultLogRecord(
+                        log_records.append(NoticeDefaultLogRecord(
                                                 notice_log=notice_log,
                                                 chapter_membership=chapter_membership,
-                                                emails_sent=chapter_membership.user.email)
-                        notice_log_record.save()
+                                                emails_sent=chapter_membership.user.email))
                 except:
                     # log the exception
                     logger.error(traceback.format_exc())
 
+            NoticeDefaultLogRecord.objects.bulk_create(log_records, batch_size=500)
+
             if num_sent > 0:
                 notice_log.num_sent = num_sent
                 notice_log.save()
 
+        if verbosity > 0 and self.notice_time != 'attimeof':
+            print('%s: %d of %d sent in %.2fs' % (self.notice_name, num_sent,
+                                                  memberships_count,
+                                                  time.time() - start_time))
         return num_sent
 
     @classmethod
@@ -267,6 +267,7 @@ def index(request, form_class=SubmitContactForm, template_name="form.html"):
                 instance=contact,
                 user=contact_user,
                 action='submitted',
+                buffered=False,
                 **event_log_dict
             )
 
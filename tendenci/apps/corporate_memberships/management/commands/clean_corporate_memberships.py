@@ -15,7 +15,12 @@ class Command(BaseCommand):
         from dateutil.relativedelta import relativedelta
         from tendenci.apps.corporate_memberships.models import (
                             CorpMembership, CorporateMembershipType)
+        from tendenci.apps.directories.models import Directory
         from tendenci.apps.memberships.models import MembershipDefault
+        from tendenci.apps.memberships.utils import expire_memberships
+        from tendenci.apps.search.indexing import queue_unindexed_items
+
+        verbosity = int(kwargs.get('verbosity', 1))
 
         [admin] = User.objects.filter(is_superuser=True).order_by('id')[:1] or [None]
         for corp_membership_type in CorporateMembershipType.objects.all():
@@ -23,24 +28,36 @@ class Command(BaseCommand):
             grace_period = membership_type.expiration_grace_period
             date_to_expire = datetime.now() - relativedelta(days=grace_period)
 
-            corp_memberships = CorpMembership.objects.filter(
+            corp_memberships = list(CorpMembership.objects.filter(
                 corporate_membership_type=corp_membership_type,
                 expiration_dt__lt=date_to_expire,
                 status_detail='active',
-                status=True)
-            for corp_membership in corp_memberships:
-                corp_membership.status_detail = 'expired'
-                corp_membership.save()
-
-                # Check directory and set to inactive
-                corp_profile = corp_membership.corp_profile
-                if corp_profile.directory:
-                    corp_profile.directory.status_detail = 'inactive'
-                    corp_profile.directory.save()
-
-                # individual memberships under this corporate
-                memberships = MembershipDefault.objects.filter(
-                            corporate_membership_id=corp_membership.id
-                                )
-                for membership in memberships:
-                    membership.expire(admin)
+                status=True).values_list('pk', 'corp_profile__directory_id'))
+            if not corp_memberships:
+                continue
+            corp_membership_ids = [row[0] for row in corp_memberships]
+
+            CorpMembership.objects.filter(pk__in=corp_membership_ids
+                                          ).update(status_detail='expired',
+                                                   update_dt=datetime.now())
+            # update() doesn't send post_save, queue the search indexing
+            queue_unindexed_items(CorpMembership, corp_membership_ids)
+
+            # Check directory and set to inactive
+            directory_ids = [row[1] for row in corp_memberships if row[1]]
+            if directory_ids:
+                Directory.objects.filter(pk__in=directory_ids).update(status_detail='inactive')
+                queue_unindexed_items(Directory, directory_ids)
+
+            # individual memberships under these corporates
+            membership_ids = MembershipDefault.objects.filter(
+                        corporate_membership_id__in=corp_membership_ids
+                            ).values_list('pk', flat=True)
+            num_expired = expire_memberships(membership_ids,
+                            request_user=admin,
+                            action_taken=True,
+                            deactivate_directories=False,
+                            description='Expired by clean_corporate_memberships (%s)' % corp_membership_type.name)
+            if verbosity > 1:
+                print('%s: %d corporate memberships, %d memberships expired' % (
+                      corp_membership_type.name, len(corp_membership_ids), num_expired))
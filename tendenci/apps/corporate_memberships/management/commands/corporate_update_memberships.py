@@ -11,25 +11,27 @@ class Command(BaseCommand):
         from django.core.exceptions import ObjectDoesNotExist
         from tendenci.apps.corporate_memberships.models import CorpMembership
         from tendenci.apps.memberships.models import MembershipDefault
+        from tendenci.apps.perms.bulk import bulk_save
         verbosity = int(options['verbosity'])
 
         corporates = CorpMembership.objects.filter(status=True, status_detail='active')
 
-        for corporate in corporates:
-            memberships = MembershipDefault.objects.filter(
-                corporate_membership_id=corporate.pk
-            )
-
-            for membership in memberships:
-                membership.status = corporate.status
-                membership.status_detail = corporate.status_detail
-                membership.expire_dt = corporate.expiration_dt
-                membership.save()
-
-                try:
-                    membership.user.profile.refresh_member_number()
-                except ObjectDoesNotExist:
-                    pass
-
-                if verbosity:
-                    print(membership)
+        with bulk_save():
+            for corporate in corporates:
+                memberships = MembershipDefault.objects.filter(
+                    corporate_membership_id=corporate.pk
+                )
+
+                for membership in memberships:
+                    membership.status = corporate.status
+                    membership.status_detail = corporate.status_detail
+                    membership.expire_dt = corporate.expiration_dt
+                    membership.save()
+
+                    try:
+                        membership.user.profile.refresh_member_number()
+                    except ObjectDoesNotExist:
+                        pass
+
+                    if verbosity:
+                        print(membership)
@@ -25,6 +25,7 @@ class Command(BaseCommand):
         from tendenci.apps.corporate_memberships.models import CorpMembershipImport
         from tendenci.apps.corporate_memberships.models import CorpMembershipImportData
         from tendenci.apps.corporate_memberships.import_processor import CorpMembershipImportProcessor
+        from tendenci.apps.perms.bulk import bulk_save
 
         import_id = options['import_id']
         user_id = options['user_id']
@@ -38,28 +39,30 @@ class Command(BaseCommand):
 
         imd = CorpMembershipImportProcessor(request_user, mimport, dry_run=False)
 
-        for idata in data_list:
-            cmemb_data = idata.row_data
-            # catch any error
-            try:
-                imd.process_corp_membership(cmemb_data)
-            except Exception as e:
-                # mimport.status = 'error'
-                # TODO: add a field to log the error
-                # mimport.save()
-                # raise  Exception(traceback.format_exc())
-                print(e)
+        # versions and event logs are written in bulk
+        with bulk_save():
+            for idata in data_list:
+                cmemb_data = idata.row_data
+                # catch any error
+                try:
+                    imd.process_corp_membership(cmemb_data)
+                except Exception as e:
+                    # mimport.status = 'error'
+                    # TODO: add a field to log the error
+                    # mimport.save()
+                    # raise  Exception(traceback.format_exc())
+                    print(e)
 
-            mimport.num_processed += 1
-            # save the status
-            summary = 'insert:%d,update:%d,update_insert:%d,invalid:%d' % (
-                                        imd.summary_d['insert'],
-                                        imd.summary_d['update'],
-                                        imd.summary_d['update_insert'],
-                                        imd.summary_d['invalid']
-                                        )
-            mimport.summary = summary
-            mimport.save()
+                mimport.num_processed += 1
+                # save the status
+                summary = 'insert:%d,update:%d,update_insert:%d,invalid:%d' % (
+                                            imd.summary_d['insert'],
+                                            imd.summary_d['update'],
+                                            imd.summary_d['update_insert'],
+                                            imd.summary_d['invalid']
+                                            )
+                mimport.summary = summary
+                mimport.save()
 
         mimport.status = 'completed'
         mimport.complete_dt = datetime.now()
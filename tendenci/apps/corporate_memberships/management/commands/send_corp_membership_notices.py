@@ -42,11 +42,12 @@ class Command(BaseCommand):
             return
 
         from tendenci.apps.corporate_memberships.models import (
-            CorpMembership, CorpMembershipApp,
+            CorpMembership, CorpMembershipApp, CorpMembershipRep,
             NoticeLog,
             NoticeLogRecord)
         from tendenci.apps.notifications import models as notification
-        from tendenci.apps.base.utils import fieldify
+        from tendenci.apps.base.utils import fieldify, get_day_range_filter
+        from tendenci.apps.email_blocks.utils import filter_blocked
 
         site_display_name = get_setting('site', 'global', 'sitedisplayname')
         site_contact_name = get_setting('site', 'global', 'sitecontactname')
@@ -120,9 +121,20 @@ class Command(BaseCommand):
                                             ).strip()).split(',')
             return admin_emails
 
+        def get_notice_templates(notice):
+            """Compile the body and the subject of the notice, once per notice.
+            """
+            body = fieldify(notice.email_content)
+            body = body + ' <br /><br />{% include "email_footer.html" %}'
+            subject = notice.subject.replace('(name)',
+                        '{% autoescape off %}{{ notice_corp_name }}{% endautoescape %}')
+            return (engines['django'].from_string(body),
+                    engines['django'].from_string(subject))
+
         def process_notice(notice):
             notice.members_sent = []
             num_sent = 0
+            start_time = time.time()
             if notice.notice_time == 'before':
                 start_dt = now + timedelta(days=notice.num_days)
             else:
@@ -141,12 +153,10 @@ class Command(BaseCommand):
                                     )
             if notice.notice_type in ['approve_join', 'disapprove_join'
                                       'approve_renewal', 'disapprove_renewal']:
-                filters = {'approved_denied_dt__year': start_dt.year,
-                           'approved_denied_dt__month': start_dt.month,
-                           'approved_denied_dt__day': start_dt.day,
-                           'renewal': False,
+                filters = {'renewal': False,
                            'approved': True
                            }
+                filters.update(get_day_range_filter('approved_denied_dt', start_dt))
                 if notice.notice_type in ['approve_renewal',
                                           'disapprove_renewal']:
                     filters.update({'renewal': True})
@@ -157,21 +167,15 @@ class Command(BaseCommand):
                 memberships = memberships.filter(**filters)
             elif notice.notice_type == 'join':
                 memberships = memberships.filter(
-                    join_dt__year=start_dt.year,
-                    join_dt__month=start_dt.month,
-                    join_dt__day=start_dt.day,
-                    renewal=False)
+                    renewal=False,
+                    **get_day_range_filter('join_dt', start_dt))
             elif notice.notice_type == 'renewal':
                 memberships = memberships.filter(
-                    renew_dt__year=start_dt.year,
-                    renew_dt__month=start_dt.month,
-                    renew_dt__day=start_dt.day,
-                    renewal=True)
+                    renewal=True,
+                    **get_day_range_filter('renew_dt', start_dt))
             else:  # 'expire'
                 memberships = memberships.filter(
-                    expiration_dt__year=start_dt.year,
-                    expiration_dt__month=start_dt.month,
-                    expiration_dt__day=start_dt.day)
+                    **get_day_range_filter('expiration_dt', start_dt))
 
             # filter by membership type
             if notice.corporate_membership_type:
@@ -189,38 +193,59 @@ class Command(BaseCommand):
                                   'time_submitted': nowstr,
                                   }
 
+                templates = get_notice_templates(notice)
+
+                # screen the representatives against the block list at once
+                emails = set(CorpMembershipRep.objects.filter(
+                                corp_profile__corp_memberships__in=memberships
+                                ).filter(Q(is_dues_rep=True) | Q(is_member_rep=True)
+                                ).values_list('user__email', flat=True))
+                blocked_emails = emails - set(filter_blocked(list(emails)))
+
                 # log notice sent
                 notice_log = NoticeLog(notice=notice,
                                        num_sent=0)
                 notice_log.save()
                 notice.log = notice_log
                 notice.err = ''
+                log_records = []
 
+                memberships = memberships.select_related('corp_profile',
+                                                         'corp_profile__directory',
+                                                         'payment_method',
+                                                         'invoice')
                 for membership in memberships:
                     try:
-                        num_sent += email_member(notice, membership, global_context)
+                        num_sent += email_member(notice, membership, global_context,
+                                                 templates, blocked_emails)
                         if memberships_count <= 50:
                             notice.members_sent.append(membership)
 
                         # log record
-                        notice_log_record = NoticeLogRecord(
+                        log_records.append(NoticeLogRecord(
                             notice_log=notice_log,
-                            corp_membership=membership)
-                        notice_log_record.save()
+                            corp_membership=membership))
                     except:
                         # catch the exception and email
                         notice.err += traceback.format_exc()
                         print(traceback.format_exc())
 
+                NoticeLogRecord.objects.bulk_create(log_records, batch_size=500)
+
                 if num_sent > 0:
                     notice_log.num_sent = num_sent
                     notice_log.save()
 
+            if verbosity > 0:
+                print('%s: %d sent to %d corporate memberships in %.2fs' % (
+                      notice.notice_name, num_sent, memberships_count,
+                      time.time() - start_time))
             return num_sent
 
-        def email_member(notice, membership, global_context):
+        def email_member(notice, membership, global_context, templates, blocked_emails):
             corp_profile = membership.corp_profile
-            representatives = corp_profile.reps.filter(Q(is_dues_rep=True) | (Q(is_member_rep=True)))
+            representatives = corp_profile.reps.filter(Q(is_dues_rep=True) | (Q(is_member_rep=True))
+                                                       ).select_related('user')
             sent = 0
 
             corp_app = CorpMembershipApp.objects.current_app()
@@ -284,8 +309,10 @@ class Command(BaseCommand):
             
             
 
+            body_template, subject_template = templates
             for recipient in representatives:
-                body = notice.email_content
+                if recipient.user.email in blocked_emails:
+                    continue
                 context = membership.get_field_items()
                 context['membership'] = membership
                 context.update(global_context)
@@ -294,18 +321,12 @@ class Command(BaseCommand):
                     'rep_first_name': recipient.user.first_name,
                 })
 
-                body = fieldify(body)
-
-                body = body + ' <br /><br />{% include "email_footer.html" %}'
+                context['notice_corp_name'] = corp_profile.name
 
-                template = engines['django'].from_string(body)
-                body = template.render(context=context)
+                body = body_template.render(context=context)
 
                 email_recipient = recipient.user.email
-                subject = notice.subject.replace('(name)',
-                                            corp_profile.name)
-                template = engines['django'].from_string(subject)
-                subject = template.render(context=context)
+                subject = subject_template.render(context=context)
 
                 email_context.update({
                     'subject':subject,
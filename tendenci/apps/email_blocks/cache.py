@@ -0,0 +1,3 @@
+# cache tag of the block list of the processes (see email_blocks.utils),
+# invalidated when an email block is saved or deleted
+EMAIL_BLOCKS_CACHE_TAG = "email_blocks"
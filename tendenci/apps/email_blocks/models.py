@@ -1,8 +1,11 @@
 import uuid
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.utils.translation import gettext_lazy as _
 
 from tendenci.apps.perms.models import TendenciBaseModel
+from tendenci.apps.base.cache import invalidate_cache_tag
+from tendenci.apps.email_blocks.cache import EMAIL_BLOCKS_CACHE_TAG
 
 class EmailBlock(TendenciBaseModel):
     guid = models.CharField(max_length=50)
@@ -24,3 +27,15 @@ class EmailBlock(TendenciBaseModel):
 
     def delete(self, *args, **kwargs):
         self.hard_delete()
+
+
+def email_blocks_changed(sender, **kwargs):
+    """
+    Invalidates the block list of every process.
+    """
+    from tendenci.apps.email_blocks.utils import reset_block_list
+    invalidate_cache_tag(EMAIL_BLOCKS_CACHE_TAG)
+    reset_block_list()
+
+post_save.connect(email_blocks_changed, sender=EmailBlock, weak=False)
+post_delete.connect(email_blocks_changed, sender=EmailBlock, weak=False)
@@ -0,0 +1,77 @@
+import time
+from threading import Lock
+
+from tendenci.apps.base.cache import get_cache_tag_generation
+from tendenci.apps.email_blocks.cache import EMAIL_BLOCKS_CACHE_TAG
+
+# how often (in seconds) a process checks if the block list has changed
+VERSION_CHECK_INTERVAL = 10
+
+# per-process copy of the block list, an immutable tuple of
+# (emails, domains, version, time checked) replaced as a whole
+_block_list = (frozenset(), frozenset(), None, 0)
+_block_list_lock = Lock()
+
+
+def reset_block_list():
+    """
+    Makes the next get_block_list check the version and reload the list.
+    """
+    global _block_list
+    emails, domains, version, checked = _block_list
+    _block_list = (emails, domains, None, 0)
+
+
+def get_block_list():
+    """
+    Returns a tuple of (blocked emails, blocked domains) as sets.
+    Domains include top level domains such as "ru" that block every
+    address under them. The sets are loaded with one query and
+    reloaded when the email blocks version in the cache changes.
+    """
+    global _block_list
+    from tendenci.apps.email_blocks.models import EmailBlock
+
+    emails, domains, loaded_version, checked = _block_list
+    now = time.time()
+    if checked and now - checked < VERSION_CHECK_INTERVAL:
+        return emails, domains
+
+    version = get_cache_tag_generation(EMAIL_BLOCKS_CACHE_TAG)
+    with _block_list_lock:
+        emails, domains, loaded_version, checked = _block_list
+        # a reset clears the loaded version, so the list is reloaded
+        if version is None or version != loaded_version:
+            emails, domains = set(), set()
+            for email, email_domain in EmailBlock.objects.values_list('email', 'email_domain'):
+                if email:
+                    emails.add(email.lower())
+                if email_domain:
+                    domains.add(email_domain.lower())
+            emails, domains = frozenset(emails), frozenset(domains)
+        _block_list = (emails, domains, version, now)
+    return emails, domains
+
+
+def filter_blocked(addresses):
+    """
+    Returns the addresses that are not blocked, in the same order.
+    The whole list is checked against the block list with set lookups.
+    """
+    emails, domains = get_block_list()
+    allowed = []
+    for address in addresses:
+        if address and '@' in address:
+            lowered = address.lower()
+            domain = lowered.split('@')[1]
+            if lowered in emails or domain in domains or \
+                    domain.split('.')[-1] in domains:
+                continue
+        allowed.append(address)
+    return allowed
+
+
+def is_blocked(email_to_test):
+    if not email_to_test or '@' not in email_to_test:
+        return False
+    return not filter_blocked([email_to_test])
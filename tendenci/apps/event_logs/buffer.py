@@ -0,0 +1,101 @@
+import atexit
+import logging
+import os
+from threading import Event, Lock, Thread
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class EventLogBuffer(object):
+    """
+    Collects event logs in memory and writes them with bulk_create,
+    either from a background thread every EVENTLOG_FLUSH_INTERVAL seconds
+    or as soon as EVENTLOG_BUFFER_SIZE records are pending.
+    """
+    def __init__(self):
+        self.records = []
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.thread = None
+        self.pid = None
+
+    @property
+    def size(self):
+        return getattr(settings, 'EVENTLOG_BUFFER_SIZE', 200)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'EVENTLOG_FLUSH_INTERVAL', 5)
+
+    def add(self, event_log):
+        with self.lock:
+            self.records.append(event_log)
+            pending = len(self.records)
+        self.start()
+        if pending >= self.size:
+            self.wakeup.set()
+
+    def flush(self):
+        """
+        Writes all the pending event logs. Returns the number written.
+        """
+        from tendenci.apps.event_logs.models import EventLog
+
+        with self.lock:
+            records, self.records = self.records, []
+        if not records:
+            return 0
+        try:
+            with transaction.atomic():
+                EventLog.objects.bulk_create(records, batch_size=500)
+        except Exception as e:
+            logger.warning('Failed to write %d event logs in bulk: %s', len(records), e)
+            return self.save_each(records)
+        return len(records)
+
+    def save_each(self, records):
+        """
+        Saves the event logs one by one, so one bad record
+        doesn't lose the others. Returns the number saved.
+        """
+        saved = 0
+        for record in records:
+            # the pk set by the rolled back bulk insert, if any
+            record.pk = None
+            try:
+                with transaction.atomic():
+                    record.save(force_insert=True)
+                saved += 1
+            except Exception as e:
+                logger.error('Failed to write event log: %s', e)
+        return saved
+
+    def start(self):
+        """
+        Starts the flushing thread, once per process (forked
+        worker processes each get their own thread).
+        """
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = Thread(target=self.run, name='eventlog-flush')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+
+event_log_buffer = EventLogBuffer()
+# write whatever is left when the process exits
+atexit.register(event_log_buffer.flush)
@@ -1,5 +1,6 @@
 from builtins import str
-import inspect
+import sys
+import uuid
 from datetime import datetime, timedelta
 from operator import and_
 from socket import gethostbyname, gethostname
@@ -13,6 +14,8 @@ from django.conf import settings
 from django.utils.encoding import smart_bytes
 
 from tendenci.apps.robots.models import Robot
+from tendenci.apps.theme.middleware import get_current_request
+from tendenci.apps.event_logs.buffer import event_log_buffer
 
 
 default_keyword_args = (
@@ -29,6 +32,51 @@ default_keyword_args = (
     'source',
 )
 
+remove_list = ['tendenci',
+               'models',
+               'views',
+               'addons',
+               'core',
+               'apps',
+               'contrib']
+
+# functions that call log() on behalf of the code we want to log
+skip_callers = ('log', 'save', 'delete', 'hard_delete', 'update_perms_and_save')
+
+_server_ip_address = None
+
+
+def get_server_ip_address():
+    """
+    Returns the ip address of this server, resolved once per process.
+    """
+    global _server_ip_address
+    if _server_ip_address is None:
+        try:
+            _server_ip_address = gethostbyname(gethostname())
+        except:
+            try:
+                _server_ip_address = settings.INTERNAL_IPS[0]
+            except:
+                _server_ip_address = '0.0.0.0'
+    return _server_ip_address
+
+
+def get_caller_frame():
+    """
+    Returns the frame of the code that logs the event, skipping
+    perms and the save/delete methods, without building the whole stack.
+    """
+    frame = sys._getframe(2)
+    for i in range(4):
+        if frame.f_back is None:
+            break
+        if frame.f_code.co_name not in skip_callers and \
+                "perms" not in frame.f_globals.get('__name__', '').split('.'):
+            break
+        frame = frame.f_back
+    return frame
+
 
 class EventLogManager(Manager):
     def search(self, query=None, *args, **kwargs):
@@ -87,24 +135,18 @@ class EventLogManager(Manager):
 
             EventLog.objects.log(instance=obj_local_var)
 
+        Event logs are buffered and written in bulk by a background thread.
+        Pass buffered=False if the event log needs to be saved right away
+        (e.g. to use its pk).
         """
         request, user, instance = None, None, None
 
-        stack = inspect.stack()
-
-        # If the request is not present in the kwargs, we try to find it
-        # by inspecting the stack. We dive 3 levels if necessary. - JMO 2012-05-14
+        # If the request is not present in the kwargs, use the request
+        # being processed by this thread (see theme.middleware).
         if 'request' in kwargs:
             request = kwargs['request']
         else:
-            if 'request' in inspect.getargvalues(stack[1][0]).locals:
-                request = inspect.getargvalues(stack[1][0]).locals['request']
-            elif 'request' in inspect.getargvalues(stack[2][0]).locals:
-                request = inspect.getargvalues(stack[2][0]).locals['request']
-            elif 'request' in inspect.getargvalues(stack[3][0]).locals:
-                request = inspect.getargvalues(stack[3][0]).locals['request']
-            elif len(stack) >= 5 and 'request' in inspect.getargvalues(stack[4][0]).locals:
-                request = inspect.getargvalues(stack[4][0]).locals['request']
+            request = get_current_request()
 
         # If this eventlog is being triggered by something without a request, we
         # do not want to log it. This is usually some other form of logging
@@ -148,28 +190,28 @@ class EventLogManager(Manager):
             event_log.description = kwargs['description']
 
         # Application is the name of the app that the event is coming from
+        # and action is the name of the view that is being called.
         #
-        # We get the app name via inspecting. Due to our update_perms_and_save util
-        # we must filter out perms as an actual source. This is ok since there are
-        # no views within perms. - JMO 2012-05-14
+        # Both are taken from the view function resolved for the request.
+        # Without it (e.g. logging from a middleware), fall back on the module
+        # and function calling log(), skipping perms and save methods.
+        view_func = getattr(getattr(request, 'resolver_match', None), 'func', None)
+        caller = None
+        if view_func is None:
+            caller = get_caller_frame()
+
         if 'application' in kwargs:
             event_log.application = kwargs['application']
 
         if not event_log.application:
-            event_log.application = inspect.getmodule(stack[1][0]).__name__
-            if "perms" in event_log.application.split('.'):
-                event_log.application = inspect.getmodule(stack[2][0]).__name__
-                if "perms" in event_log.application.split('.'):
-                    event_log.application = inspect.getmodule(stack[3][0]).__name__
+            if view_func is not None:
+                event_log.application = getattr(view_func, '__module__', None) or ''
+            elif caller is not None:
+                event_log.application = caller.f_globals.get('__name__', '')
+            else:
+                event_log.application = ''
 
         event_log.application = event_log.application.split('.')
-        remove_list = ['tendenci',
-                        'models',
-                        'views',
-                        'addons',
-                        'core',
-                        'apps',
-                        'contrib']
 
         for item in remove_list:
             if item in event_log.application:
@@ -179,24 +221,14 @@ class EventLogManager(Manager):
         # in the list that we created
         event_log.application = ".".join(event_log.application)
 
-        # Action is the name of the view that is being called
-        #
-        # We get it via the stack, but we filter out stacks that are named
-        # 'save' or 'update_perms_and_save' to avoid getting the incorrect
-        # view. We don't want to miss on a save method override or our own
-        # updating. - JMO 2012-05-14
         if 'action' in kwargs:
             event_log.action = kwargs['action']
+        elif view_func is not None:
+            event_log.action = getattr(view_func, '__name__', '')
+        elif caller is not None:
+            event_log.action = caller.f_code.co_name
         else:
-            event_log.action = stack[1][3]
-            if stack[1][3] == "save":
-                if stack[2][3] == "save" or stack[2][3] == "update_perms_and_save":
-                    if stack[3][3] == "update_perms_and_save":
-                        event_log.action = stack[4][3]
-                    else:
-                        event_log.action = stack[3][3]
-                else:
-                    event_log.action = stack[2][3]
+            event_log.action = ''
 
         if event_log.application == "base":
             event_log.application = "homepage"
@@ -238,13 +270,7 @@ class EventLogManager(Manager):
                 if robot:
                     event_log.robot = robot
 
-            try:
-                event_log.server_ip_address = gethostbyname(gethostname())
-            except:
-                try:
-                    event_log.server_ip_address = settings.INTERNAL_IPS[0]
-                except:
-                    event_log.server_ip_address = '0.0.0.0'
+            event_log.server_ip_address = get_server_ip_address()
             if hasattr(request, 'path'):
                 event_log.url = request.path or ''
 
@@ -252,7 +278,14 @@ class EventLogManager(Manager):
         # IPv6 address are represented in 8 groups of 16 bits each,
         # and the groups are separated by colons :
         if "." in event_log.user_ip_address or ":" in event_log.user_ip_address:
-            event_log.save()
+            if kwargs.get('buffered', True) and getattr(settings, 'EVENTLOG_BUFFER_SIZE', 200):
+                # bulk_create doesn't call save(), prepare the event log here
+                if not event_log.uuid:
+                    event_log.uuid = str(uuid.uuid4())
+                event_log.verifydata()
+                event_log_buffer.add(event_log)
+            else:
+                event_log.save()
             return event_log
         else:
             return None
@@ -116,3 +116,20 @@ class EventLogTest(TestCase):
         }
 
         self.assertRaises(Exception, EventLog.objects.log(**event_log_defaults))
+
+    def test_log_buffered(self):
+        """
+            Buffered event logs are written on flush
+        """
+        from django.test import RequestFactory
+        from tendenci.apps.event_logs.buffer import event_log_buffer
+
+        request = RequestFactory().get('/', REMOTE_ADDR='127.0.0.1')
+        request.user = self.user
+
+        event_log = EventLog.objects.log(request=request, description='unit testing')
+        self.assertIsNotNone(event_log)
+        self.assertFalse(EventLog.objects.filter(uuid=event_log.uuid).exists())
+
+        event_log_buffer.flush()
+        self.assertTrue(EventLog.objects.filter(uuid=event_log.uuid).exists())
@@ -0,0 +1,9 @@
+# cache tag of the events of the calendar views (month, week and day),
+# invalidated whenever an event or an event type is saved or deleted
+EVENTS_CALENDAR_CACHE_TAG = "events_calendar"
+# cache tag of the iCalendar VEVENT of the events (which are also keyed by
+# their update_dt), invalidated when a place, organizer or speaker changes
+EVENTS_VEVENTS_CACHE_TAG = "events_vevents"
+# cache tag of the seats available of an event, invalidated
+# when its registrants or seat holds change
+EVENT_SEATS_CACHE_TAG = "event_seats.%s"
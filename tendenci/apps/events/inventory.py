@@ -0,0 +1,327 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.translation import gettext as _
+
+from tendenci.apps.base.cache import invalidate_cache_tag, tagged_cache_key
+from tendenci.apps.events.cache import EVENT_SEATS_CACHE_TAG
+from tendenci.apps.events.models import (RegConfPricing, Registrant,
+                                         RegistrationConfiguration, SeatHold)
+
+# Seat inventory of the event registrations
+#
+# The seats of an event are checked and taken under a lock on the row of
+# its registration configuration, so concurrent registrations for the same
+# event are serialized and the registration limit (and the registration cap
+# of each pricing) can't be exceeded between the check and the insert:
+#
+#     with reserve_seats(event, {pricing.pk: 2}, hold_key=get_hold_key(request)):
+#         add_registration(...)
+#
+# While a registration is checked out, its seats can be held with
+# hold_seats() for EVENT_SEAT_HOLD_TIMEOUT seconds. Once added, an unpaid
+# registration is held with hold_registration_seats() until its invoice is
+# paid, or for EVENT_PAYMENT_HOLD_TIMEOUT seconds: its registrants count as
+# taken meanwhile. The seats available shown on the pages come from
+# get_availability(), which is cached.
+
+
+class SeatsUnavailable(Exception):
+    pass
+
+
+def get_hold_key(request):
+    """
+    Returns the key identifying the seat holds of the visitor (the session key).
+    """
+    if not request.session.session_key:
+        request.session.save()
+    return request.session.session_key
+
+
+def get_seats_cache_key(event):
+    key = '.'.join([settings.CACHE_PRE_KEY, 'event_seats', str(event.pk)])
+    return tagged_cache_key(key, EVENT_SEATS_CACHE_TAG % event.pk)
+
+
+def clear_seats_cache(event_id):
+    invalidate_cache_tag(EVENT_SEATS_CACHE_TAG % event_id)
+
+
+def get_registration_hold_key(registration):
+    return 'registration.%s' % registration.pk
+
+
+def paid_or_held(event):
+    """
+    Returns the Q of the registrants paid, or whose registration is held
+    waiting for its payment.
+    """
+    held_registrations = SeatHold.objects.filter(event=event,
+                                                 registration__isnull=False,
+                                                 expire_dt__gt=datetime.now()
+                                                 ).values('registration_id')
+    return Q(registration__invoice__balance=0) | Q(registration__in=held_registrations)
+
+
+def count_spots_taken(event):
+    """
+    Returns the number of registrants of the event, not counting the
+    canceled ones, nor the unpaid ones if a payment is required (unless
+    their registration is held).
+    """
+    reg_conf = event.registration_configuration
+    registrants = Registrant.objects.filter(registration__event=event,
+                                            cancel_dt__isnull=True)
+    if reg_conf and reg_conf.payment_required:
+        registrants = registrants.filter(paid_or_held(event))
+    return registrants.count()
+
+
+def count_pricing_spots_taken(event):
+    """
+    Returns the number of registrants of each pricing with a
+    registration cap, as a dict by pricing id, with one query.
+    """
+    reg_conf = event.registration_configuration
+    if not reg_conf:
+        return {}
+    registrants = Registrant.objects.filter(pricing__reg_conf=reg_conf,
+                                            pricing__registration_cap__gt=0,
+                                            cancel_dt__isnull=True)
+    if reg_conf.payment_required:
+        registrants = registrants.filter(paid_or_held(event))
+    else:
+        registrants = registrants.filter(Q(pricing__payment_required=False) |
+                                         paid_or_held(event))
+    return dict(registrants.order_by().values('pricing_id'
+                                    ).annotate(count=Count('pk')
+                                    ).values_list('pricing_id', 'count'))
+
+
+def count_held_seats(event, exclude_hold_key=None):
+    """
+    Returns a tuple of (seats held, seats held by pricing id) for the event,
+    from the seat holds not expired. The registrations held are counted
+    by their registrants instead.
+    """
+    holds = SeatHold.objects.filter(event=event,
+                                    registration__isnull=True,
+                                    expire_dt__gt=datetime.now())
+    if exclude_hold_key:
+        holds = holds.exclude(hold_key=exclude_hold_key)
+    held, held_by_pricing = 0, {}
+    for pricing_id, quantity in holds.values_list('pricing_id', 'quantity'):
+        held += quantity
+        if pricing_id:
+            held_by_pricing[pricing_id] = held_by_pricing.get(pricing_id, 0) + quantity
+    return held, held_by_pricing
+
+
+def compute_availability(event, exclude_hold_key=None):
+    """
+    Returns the seats of the event as a dict:
+        spots_taken: the number of registrants
+        spots_available: the seats left, not counting the seats held
+            (0 if full, -1 if there is no limit)
+        pricings: a tuple of (spots taken, spots available) by pricing id,
+            for the pricings with a registration cap
+        pricings_taken: the spots_taken stored on the pricings
+    """
+    limit = event.get_limit()
+    spots_taken = count_spots_taken(event)
+    held, held_by_pricing = count_held_seats(event, exclude_hold_key=exclude_hold_key)
+
+    spots_available = -1
+    if limit > 0:
+        spots_available = max(0, limit - spots_taken - held)
+
+    pricings, pricings_taken = {}, {}
+    if event.registration_configuration_id:
+        pricing_spots_taken = count_pricing_spots_taken(event)
+        capped_pricings = RegConfPricing.objects.filter(
+                                reg_conf_id=event.registration_configuration_id,
+                                registration_cap__gt=0,
+                                status=True
+                                ).values_list('pk', 'registration_cap', 'spots_taken')
+        for pk, registration_cap, stored_spots_taken in capped_pricings:
+            taken = pricing_spots_taken.get(pk, 0)
+            pricings[pk] = (taken, max(0, registration_cap - taken - held_by_pricing.get(pk, 0)))
+            pricings_taken[pk] = stored_spots_taken
+
+    return {'spots_taken': spots_taken,
+            'spots_available': spots_available,
+            'pricings': pricings,
+            'pricings_taken': pricings_taken}
+
+
+def get_availability(event):
+    """
+    Returns the seats of the event (see compute_availability), cached for
+    EVENT_SEATS_CACHE_TIMEOUT seconds. Meant for display: the seats are
+    checked again when they're taken.
+
+    The spots_taken of the pricings (used to filter the pricings available)
+    are updated when the seats are computed, rather than on every view.
+    """
+    key = get_seats_cache_key(event)
+    availability = cache.get(key)
+    if availability is None:
+        availability = compute_availability(event)
+        for pk, (taken, available) in availability['pricings'].items():
+            if availability['pricings_taken'][pk] != taken:
+                RegConfPricing.objects.filter(pk=pk).update(spots_taken=taken)
+        cache.set(key, availability, getattr(settings, 'EVENT_SEATS_CACHE_TIMEOUT', 30))
+    return availability
+
+
+def get_visitor_availability(event, request):
+    """
+    Returns the seats of the event for the visitor: the seats held by the
+    visitor are available to them. From get_availability() if the visitor
+    holds no seats.
+    """
+    hold_key = request.session.session_key
+    if hold_key and SeatHold.objects.filter(event=event,
+                                            hold_key=hold_key,
+                                            expire_dt__gt=datetime.now()).exists():
+        return compute_availability(event, exclude_hold_key=hold_key)
+    return get_availability(event)
+
+
+def check_availability(availability, quantities):
+    """
+    Raises SeatsUnavailable if the seats of quantities, a dict of the
+    number of seats by pricing id, are not available.
+    """
+    spots_available = availability['spots_available']
+    if spots_available >= 0 and sum(quantities.values()) > spots_available:
+        raise SeatsUnavailable(_('Registration is full.'))
+    for pricing_id, quantity in quantities.items():
+        if pricing_id in availability['pricings']:
+            if quantity > availability['pricings'][pricing_id][1]:
+                raise SeatsUnavailable(_('No more seats available for this price option.'))
+
+
+def lock_seats(event):
+    """
+    Locks the seats of the event until the end of the transaction.
+    """
+    list(RegistrationConfiguration.objects.select_for_update().filter(
+                                    pk=event.registration_configuration_id))
+
+
+def hold_seats(event, quantities, hold_key):
+    """
+    Holds the seats of quantities (a dict of the number of seats by pricing
+    id, or None for the seats without a capped pricing) for hold_key, in
+    place of the seats it held before. Raises SeatsUnavailable.
+    Returns the time the seats are held until.
+    """
+    now = datetime.now()
+    expire_dt = now + timedelta(seconds=getattr(settings, 'EVENT_SEAT_HOLD_TIMEOUT', 600))
+    with transaction.atomic():
+        lock_seats(event)
+        SeatHold.objects.filter(Q(event=event),
+                                Q(hold_key=hold_key) | Q(expire_dt__lte=now)).delete()
+        check_availability(compute_availability(event, exclude_hold_key=hold_key), quantities)
+        SeatHold.objects.bulk_create([
+            SeatHold(event=event,
+                     pricing_id=pricing_id,
+                     hold_key=hold_key,
+                     quantity=quantity,
+                     expire_dt=expire_dt)
+            for pricing_id, quantity in quantities.items() if quantity])
+    clear_seats_cache(event.pk)
+    return expire_dt
+
+
+def release_seats(event, hold_key):
+    """
+    Releases the seats held for hold_key.
+    """
+    if SeatHold.objects.filter(event=event, hold_key=hold_key).delete()[0]:
+        clear_seats_cache(event.pk)
+
+
+def hold_registration_seats(registration, check=False):
+    """
+    Holds the seats of an unpaid registration, in place of its previous
+    hold, until its invoice is paid or for EVENT_PAYMENT_HOLD_TIMEOUT
+    seconds. Meant to be called with the seats locked: in the block of
+    reserve_seats() the registration is added in, or under lock_seats().
+
+    If check, raises SeatsUnavailable if the seats of the registration
+    were taken since its previous hold expired (the transaction is then
+    meant to be rolled back).
+    """
+    invoice = registration.invoice
+    if not invoice or invoice.balance <= 0:
+        return
+    event = registration.event
+    now = datetime.now()
+    holds = SeatHold.objects.filter(registration=registration)
+    was_held = holds.filter(expire_dt__gt=now).exists()
+    holds.delete()
+
+    registrants = registration.registrant_set.filter(cancel_dt__isnull=True)
+    expire_dt = now + timedelta(seconds=getattr(settings, 'EVENT_PAYMENT_HOLD_TIMEOUT', 1800))
+    SeatHold.objects.create(event=event,
+                            registration=registration,
+                            hold_key=get_registration_hold_key(registration),
+                            quantity=registrants.count(),
+                            expire_dt=expire_dt)
+
+    if check and not was_held:
+        # the registrants count as taken again: the event (or their
+        # pricings) must not be overbooked now
+        limit = event.get_limit()
+        held, held_by_pricing = count_held_seats(event)
+        if limit > 0 and count_spots_taken(event) + held > limit:
+            raise SeatsUnavailable(_('Registration is full.'))
+        pricing_spots_taken = count_pricing_spots_taken(event)
+        pricings = RegConfPricing.objects.filter(
+                        pk__in=registrants.values('pricing_id'),
+                        registration_cap__gt=0).values_list('pk', 'registration_cap')
+        for pk, registration_cap in pricings:
+            if pricing_spots_taken.get(pk, 0) + held_by_pricing.get(pk, 0) > registration_cap:
+                raise SeatsUnavailable(_('No more seats available for this price option.'))
+
+
+@contextmanager
+def reserve_seats(event, quantities, hold_key=None, override=False):
+    """
+    Checks that the seats of quantities are available and keeps them locked
+    while the block is executed, in a transaction. The registrants are meant
+    to be created in the block. The seats held for hold_key are released
+    at the end. Raises SeatsUnavailable, unless override (by an admin).
+    """
+    with transaction.atomic():
+        lock_seats(event)
+        if not override:
+            check_availability(compute_availability(event, exclude_hold_key=hold_key), quantities)
+        yield
+        if hold_key:
+            SeatHold.objects.filter(event=event, hold_key=hold_key).delete()
+    clear_seats_cache(event.pk)
+
+
+def get_registrant_quantities(registrant_formset, pricing=None):
+    """
+    Returns the number of seats by pricing id of a registrant formset.
+    """
+    if pricing and pricing.quantity > 1:
+        # a table, every registrant of which gets the pricing
+        return {pricing.pk if pricing.registration_cap else None: pricing.quantity}
+    quantities = {}
+    for form in registrant_formset.forms:
+        if form.cleaned_data.get('DELETE'):
+            continue
+        form_pricing = form.cleaned_data.get('pricing') or pricing
+        pricing_id = form_pricing.pk if form_pricing and form_pricing.registration_cap else None
+        quantities[pricing_id] = quantities.get(pricing_id, 0) + 1
+    return quantities
@@ -0,0 +1,171 @@
+import time
+from threading import Barrier, BrokenBarrierError, Lock, Thread
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Load test of the seat inventory of the event registrations:
+    a number of concurrent registrants try to register for an event
+    with a registration limit, and the command checks that the event
+    is not oversold and reports the latency of the seats available
+    (as read by the event pages) and of the registrations.
+
+    With --payment-required, each registration is added unpaid (its seats
+    held), then paid after the seats are checked again, the way pay_online
+    does.
+
+    The registration limit and the payment requirement of the event are
+    changed for the duration of the test and restored at the end, and the
+    test registrations are deleted. Meant for a staging site.
+
+    Example: python manage.py benchmark_event_registration --event=12 --registrants=200 --limit=50
+             python manage.py benchmark_event_registration --event=12 --payment-required
+    """
+    help = "Load test the seat inventory of an event"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', type=int, required=True,
+            help='The id of the event to register for')
+        parser.add_argument('--registrants', type=int, default=200,
+            help='The number of concurrent registrants')
+        parser.add_argument('--limit', type=int, default=50,
+            help='The registration limit of the event during the test')
+        parser.add_argument('--payment-required', action='store_true',
+            help='Require the payment of the registrations')
+
+    def handle(self, *args, **options):
+        from datetime import datetime
+        from django.contrib.contenttypes.models import ContentType
+        from django.db import connection, transaction
+        from tendenci.apps.events.inventory import (SeatsUnavailable,
+                                                    clear_seats_cache,
+                                                    count_spots_taken,
+                                                    hold_registration_seats,
+                                                    lock_seats,
+                                                    reserve_seats)
+        from tendenci.apps.events.models import Event, Registration
+        from tendenci.apps.invoices.models import Invoice
+
+        try:
+            event = Event.objects.get(pk=options['event'])
+        except Event.DoesNotExist:
+            raise CommandError('Event %s not found.' % options['event'])
+        reg_conf = event.registration_configuration
+        if not reg_conf:
+            raise CommandError('The event has no registration configuration.')
+
+        num_registrants = options['registrants']
+        with_payment = options['payment_required']
+        reg8n_type = ContentType.objects.get_for_model(Registration)
+        prefix = 'benchmark_registration_%d_' % int(time.time())
+        limit, payment_required = reg_conf.limit, reg_conf.payment_required
+        spots_taken_before = count_spots_taken(event)
+
+        barrier = Barrier(num_registrants, timeout=60)
+        lock = Lock()
+        results = {'registered': 0, 'rejected': 0, 'errors': 0,
+                   'read_times': [], 'register_times': []}
+
+        def register(i):
+            try:
+                event = Event.objects.select_related('registration_configuration'
+                                                     ).get(pk=options['event'])
+                barrier.wait()
+
+                start = time.time()
+                event.get_spots_status(cached=True)
+                read_time = time.time() - start
+
+                start = time.time()
+                try:
+                    with reserve_seats(event, {None: 1}):
+                        reg8n = Registration.objects.create(event=event, amount_paid=0)
+                        reg8n.registrant_set.create(email='%s%d@example.com' % (prefix, i),
+                                                    first_name='Registrant',
+                                                    last_name=str(i))
+                        if with_payment:
+                            invoice = Invoice(object_type=reg8n_type,
+                                              object_id=reg8n.pk,
+                                              due_date=datetime.now(),
+                                              subtotal=1,
+                                              total=1,
+                                              balance=1)
+                            invoice.save()
+                            reg8n.invoice = invoice
+                            reg8n.save()
+                            hold_registration_seats(reg8n)
+                    if with_payment:
+                        # checked again when paid
+                        with transaction.atomic():
+                            lock_seats(event)
+                            hold_registration_seats(reg8n, check=True)
+                            invoice.balance = 0
+                            invoice.save()
+                    outcome = 'registered'
+                except SeatsUnavailable:
+                    outcome = 'rejected'
+                register_time = time.time() - start
+
+                with lock:
+                    results[outcome] += 1
+                    results['read_times'].append(read_time)
+                    results['register_times'].append(register_time)
+            except BrokenBarrierError:
+                # another registrant failed before the start
+                with lock:
+                    results['errors'] += 1
+            except Exception as e:
+                # release the registrants waiting for this one
+                barrier.abort()
+                with lock:
+                    results['errors'] += 1
+                print('Registrant %d: %s' % (i, e))
+            finally:
+                connection.close()
+
+        reg_conf.limit = spots_taken_before + options['limit']
+        reg_conf.payment_required = with_payment
+        reg_conf.save(update_fields=['limit', 'payment_required'])
+        clear_seats_cache(event.pk)
+        try:
+            threads = [Thread(target=register, args=(i,)) for i in range(num_registrants)]
+            start = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - start
+
+            registered = count_spots_taken(event) - spots_taken_before
+        finally:
+            registrations = Registration.objects.filter(event=event,
+                                    registrant__email__startswith=prefix)
+            Invoice.objects.filter(object_type=reg8n_type,
+                                   object_id__in=list(registrations.values_list('pk', flat=True))
+                                   ).delete()
+            registrations.delete()
+            reg_conf.limit, reg_conf.payment_required = limit, payment_required
+            reg_conf.save(update_fields=['limit', 'payment_required'])
+            clear_seats_cache(event.pk)
+
+        def percentile(times, p):
+            if not times:
+                return 0
+            times = sorted(times)
+            return times[min(len(times) - 1, int(len(times) * p))] * 1000
+
+        print('%d registrants%s for %d seats in %.2fs: %d registered, %d rejected, %d errors' % (
+              num_registrants, ' (payment required)' if with_payment else '',
+              options['limit'], elapsed,
+              results['registered'], results['rejected'], results['errors']))
+        print('seats available read: p50 %.1fms, p95 %.1fms' % (
+              percentile(results['read_times'], 0.5), percentile(results['read_times'], 0.95)))
+        print('registration: p50 %.1fms, p95 %.1fms' % (
+              percentile(results['register_times'], 0.5), percentile(results['register_times'], 0.95)))
+
+        if registered > options['limit']:
+            raise CommandError('Oversold: %d registrants for %d seats.' % (
+                               registered, options['limit']))
+        print('Not oversold (%d registrants for %d seats).' % (registered, options['limit']))
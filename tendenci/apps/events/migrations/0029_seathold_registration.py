@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0028_seathold'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seathold',
+            name='registration',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='seat_holds', to='events.registration'),
+        ),
+    ]
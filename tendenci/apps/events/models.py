@@ -359,11 +359,12 @@ class RegistrationConfiguration(models.Model):
                     )
         if q_obj:
             pricings = pricings.filter(q_obj).distinct()
-            
-        # check and update spots_taken
-        for pricing in pricings:
-            if pricing.registration_cap:
-                pricing.update_spots_taken()
+
+        # brings the spots_taken of the pricings up to date, once
+        # per EVENT_SEATS_CACHE_TIMEOUT rather than on every view
+        if hasattr(self, 'event'):
+            from tendenci.apps.events.inventory import get_availability
+            get_availability(self.event)
 
         return pricings
 
@@ -2299,10 +2300,18 @@ class Event(TendenciBaseModel):
 
         return sorted(days)
 
-    def get_spots_status(self):
+    def get_spots_status(self, cached=False):
         """
         Return a tuple of (spots_taken, spots_available) for this event.
+
+        With cached, the seats come from the cached seat availability
+        (see events.inventory), which also counts the seats held as taken.
         """
+        if cached:
+            from tendenci.apps.events.inventory import get_availability
+            availability = get_availability(self)
+            return (availability['spots_taken'], availability['spots_available'])
+
         limit = self.get_limit()
         payment_required = self.registration_configuration.payment_required
 
@@ -2771,3 +2780,25 @@ class RegAddonOption(models.Model):
     def __str__(self):
         #return "%s: %s - %s" % (self.regaddon.pk, self.option.title, self.selected_option)
         return "%s: %s" % (self.regaddon.pk, self.option.title)
+
+
+class SeatHold(models.Model):
+    """
+    Seats held for a registration being checked out, or for an unpaid
+    registration waiting for its payment. The held seats count as taken
+    until expire_dt (see events.inventory).
+    """
+    event = models.ForeignKey(Event, related_name='seat_holds', on_delete=models.CASCADE)
+    registration = models.ForeignKey(Registration, null=True, blank=True,
+                                     related_name='seat_holds', on_delete=models.CASCADE)
+    pricing = models.ForeignKey(RegConfPricing, null=True, blank=True, on_delete=models.CASCADE)
+    hold_key = models.CharField(max_length=40)
+    quantity = models.PositiveIntegerField(default=1)
+    expire_dt = models.DateTimeField(db_index=True)
+    create_dt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        app_label = 'events'
+
+    def __str__(self):
+        return "%s: %s (%s)" % (self.event_id, self.quantity, self.hold_key)
@@ -1,8 +1,13 @@
+from datetime import datetime
 from django.utils.translation import gettext_noop as _
 
 from tendenci.apps.notifications import models as notification
-from django.db.models.signals import post_save
-from tendenci.apps.events.models import Event, Registrant, Registration
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from tendenci.apps.base.cache import invalidate_cache_tag
+from tendenci.apps.events.cache import (EVENTS_CALENDAR_CACHE_TAG, EVENTS_VEVENTS_CACHE_TAG,
+                                        EVENT_SEATS_CACHE_TAG)
+from tendenci.apps.events.models import (Event, Registrant, Registration, Type,
+                                        Place, Organizer, Speaker)
 from tendenci.apps.invoices.models import Invoice
 from tendenci.apps.contributions.signals import save_contribution
 
@@ -64,5 +69,48 @@ def create_notice_types(sender, **kwargs):
         verbosity=verbosity)
 
 
+def invalidate_calendar_events(sender, **kwargs):
+    invalidate_cache_tag(EVENTS_CALENDAR_CACHE_TAG)
+
+
+def invalidate_vevents(sender, **kwargs):
+    invalidate_cache_tag(EVENTS_VEVENTS_CACHE_TAG)
+
+
+def invalidate_event_seats(sender, instance, **kwargs):
+    """
+    Refreshes the seats available of the event when a registrant
+    is added, cancelled or deleted.
+    """
+    try:
+        event_id = instance.registration.event_id
+    except Registration.DoesNotExist:
+        # deleted along with its registration
+        return
+    invalidate_cache_tag(EVENT_SEATS_CACHE_TAG % event_id)
+
+
+def cache_vevent(sender, instance, **kwargs):
+    """
+    Re-creates the iCalendar VEVENT of an upcoming event when it's saved.
+    """
+    from tendenci.apps.events.utils import get_ical_site_info, get_vevent_fragments
+
+    if instance.start_dt and instance.start_dt >= datetime.now():
+        get_vevent_fragments([(instance.pk, instance.update_dt)], get_ical_site_info())
+
+
 def init_signals():
     post_save.connect(save_contribution, sender=Event, weak=False)
+    for model in (Event, Type):
+        post_save.connect(invalidate_calendar_events, sender=model, weak=False)
+        post_delete.connect(invalidate_calendar_events, sender=model, weak=False)
+    post_save.connect(cache_vevent, sender=Event, weak=False)
+    post_save.connect(invalidate_event_seats, sender=Registrant, weak=False)
+    post_delete.connect(invalidate_event_seats, sender=Registrant, weak=False)
+    # the VEVENT of an event includes its place, organizers and speakers
+    for model in (Place, Organizer, Speaker):
+        post_save.connect(invalidate_vevents, sender=model, weak=False)
+        post_delete.connect(invalidate_vevents, sender=model, weak=False)
+    for model in (Organizer, Speaker):
+        m2m_changed.connect(invalidate_vevents, sender=model.event.through, weak=False)
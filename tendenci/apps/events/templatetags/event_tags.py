@@ -13,7 +13,8 @@ from django.utils.translation import gettext_lazy as _
 from tendenci.apps.events.models import Event, Registrant, Type
 from tendenci.apps.events.utils import (registration_earliest_time,
                                         registration_has_started,
-                                        registration_has_ended,)
+                                        registration_has_ended,
+                                        CalendarEvents)
 from tendenci.apps.base.template_tags import ListNode, parse_tag_kwargs
 from tendenci.apps.perms.utils import get_query_filters
 from tendenci.apps.events.forms import EventSimpleSearchForm
@@ -149,7 +150,7 @@ def registration_pricing_and_button(context, event, user):
 
     # spots taken
     if limit > 0:
-        spots_taken, spots_available = event.get_spots_status()
+        spots_taken, spots_available = event.get_spots_status(cached=True)
     else:
         spots_taken, spots_available = (-1, -1)
 
@@ -233,6 +234,13 @@ class EventListNode(Node):
         else:
             group = None
 
+        # the calendar views fetch the events of all their days at once
+        calendar_events = context.get('calendar_events', None)
+        if self.ordering == "single_day" and isinstance(calendar_events, CalendarEvents) \
+                and calendar_events.matches(type_slug, group, search_text):
+            context[self.context_var] = calendar_events.get(day.date() if isinstance(day, datetime) else day, [])
+            return ''
+
         types = Type.objects.filter(slug=type_slug)
 
         type = None
@@ -1,3 +1,98 @@
+from datetime import datetime, timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.db import transaction
+from django.test import RequestFactory, TestCase
+
+from tendenci.apps.events.inventory import (SeatsUnavailable, compute_availability,
+                                            get_hold_key, get_visitor_availability,
+                                            hold_registration_seats, hold_seats,
+                                            lock_seats, reserve_seats)
+from tendenci.apps.events.models import (Event, Registration, RegistrationConfiguration,
+                                         SeatHold)
+from tendenci.apps.invoices.models import Invoice
+
+
+class SeatHoldTest(TestCase):
+
+    def setUp(self):
+        reg_conf = RegistrationConfiguration.objects.create(limit=2, enabled=True)
+        self.event = Event.objects.create(title='Test Event',
+                                          start_dt=datetime.now() + timedelta(days=7),
+                                          end_dt=datetime.now() + timedelta(days=8),
+                                          registration_configuration=reg_conf)
+        registration = Registration.objects.create(event=self.event, amount_paid=0)
+        registration.registrant_set.create(email='first@example.com')
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+        return request
+
+    def add_invoice(self, registration, balance):
+        invoice = Invoice(due_date=datetime.now(), subtotal=10, total=10, balance=balance)
+        invoice.save()
+        registration.invoice = invoice
+        registration.save()
+
+    def register(self, request, balance=None):
+        with reserve_seats(self.event, {None: 1}, hold_key=get_hold_key(request)):
+            registration = Registration.objects.create(event=self.event, amount_paid=0)
+            registration.registrant_set.create(email='last@example.com')
+            if balance is not None:
+                self.add_invoice(registration, balance)
+                hold_registration_seats(registration)
+        return registration
+
+    def check_payment(self, registration):
+        with transaction.atomic():
+            lock_seats(self.event)
+            hold_registration_seats(registration, check=True)
+
+    def test_hold_last_seat_then_confirm(self):
+        request, other_request = self.get_request(), self.get_request()
+        hold_seats(self.event, {None: 1}, get_hold_key(request))
+
+        # the last seat is available to the visitor holding it only
+        self.assertEqual(get_visitor_availability(self.event, request)['spots_available'], 1)
+        self.assertEqual(get_visitor_availability(self.event, other_request)['spots_available'], 0)
+        with self.assertRaises(SeatsUnavailable):
+            self.register(other_request)
+
+        self.register(request)
+        availability = get_visitor_availability(self.event, request)
+        self.assertEqual(availability['spots_taken'], 2)
+        self.assertEqual(availability['spots_available'], 0)
+        self.assertFalse(self.event.seat_holds.exists())
+
+    def test_hold_unpaid_registration_until_paid(self):
+        reg_conf = self.event.registration_configuration
+        reg_conf.payment_required = True
+        reg_conf.save()
+        self.add_invoice(Registration.objects.get(), 0)
+        request, other_request = self.get_request(), self.get_request()
+        hold_seats(self.event, {None: 1}, get_hold_key(request))
+
+        # the unpaid registrant keeps the last seat while paying
+        registration = self.register(request, balance=10)
+        self.assertEqual(compute_availability(self.event)['spots_taken'], 2)
+        with self.assertRaises(SeatsUnavailable):
+            self.register(other_request, balance=10)
+        self.check_payment(registration)
+
+        # the seat is released when the hold expires, and taken by another
+        # registrant: the payment is then blocked
+        SeatHold.objects.filter(registration=registration).update(
+                                    expire_dt=datetime.now() - timedelta(seconds=1))
+        self.assertEqual(compute_availability(self.event)['spots_available'], 1)
+        self.register(other_request, balance=0)
+        with self.assertRaises(SeatsUnavailable):
+            self.check_payment(registration)
+        self.assertEqual(compute_availability(self.event)['spots_taken'], 2)
+
+
+
 # coming soon
 # import logging
 # 
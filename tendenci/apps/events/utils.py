@@ -14,6 +14,7 @@ from decimal import Decimal
 import dateutil.parser as dparser
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.core.files.storage import default_storage
 from django.conf import settings
@@ -45,6 +46,8 @@ from tendenci.apps.base.utils import (adjust_datetime_to_timezone,
 from tendenci.apps.exports.utils import full_model_to_dict
 from tendenci.apps.emails.models import Email
 from tendenci.apps.base.utils import escape_csv
+from tendenci.apps.base.cache import tagged_cache_key, get_cache_tag_generation
+from tendenci.apps.events.cache import EVENTS_CALENDAR_CACHE_TAG, EVENTS_VEVENTS_CACHE_TAG
 
 
 try:
@@ -380,72 +383,168 @@ def get_ievent(request, d, event_id):
     return e_str
 
 
-def get_vevents(user, d):
-    from tendenci.apps.events.models import Event
+ICALENDAR_HEADER = ("BEGIN:VCALENDAR\r\n"
+                    "PRODID:-//Tendenci - The Open Source AMS for Associations//Tendenci 12 MIMEDIR//EN\r\n"
+                    "VERSION:2.0\r\n"
+                    "METHOD:PUBLISH\r\n")
+ICALENDAR_FOOTER = "END:VCALENDAR\r\n"
 
-    site_url = get_setting('site', 'global', 'siteurl')
 
-    e_str = ""
+def get_ical_site_info():
+    """
+    Returns the site url and domain name used in the iCalendar feeds.
+    """
+    d = {}
+    d['site_url'] = get_setting('site', 'global', 'siteurl')
+    match = re.search(r'http(s)?://(www.)?([^/]+)', d['site_url'])
+    if match:
+        d['domain_name'] = match.group(3)
+    else:
+        d['domain_name'] = ""
+    return d
+
+
+def build_vevent(event, d, dtstamp):
+    """
+    Returns the VEVENT of an event for the iCalendar feeds.
+    The organizers, speakers and place are expected to be prefetched.
+    """
+    e_str = ["BEGIN:VEVENT\r\n"]
+    e_str.append("DTSTAMP:{}\r\n".format(dtstamp))
+
+    # organizer
+    organizers = event.organizer_set.all()
+    if organizers:
+        organizer_name_list = [organizer.name for organizer in organizers]
+        e_str.append("ORGANIZER:%s\r\n" % (', '.join(organizer_name_list)))
+
+    # date time
+    time_zone = event.timezone
+    if not time_zone:
+        time_zone = settings.TIME_ZONE
+
+    if event.start_dt:
+        start_dt = adjust_datetime_to_timezone(event.start_dt, time_zone, 'GMT')
+        start_dt = start_dt.strftime('%Y%m%dT%H%M%SZ')
+        e_str.append("DTSTART:%s\r\n" % (start_dt))
+    if event.end_dt:
+        end_dt = adjust_datetime_to_timezone(event.end_dt, time_zone, 'GMT')
+        end_dt = end_dt.strftime('%Y%m%dT%H%M%SZ')
+        e_str.append("DTEND:%s\r\n" % (end_dt))
+
+    # location
+    if event.place:
+        e_str.append("LOCATION:%s\r\n" % (event.place.name))
+
+    e_str.append("TRANSP:OPAQUE\r\n")
+    e_str.append("SEQUENCE:0\r\n")
+
+    # uid
+    e_str.append("UID:uid%d@%s\r\n" % (event.pk, d['domain_name']))
+
+    d = dict(d, event_url="%s%s" % (d['site_url'], reverse('event', args=[event.pk])))
+
+    # text description
+    e_str.append("DESCRIPTION:%s\r\n" % (build_ical_text(event, d)))
+    #  html description
+    #e_str.append("X-ALT-DESC;FMTTYPE=text/html:%s\n" % (build_ical_html(event,d)))
+
+    e_str.append("SUMMARY:%s\r\n" % strip_tags(event.title))
+    e_str.append("PRIORITY:5\r\n")
+    e_str.append("CLASS:PUBLIC\r\n")
+    e_str.append("BEGIN:VALARM\r\n")
+    e_str.append("TRIGGER:-PT30M\r\n")
+    e_str.append("ACTION:DISPLAY\r\n")
+    e_str.append("DESCRIPTION:Reminder\r\n")
+    e_str.append("END:VALARM\r\n")
+    e_str.append("END:VEVENT\r\n")
+
+    return ''.join(e_str)
+
+
+def get_vevent_cache_key(event_id, update_dt, generation):
+    # a new key every time the event is saved, and every time
+    # the generation of EVENTS_VEVENTS_CACHE_TAG changes
+    return '.'.join([settings.CACHE_PRE_KEY, 'events_vevent', str(event_id),
+                     update_dt.strftime('%Y%m%d%H%M%S%f') if update_dt else '',
+                     'g%s' % generation])
+
+
+def get_vevent_fragments(events, d):
+    """
+    Returns the VEVENTs of the events, a list of (id, update_dt) tuples,
+    in the same order. Each VEVENT is serialized once and cached until
+    the event is saved again; only the missing ones are built, from a
+    single query.
+    """
+    generation = get_cache_tag_generation(EVENTS_VEVENTS_CACHE_TAG)
+    keys = [get_vevent_cache_key(event_id, update_dt, generation) for event_id, update_dt in events]
+    fragments = cache.get_many(keys)
+
+    missing = [event_id for (event_id, update_dt), key in zip(events, keys) if key not in fragments]
+    if missing:
+        dtstamp = adjust_datetime_to_timezone(datetime.now(), settings.TIME_ZONE, 'GMT').strftime('%Y%m%dT%H%M%SZ')
+        built = {}
+        for event in Event.objects.filter(pk__in=missing).select_related(
+                        'place').prefetch_related('organizer_set', 'speaker_set'):
+            built[get_vevent_cache_key(event.pk, event.update_dt, generation)] = build_vevent(event, d, dtstamp)
+        cache.set_many(built)
+        fragments.update(built)
+
+    return [fragments[key] for key in keys if key in fragments]
+
+
+def get_vevent_ids(user):
+    """
+    Returns the (id, update_dt) of the upcoming events visible to the user.
+
+    The list is shared by all the users of the same class (anonymous
+    users or superusers) and cached until an event is saved.
+    """
+    now = datetime.now()
+    cache_key = None
+    user_class = get_calendar_cache_user_class(user)
+    if user_class:
+        cache_key = '.'.join([settings.CACHE_PRE_KEY, 'events_vevent_ids', user_class])
+        cache_key = tagged_cache_key(cache_key, EVENTS_CALENDAR_CACHE_TAG)
+        events = cache.get(cache_key)
+        if events is not None:
+            # events that started since the list was cached are left out
+            return [(event_id, update_dt) for event_id, update_dt, start_dt in events
+                    if start_dt >= now]
+
     # load only upcoming events by default
     filters = get_query_filters(user, 'events.view_event')
-    events = Event.objects.filter(filters).filter(start_dt__gte=datetime.now())
-    events = events.order_by('start_dt')
-    
-    dtstamp = adjust_datetime_to_timezone(datetime.now(), settings.TIME_ZONE, 'UTC').strftime('%Y%m%dT%H%M%SZ')
+    events = Event.objects.filter(filters).filter(start_dt__gte=now).distinct()
+    events = list(events.order_by('start_dt').values_list('id', 'update_dt', 'start_dt'))
+    if cache_key:
+        cache.set(cache_key, events)
 
-    for event in events:
-        e_str += "BEGIN:VEVENT\r\n"
-        e_str += "DTSTAMP:{}\r\n".format(dtstamp)
-
-        # organizer
-        organizers = event.organizer_set.all()
-        if organizers:
-            organizer_name_list = [organizer.name for organizer in organizers]
-            e_str += "ORGANIZER:%s\r\n" % (', '.join(organizer_name_list))
-
-        # date time
-        time_zone = event.timezone
-        if not time_zone:
-            time_zone = settings.TIME_ZONE
-
-        if event.start_dt:
-            start_dt = adjust_datetime_to_timezone(event.start_dt, time_zone, 'GMT')
-            start_dt = start_dt.strftime('%Y%m%dT%H%M%SZ')
-            e_str += "DTSTART:%s\r\n" % (start_dt)
-        if event.end_dt:
-            end_dt = adjust_datetime_to_timezone(event.end_dt, time_zone, 'GMT')
-            end_dt = end_dt.strftime('%Y%m%dT%H%M%SZ')
-            e_str += "DTEND:%s\r\n" % (end_dt)
+    return [(event_id, update_dt) for event_id, update_dt, start_dt in events]
 
-        # location
-        if event.place:
-            e_str += "LOCATION:%s\r\n" % (event.place.name)
 
-        e_str += "TRANSP:OPAQUE\r\n"
-        e_str += "SEQUENCE:0\r\n"
-
-        # uid
-        e_str += "UID:uid%d@%s\r\n" % (event.pk, d['domain_name'])
+def iter_vevents(user, d, batch_size=200):
+    """
+    Yields the VEVENTs of the upcoming events visible to the user,
+    by batches of cached fragments.
+    """
+    events = get_vevent_ids(user)
+    for i in range(0, len(events), batch_size):
+        yield ''.join(get_vevent_fragments(events[i:i + batch_size], d))
 
-        event_url = "%s%s" % (site_url, reverse('event', args=[event.pk]))
-        d['event_url'] = event_url
 
-        # text description
-        e_str += "DESCRIPTION:%s\r\n" % (build_ical_text(event,d))
-        #  html description
-        #e_str += "X-ALT-DESC;FMTTYPE=text/html:%s\n" % (build_ical_html(event,d))
+def iter_icalendar(user, d):
+    """
+    Yields the iCalendar feed of the user, suitable for streaming.
+    """
+    yield ICALENDAR_HEADER
+    for vevents in iter_vevents(user, d):
+        yield vevents
+    yield ICALENDAR_FOOTER
 
-        e_str += "SUMMARY:%s\r\n" % strip_tags(event.title)
-        e_str += "PRIORITY:5\r\n"
-        e_str += "CLASS:PUBLIC\r\n"
-        e_str += "BEGIN:VALARM\r\n"
-        e_str += "TRIGGER:-PT30M\r\n"
-        e_str += "ACTION:DISPLAY\r\n"
-        e_str += "DESCRIPTION:Reminder\r\n"
-        e_str += "END:VALARM\r\n"
-        e_str += "END:VEVENT\r\n"
 
-    return e_str
+def get_vevents(user, d):
+    return ''.join(iter_vevents(user, d))
 
 
 def build_ical_text(event, d):
@@ -2271,3 +2370,101 @@ def handle_registration_payment(reg8n):
             email_admins(event, reg8n.invoice.total, self_reg8n, reg8n, registrants)
 
         return None
+
+
+class CalendarEvents(dict):
+    """
+    The events of a calendar page (month, week or day view) by day.
+
+    The events of the whole date range are fetched in one query and
+    bucketed into days, multi-day events appearing on each day they span.
+    The event_list template tag picks the events of a day from here
+    instead of running a query per day.
+    """
+    def __init__(self, events_by_day, type_slug=None, group=None, search_text=''):
+        super(CalendarEvents, self).__init__(events_by_day)
+        self.params = (type_slug or None, str(group or ''), search_text or '')
+
+    def matches(self, type_slug=None, group=None, search_text=''):
+        return self.params == (type_slug or None, str(group or ''), search_text or '')
+
+
+def get_calendar_cache_user_class(user):
+    """
+    Returns the class of users sharing the same calendar events,
+    or None if the events visible depend on the user.
+    """
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.profile.is_superuser:
+        return 'superuser'
+    return None
+
+
+def get_calendar_events(user, first_day, last_day, type_slug=None, group=None,
+                        search_text='', cat=None, query=''):
+    """
+    Returns the events visible to the user between first_day and last_day
+    (dates, both included) as a CalendarEvents, ordered as on the calendar
+    (priority first, then by start time).
+
+    The events of anonymous users and superusers are cached per date
+    range, type and group, unless a search is applied.
+    """
+    cache_key = None
+    user_class = get_calendar_cache_user_class(user)
+    if user_class and not (search_text or cat or query):
+        cache_key = '.'.join([settings.CACHE_PRE_KEY, 'events_calendar', user_class,
+                              first_day.isoformat(), last_day.isoformat(),
+                              type_slug or '', str(group or '')])
+        cache_key = tagged_cache_key(cache_key, EVENTS_CALENDAR_CACHE_TAG)
+        events_by_day = cache.get(cache_key)
+        if events_by_day is not None:
+            return CalendarEvents(events_by_day, type_slug, group, search_text)
+
+    # one day offset so we can get all the events on a day
+    bound = timedelta(hours=23, minutes=59)
+    range_start = datetime(first_day.year, first_day.month, first_day.day)
+    range_end = datetime(last_day.year, last_day.month, last_day.day) + bound
+
+    filters = get_query_filters(user, 'events.view_event')
+    events = Event.objects.filter(filters).filter(start_dt__lte=range_end,
+                                                  end_dt__gte=range_start,
+                                                  enable_private_slug=False)
+    if type_slug:
+        event_type = Type.objects.filter(slug=type_slug).first()
+        if event_type:
+            events = events.filter(type=event_type)
+    if group:
+        events = events.filter(groups__in=[group])
+    if search_text:
+        events = events.filter(Q(title__icontains=search_text) | Q(description__icontains=search_text))
+    if cat == 'priority':
+        events = events.filter(**{cat: True})
+    elif query and cat:
+        events = events.filter(**{cat: query})
+    events = events.distinct().select_related('type', 'type__color_set').order_by('start_dt')
+
+    events_by_day = {}
+    for event in events:
+        day = max(event.start_dt.date(), first_day)
+        end_day = min(event.end_dt.date(), last_day)
+        while day <= end_day:
+            day_start = datetime(day.year, day.month, day.day)
+            # same conditions as a query for that day only
+            if event.start_dt <= day_start + bound and event.end_dt >= day_start:
+                if day.weekday() < 5 or event.on_weekend:
+                    events_by_day.setdefault(day, []).append(event)
+            day += timedelta(days=1)
+
+    for day_events in events_by_day.values():
+        day_events.sort(key=lambda e: (not e.priority, e.start_dt.hour, e.start_dt.minute))
+
+    if cache_key:
+        try:
+            cache.set(cache_key, events_by_day)
+        except Exception:
+            # e.g. too large for the cache backend
+            pass
+
+    return CalendarEvents(events_by_day, type_slug, group, search_text)
@@ -7,7 +7,6 @@ from builtins import str
 import re
 import calendar
 import itertools
-import os
 import subprocess
 import time
 import xlwt
@@ -27,7 +26,7 @@ from django.contrib.contenttypes.models import ContentType
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.shortcuts import get_object_or_404, redirect
-from django.http import HttpResponseRedirect, Http404, HttpResponse, JsonResponse
+from django.http import HttpResponseRedirect, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.http import QueryDict
 from django.urls import reverse
 from django.contrib import messages
@@ -144,7 +143,8 @@ from tendenci.apps.events.utils import (
     clean_price,
     get_event_spots_taken,
     get_ievent,
-    get_vevents,
+    get_ical_site_info,
+    iter_icalendar,
     copy_event,
     email_admins,
     get_active_days,
@@ -157,7 +157,12 @@ from tendenci.apps.events.utils import (
     get_recurrence_dates,
     get_week_days,
     get_next_month,
-    get_prev_month)
+    get_prev_month,
+    get_calendar_events)
+from tendenci.apps.events.inventory import (SeatsUnavailable, get_hold_key,
+                                            get_registrant_quantities,
+                                            get_visitor_availability, hold_seats,
+                                            hold_registration_seats, reserve_seats)
 from tendenci.apps.events.addons.forms import RegAddonForm
 from tendenci.apps.events.addons.formsets import RegAddonBaseFormSet
 from tendenci.apps.events.addons.utils import get_available_addons
@@ -239,7 +244,7 @@ def details(request, id=None, private_slug=u'', template_name="events/view.html"
         event.registration_configuration = reg_conf
         event.save()
 
-    event.spots_taken, event.spots_available = event.get_spots_status()
+    event.spots_taken, event.spots_available = event.get_spots_status(cached=True)
 
     EventLog.objects.log(instance=event)
 
@@ -330,7 +335,7 @@ def view_attendees(request, event_id, template_name='events/attendees.html'):
 
     # spots taken
     if limit > 0:
-        slots_taken, slots_available = event.get_spots_status()
+        slots_taken, slots_available = event.get_spots_status(cached=True)
     else:
         slots_taken, slots_available = (-1, -1)
 
@@ -488,42 +493,10 @@ def templates_list(request, template_name="events/templates_list.html"):
 
 
 def icalendar(request):
-    p = re.compile(r'http(s)?://(www.)?([^/]+)')
-    d = {}
-    file_name = ''
-    ics_str = ''
-
-    d['site_url'] = get_setting('site', 'global', 'siteurl')
-    match = p.search(d['site_url'])
-    if match:
-        d['domain_name'] = match.group(3)
-    else:
-        d['domain_name'] = ""
+    d = get_ical_site_info()
 
-    if request.user.is_authenticated:
-        file_name = 'ics-%s.ics' % (request.user.pk)
-
-    absolute_directory = os.path.join(settings.MEDIA_ROOT, 'files/ics')
-    if not os.path.exists(absolute_directory):
-        os.makedirs(absolute_directory)
-
-    if file_name:
-        file_path = os.path.join(absolute_directory, file_name)
-        # Check if ics file exists
-        if os.path.isfile(file_path):
-            ics = open(file_path, 'r+')
-            ics_str = ics.read()
-            ics.close()
-    if not ics_str:
-        ics_str = "BEGIN:VCALENDAR\r\n"  
-        ics_str += "PRODID:-//Tendenci - The Open Source AMS for Associations//Tendenci 12 MIMEDIR//EN\r\n"
-        ics_str += "VERSION:2.0\r\n"
-        ics_str += "METHOD:PUBLISH\r\n"
-
-        ics_str += get_vevents(request.user, d)
-
-        ics_str += "END:VCALENDAR\r\n"
-    response = HttpResponse(ics_str)
+    # assembled from the cached VEVENT of each event and streamed
+    response = StreamingHttpResponse(iter_icalendar(request.user, d))
     response['Content-Type'] = 'text/calendar'
     if d['domain_name']:
         file_name = '%s.ics' % (d['domain_name'])
@@ -1825,7 +1798,7 @@ def delete(request, id, template_name="events/delete.html"):
     if has_perm(request.user, 'events.delete_event'):
         if request.method == "POST":
 
-            eventlog = EventLog.objects.log(instance=event)
+            eventlog = EventLog.objects.log(instance=event, buffered=False)
             if eventlog:
                 eventlog_url = reverse('event_log', args=[eventlog.pk])
             else:
@@ -1876,7 +1849,7 @@ def delete_recurring(request, id, template_name="events/delete_recurring.html"):
     if request.method == "POST":
         recurring_manager = event.recurring_event
         for event in event_list:
-            eventlog = EventLog.objects.log(instance=event)
+            eventlog = EventLog.objects.log(instance=event, buffered=False)
             # send email to admins
             recipients = get_notice_recipients('site', 'global', 'allnoticerecipients')
             if recipients and notification:
@@ -1939,9 +1912,10 @@ def register_pre(request, event_id, template_name="events/reg8n/register_pre2.ht
     reg_conf=event.registration_configuration
     #anony_reg8n = get_setting('module', 'events', 'anonymousregistration')
 
-    # check spots available
+    # check spots available (the seats held by the visitor are available to them)
     limit = event.get_limit()
-    spots_taken, spots_available = event.get_spots_status()
+    availability = get_visitor_availability(event, request)
+    spots_taken, spots_available = availability['spots_taken'], availability['spots_available']
 
     if limit > 0 and spots_available == 0:
         if not request.user.profile.is_superuser:
@@ -2114,9 +2088,10 @@ def register(request, event_id=0,
             event.registration_configuration.enabled):
         raise Http404
 
-    # check spots available
+    # check spots available (the seats held by the visitor are available to them)
     limit = event.get_limit()
-    spots_taken, spots_available = event.get_spots_status()
+    availability = get_visitor_availability(event, request)
+    spots_taken, spots_available = availability['spots_taken'], availability['spots_available']
 
     if limit > 0 and spots_available == 0:
         if not request.user.profile.is_superuser:
@@ -2363,8 +2338,17 @@ def register(request, event_id=0,
                               'custom_reg_form': custom_reg_form,
                               'gratuity': gratuity}
 
-                    # add registration
-                    reg8n, reg8n_created = add_registration(*args, **kwargs)
+                    # add registration, with the seats locked
+                    try:
+                        with reserve_seats(event,
+                                           get_registrant_quantities(registrant, pricing),
+                                           hold_key=get_hold_key(request),
+                                           override=request.user.is_superuser):
+                            reg8n, reg8n_created = add_registration(*args, **kwargs)
+                            if reg8n_created:
+                                hold_registration_seats(reg8n)
+                    except SeatsUnavailable as e:
+                        return multi_register_redirect(request, event, str(e))
 
                     if reg8n_created:
                         registrants = reg8n.registrant_set.all().order_by('id')
@@ -2396,6 +2380,15 @@ def register(request, event_id=0,
 
                                                     ))
                 else:
+                    # hold the seats while the registration is confirmed
+                    try:
+                        hold_seats(event,
+                                   get_registrant_quantities(registrant, pricing),
+                                   get_hold_key(request))
+                    except SeatsUnavailable as e:
+                        if not request.user.is_superuser:
+                            return multi_register_redirect(request, event, str(e))
+
                     do_confirmation = True
                     # If an error happens while getting pricing, display to user
                     amount_list, discount_amount, discount_list, tax_list = get_registrants_prices(*args)
@@ -2718,17 +2711,27 @@ def multi_register(request, event_id=0, template_name="events/reg8n/multi_regist
                         admin_notes = _("Price has been overriden for this registration. ")
                     event_price = reg_form.cleaned_data['amount_for_admin']
 
-                reg8n, reg8n_created = add_registration(
-                    request,
-                    event,
-                    reg_form,
-                    registrant,
-                    addon_formset,
-                    pricing,
-                    event_price,
-                    admin_notes=admin_notes,
-                    custom_reg_form=custom_reg_form,
-                )
+                # add registration, with the seats locked
+                try:
+                    with reserve_seats(event,
+                                       get_registrant_quantities(registrant, pricing),
+                                       hold_key=get_hold_key(request),
+                                       override=request.user.is_superuser):
+                        reg8n, reg8n_created = add_registration(
+                            request,
+                            event,
+                            reg_form,
+                            registrant,
+                            addon_formset,
+                            pricing,
+                            event_price,
+                            admin_notes=admin_notes,
+                            custom_reg_form=custom_reg_form,
+                        )
+                        if reg8n_created:
+                            hold_registration_seats(reg8n)
+                except SeatsUnavailable as e:
+                    return multi_register_redirect(request, event, str(e))
 
                 site_label = get_setting('site', 'global', 'sitedisplayname')
                 site_url = get_setting('site', 'global', 'siteurl')
@@ -3173,6 +3176,18 @@ def cancel_registrant(request, event_id=0, registrant_id=0, hash='', template_na
         })
 
 
+def get_calendar_search(request):
+    """
+    Returns the search category and query of the calendar views,
+    as the event_list template tag reads them.
+    """
+    form = EventSimpleSearchForm(request.GET)
+    if form.is_valid():
+        return {'cat': form.cleaned_data.get('search_category', None),
+                'query': form.cleaned_data.get('q', None)}
+    return {'cat': None, 'query': ''}
+
+
 @is_enabled('events')
 def month_view(request, year=None, month=None, type=None, template_name='events/month-view.html'):
 
@@ -3293,6 +3308,11 @@ def month_view(request, year=None, month=None, type=None, template_name='events/
 
     types = Type.objects.all().order_by('name')
 
+    # the events of the whole month grid, in one query
+    calendar_events = get_calendar_events(request.user, cal[0][0], cal[-1][-1],
+                                          type_slug=type, group=group, search_text=search_text,
+                                          **get_calendar_search(request))
+
     EventLog.objects.log()
 
     return render_to_resp(request=request, template_name=template_name,
@@ -3309,7 +3329,8 @@ def month_view(request, year=None, month=None, type=None, template_name='events/
         'type':type,
         'group': group,
         'search_text': search_text,
-        'form': form
+        'form': form,
+        'calendar_events': calendar_events,
         })
 
 
@@ -3392,6 +3413,9 @@ def week_view(request, year=None, month=None, day=None, type=None, template_name
 
     types = Type.objects.all().order_by('name')
 
+    calendar_events = get_calendar_events(request.user, week_dates[0], week_dates[6],
+                                          type_slug=type, **get_calendar_search(request))
+
     EventLog.objects.log()
 
     return render_to_resp(request=request, template_name=template_name,
@@ -3404,6 +3428,7 @@ def week_view(request, year=None, month=None, day=None, type=None, template_name
         'today':date.today(),
         'types':types,
         'type':type,
+        'calendar_events': calendar_events,
         })
 
 
@@ -3466,6 +3491,9 @@ def day_view(request, year=None, month=None, day=None, template_name='events/day
                     messages.add_message(request, messages.INFO, _(msg_string))
                     return HttpResponseRedirect(reverse('event.day', args=[latest_year, latest_month, latest_day]))
 
+    calendar_events = get_calendar_events(request.user, day_date.date(), day_date.date(),
+                                          cat=cat, query=query)
+
     EventLog.objects.log()
 
     return render_to_resp(request=request, template_name=template_name, context={
@@ -3477,6 +3505,7 @@ def day_view(request, year=None, month=None, day=None, template_name='events/day
         'yesterday_url': yesterday_url,
         'tomorrow_url': tomorrow_url,
         'form': form,
+        'calendar_events': calendar_events,
     })
 
 
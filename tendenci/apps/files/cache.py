@@ -1 +1,3 @@
 FILE_IMAGE_PRE_KEY = "file_image"
+# cache tag of the resized images of a file, e.g. files.12
+FILE_CACHE_TAG = "files.%s"
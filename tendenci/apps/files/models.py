@@ -13,7 +13,6 @@ from django.db import models
 from django.urls import reverse
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.core.cache import cache
 from django.contrib.contenttypes.fields import GenericRelation
 from django.core.files.storage import default_storage
 from django.dispatch import receiver
@@ -28,7 +27,9 @@ from tendenci.apps.perms.models import TendenciBaseModel
 from tendenci.apps.perms.object_perms import ObjectPermission
 from tendenci.apps.perms.utils import get_notice_recipients
 from tendenci.apps.files.managers import FileManager
+from tendenci.apps.base.cache import invalidate_cache_tag
 from tendenci.apps.base.utils import extract_pdf, correct_filename
+from tendenci.apps.files.cache import FILE_CACHE_TAG
 from tendenci.apps.categories.models import CategoryItem
 from tendenci.apps.site_settings.utils import get_setting
 from tendenci.apps.theme.templatetags.static import static
@@ -147,11 +148,8 @@ class File(TendenciBaseModel):
         else:
             set_s3_file_permission(self.file, public=False)
 
-        cache_set = cache.get("files_cache_set.%s" % self.pk)
-        if cache_set is not None:
-            # TODO remove cached images
-            cache.delete_many(cache.get("files_cache_set.%s" % self.pk))
-            cache.delete("files_cache_set.%s" % self.pk)
+        # TODO remove cached images
+        invalidate_cache_tag(FILE_CACHE_TAG % self.pk)
 
         # send notification to administrator(s) and module recipient(s)
         if created:
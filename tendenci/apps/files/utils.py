@@ -2,6 +2,10 @@ from PIL import Image
 from os.path import exists
 from io import BytesIO
 import os
+import re
+import time
+import calendar
+import hashlib
 from http import client as http_client
 from urllib.request import urlopen, Request
 from urllib.parse import urlparse, quote, unquote
@@ -13,10 +17,16 @@ from django.core.files.storage import default_storage
 from django.contrib.contenttypes.models import ContentType
 from django.conf import settings
 from django.shortcuts import Http404
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.core.cache import cache as django_cache
+from tendenci.apps.base.cache import tagged_cache_keys
 from tendenci.apps.base.utils import image_rescale, apply_orientation
 from tendenci.libs.boto_s3.utils import read_media_file_from_s3
 
+from tendenci.apps.files.cache import FILE_IMAGE_PRE_KEY, FILE_CACHE_TAG
 from tendenci.apps.files.models import File as TFile
 from tendenci.apps.site_settings.utils import get_setting
 
@@ -274,6 +284,51 @@ def generate_image_cache_key(file, size, pre_key, crop, unique_key, quality, con
     return key
 
 
+def get_cached_image_urls(keys_and_tags):
+    """
+    Returns the cached urls of resized images, for a list of (cache key
+    from generate_image_cache_key, cache tag), as a dict by cache key
+    (None if not cached). Two round trips to the cache in all.
+    """
+    tagged_keys = tagged_cache_keys(keys_and_tags)
+    found = django_cache.get_many(list(tagged_keys.values()))
+    return {key: found.get(tagged_key) for key, tagged_key in tagged_keys.items()}
+
+
+def prefetch_image_urls(objects, get_key_and_tag):
+    """
+    Gets the cached image urls of the objects at once and keeps them on
+    the objects (_image_urls, by cache key), where the photo_image_url
+    and image_url template tags look before querying the cache.
+    get_key_and_tag returns the (cache key, cache tag) of an object.
+    """
+    objects = [obj for obj in objects if obj and obj.pk]
+    keys_and_tags = [get_key_and_tag(obj) for obj in objects]
+    if not keys_and_tags:
+        return
+    urls = get_cached_image_urls(keys_and_tags)
+    for obj, (key, tag) in zip(objects, keys_and_tags):
+        if not hasattr(obj, '_image_urls'):
+            obj._image_urls = {}
+        obj._image_urls[key] = urls[key]
+
+
+def prefetch_file_image_urls(files, size=None, crop=False, constrain=None, quality=None):
+    """
+    Prefetches the image urls of the files for the image_url template tag
+    with the same options, e.g. for {% image_url file size=150x150 crop=True %}:
+
+        prefetch_file_image_urls(files, size='150x150', crop=True)
+    """
+    def get_key_and_tag(file):
+        key = generate_image_cache_key(file=str(file.id), size=size, pre_key=FILE_IMAGE_PRE_KEY,
+                                       crop=crop, unique_key=str(file.id), quality=quality,
+                                       constrain=constrain)
+        return key, FILE_CACHE_TAG % file.id
+
+    prefetch_image_urls(files, get_key_and_tag)
+
+
 class AppRetrieveFiles(object):
     """
     Retrieve files (images) from src url.
@@ -575,3 +630,130 @@ def get_allowed_mimetypes(file_exts):
         elif ext in od_types_map:
             allowed_mimetypes.append(od_types_map[ext])
     return allowed_mimetypes
+
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# size of the chunks read from storage when streaming a file
+FILE_STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(range_header, size):
+    """
+    Parses a single byte range from the Range header. Returns a tuple of
+    (start, end) with end inclusive, None if the header is not a single
+    byte range (the whole file is then served), or False if the range
+    can't be satisfied.
+    """
+    match = RANGE_RE.match(range_header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # the last n bytes
+        length = int(end)
+        if not length:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def iter_file_range(f, start, length, chunk_size=FILE_STREAM_CHUNK_SIZE):
+    """
+    Yields length bytes of a file starting at start, chunk by chunk.
+    """
+    try:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(chunk_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        f.close()
+
+
+def get_file_etag(file):
+    key = '%s-%s-%s' % (file.pk, file.file.name,
+                        file.update_dt.isoformat() if file.update_dt else '')
+    return '"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def get_file_last_modified(file):
+    if not file.update_dt:
+        return None
+    if timezone.is_aware(file.update_dt):
+        return calendar.timegm(file.update_dt.utctimetuple())
+    return time.mktime(file.update_dt.timetuple())
+
+
+def get_file_response(request, file, content_type, content_disposition):
+    """
+    Returns a response streaming the file, without loading it in memory.
+
+    Supports conditional GET (ETag and Last-Modified) and single byte
+    ranges. If FILES_SENDFILE_BACKEND is set to 'nginx' (X-Accel-Redirect)
+    or 'apache' (X-Sendfile), the file is sent by the web server instead,
+    for files on the local file system.
+    """
+    etag = get_file_etag(file)
+    last_modified = get_file_last_modified(file)
+    response = get_conditional_response(request, etag=etag,
+                                        last_modified=last_modified)
+    if response is not None:
+        return response
+
+    sendfile_backend = getattr(settings, 'FILES_SENDFILE_BACKEND', None)
+    if sendfile_backend and not settings.USE_S3_STORAGE:
+        response = HttpResponse(content_type=content_type)
+        if sendfile_backend == 'nginx':
+            prefix = getattr(settings, 'FILES_SENDFILE_URL_PREFIX', '/protected/')
+            response['X-Accel-Redirect'] = quote('%s%s' % (prefix, file.file.name))
+        else:
+            response['X-Sendfile'] = default_storage.path(file.file.name)
+    else:
+        try:
+            f = default_storage.open(file.file.name, 'rb')
+            size = getattr(f, 'size', None)
+            if size is None:
+                size = default_storage.size(file.file.name)
+        except (IOError, OSError):  # no such file or directory
+            raise Http404
+
+        byte_range = None
+        if 'HTTP_RANGE' in request.META and request.method in ('GET', 'HEAD'):
+            byte_range = parse_range_header(request.META['HTTP_RANGE'], size)
+            # If-Range: serve the range only if the file has not changed
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if if_range and if_range != etag:
+                byte_range = None
+
+        if byte_range is False:
+            f.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = 'bytes */%d' % size
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(iter_file_range(f, start, length),
+                                             status=206, content_type=content_type)
+            response['Content-Range'] = 'bytes %d-%d/%d' % (start, end, size)
+        else:
+            response = FileResponse(f, content_type=content_type)
+            length = size
+        response['Content-Length'] = str(length)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -42,9 +42,11 @@ from tendenci.apps.perms.utils import (
 from tendenci.apps.categories.models import Category
 from tendenci.apps.event_logs.models import EventLog
 from tendenci.apps.theme.shortcuts import themed_response as render_to_resp
-from tendenci.apps.files.cache import FILE_IMAGE_PRE_KEY
+from tendenci.apps.base.cache import tagged_cache_key
+from tendenci.apps.files.cache import FILE_IMAGE_PRE_KEY, FILE_CACHE_TAG
 from tendenci.apps.files.models import File, FilesCategory
 from tendenci.apps.files.utils import get_image, aspect_ratio, generate_image_cache_key, get_max_file_upload_size, get_allowed_upload_file_exts
+from tendenci.apps.files.utils import get_file_response, prefetch_file_image_urls
 from tendenci.apps.files.forms import FileForm, MostViewedForm, FileSearchForm, FileSearchMinForm, TinymceUploadForm
 
 
@@ -63,6 +65,8 @@ def details(request, id, size=None, crop=False, quality=90, download=False, cons
         unique_key=id,
         quality=quality,
         constrain=constrain)
+    # tagged, so that saving the file invalidates it
+    cache_key = tagged_cache_key(cache_key, FILE_CACHE_TAG % file.pk)
 
     cached_image = cache.get(cache_key)
     if cached_image:
@@ -87,11 +91,8 @@ def details(request, id, size=None, crop=False, quality=90, download=False, cons
     if isinstance(quality, str) and quality.isdigit():
         quality = int(quality)
 
-    # get image binary
-    try:
-        data = file.file.read()
-        file.file.close()
-    except IOError:  # no such file or directory
+    # the file may be missing from the storage
+    if not default_storage.exists(file.file.name):
         raise Http404
 
     if download:  # log download
@@ -131,7 +132,10 @@ def details(request, id, size=None, crop=False, quality=90, download=False, cons
             raise Http404
 
         # gets resized image from cache or rebuilds
-        image = get_image(file.file, size, FILE_IMAGE_PRE_KEY, cache=True, crop=crop, quality=quality, unique_key=None)
+        try:
+            image = get_image(file.file, size, FILE_IMAGE_PRE_KEY, cache=True, crop=crop, quality=quality, unique_key=None)
+        except IOError:  # no such file or directory
+            raise Http404
         response = HttpResponse(content_type=file.mime_type())
         response['Content-Disposition'] = '%s filename="%s"' % (attachment, file.get_name())
 
@@ -154,41 +158,24 @@ def details(request, id, size=None, crop=False, quality=90, download=False, cons
             else:
                 full_file_path = "%s%s" % (settings.MEDIA_URL, file_path)
                 cache.set(cache_key, full_file_path)
-            cache_group_key = "files_cache_set.%s" % file.pk
-            cache_group_list = cache.get(cache_group_key)
-
-            if cache_group_list is None:
-                cache.set(cache_group_key, [cache_key])
-            else:
-                cache_group_list += [cache_key]
-                cache.set(cache_group_key, cache_group_list)
 
         return response
 
     if file.is_public_file():
         cache.set(cache_key, file.get_file_public_url())
         set_s3_file_permission(file.file, public=True)
-        cache_group_key = "files_cache_set.%s" % file.pk
-        cache_group_list = cache.get(cache_group_key)
-
-        if cache_group_list is None:
-            cache.set(cache_group_key, [cache_key])
-        else:
-            cache_group_list += cache_key
-            cache.set(cache_group_key, cache_group_list)
 
     # set mimetype
-    if file.mime_type():
-        response = HttpResponse(data, content_type=file.mime_type())
-    else:
+    if not file.mime_type():
         raise Http404
 
-    # return response
     if file.get_name().endswith(file.ext()):
-        response['Content-Disposition'] = '%s filename="%s"' % (attachment, file.get_name())
+        content_disposition = '%s filename="%s"' % (attachment, file.get_name())
     else:
-        response['Content-Disposition'] = '%s filename="%s"' % (attachment, file.get_name_ext())
-    return response
+        content_disposition = '%s filename="%s"' % (attachment, file.get_name_ext())
+
+    # stream the file, with support for range requests and conditional GET
+    return get_file_response(request, file, file.mime_type(), content_disposition)
 
 
 @is_enabled('files')
@@ -636,6 +623,9 @@ def tinymce_get_files(request):
         except Exception:
             return JSONResponse({'content': ''})
 
+        # the image urls of the template, with one cache lookup
+        prefetch_file_image_urls(files, size='150x150', crop=True, quality='88')
+
         return_string = ''
         for file_item in files:
             return_string += render_to_string(template_name='files/templates/tinymce_gallery.html', context={'file': file_item})
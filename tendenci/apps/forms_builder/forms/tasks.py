@@ -2,23 +2,22 @@ from builtins import str
 import os
 import csv
 import zipfile
-from io import open
+from io import TextIOWrapper
 from os.path import join
-from os import unlink
+from shutil import copyfileobj
 from time import time
 from tempfile import NamedTemporaryFile
 
-from django.conf import settings
 from django.db.models import Max, Count
-from django.http import HttpResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.utils.encoding import smart_str
 from django.template.defaultfilters import yesno
 from django.core.files.storage import default_storage
 import celery
 
 from tendenci.apps.exports.utils import full_model_to_dict, render_csv
-from tendenci.apps.forms_builder.forms.models import Form
-from tendenci.apps.forms_builder.forms.utils import form_entries_to_csv_writer
+from tendenci.apps.forms_builder.forms.models import Form, FieldEntry
+from tendenci.apps.forms_builder.forms.utils import form_entries_to_csv_writer, iter_form_entries
 from tendenci.apps.base.utils import escape_csv
 
 
@@ -135,58 +134,40 @@ class FormsExportTask(celery.Task):
 class FormEntriesExportTask(celery.Task):
 
     def run(self, form_instance, entries, include_files, **kwargs):
-
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="export_entries_%d.csv"' % time()
         has_files = form_instance.has_files() and include_files
 
-        # if the object hase file store the csv elsewhere
-        # so that we can zip the files
-        if has_files:
-            temp_csv = NamedTemporaryFile(mode='w', delete=False)
-            temp_zip = NamedTemporaryFile(mode='wb', delete=False)
-            csv_writer = csv.writer(temp_csv, delimiter=',')
-            zip = zipfile.ZipFile(temp_zip, 'w', compression=zipfile.ZIP_DEFLATED)
-        else:
-            csv_writer = csv.writer(response, delimiter=',')
-            
-        form_entries_to_csv_writer(csv_writer, form_instance)
-
-        # handle files
-        for entry in entries:
-            for field in entry.fields.all().order_by('field__position', 'id'):
-                if has_files and field.field.field_type == 'FileField':
-                    archive_name = join('files',field.value)
-                    if hasattr(settings, 'USE_S3_STORAGE') and settings.USE_S3_STORAGE:
-                        file_path = field.value
-                        try:
-                            # TODO: for large files, we may need to copy down
-                            # the files before adding them to the zip file.
-                            zip.writestr(archive_name, default_storage.open(file_path).read())
-                        except IOError:
-                            pass
-                    else:
-                        file_path = join(settings.MEDIA_ROOT,field.value)
-                        if default_storage.exists(file_path):
-                            zip.write(file_path, archive_name, zipfile.ZIP_DEFLATED)
-
-
-        # add the csv file to the zip, close it, and set the response
-        if has_files:
-            # add the csv file and close it all out
-            temp_csv.close()
-            zip.write(temp_csv.name, 'entries.csv', zipfile.ZIP_DEFLATED)
-            zip.close()
-            temp_zip.close()
-
-            # set the response for the zip files
-            with open(temp_zip.name, 'rb') as f:
-                body = f.read()
-            response = HttpResponse(body, content_type='application/zip')
-            response['Content-Disposition'] = 'attachment; filename="export_entries_%d.zip"' % time()
-
-            # remove the temporary files
-            unlink(temp_zip.name)
-            unlink(temp_csv.name)
-
+        if not has_files:
+            response = StreamingHttpResponse(iter_form_entries(form_instance),
+                                             content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename="export_entries_%d.csv"' % time()
+            return response
+
+        # if the object has files, zip them along with the csv.
+        # The archive is built in a temporary file, deleted once sent,
+        # and the csv and the files are written to it in small blocks.
+        temp_zip = NamedTemporaryFile(mode='w+b')
+        with zipfile.ZipFile(temp_zip, 'w', compression=zipfile.ZIP_DEFLATED) as zip:
+            with TextIOWrapper(zip.open('entries.csv', 'w'), encoding='utf-8', newline='') as csv_file:
+                csv_writer = csv.writer(csv_file, delimiter=',')
+                form_entries_to_csv_writer(csv_writer, form_instance)
+
+            # handle files
+            file_values = FieldEntry.objects.filter(entry__in=entries,
+                                                    field__field_type='FileField'
+                                                    ).exclude(value=''
+                                                    ).order_by('entry_id', 'field__position', 'id'
+                                                    ).values_list('value', flat=True)
+            for value in file_values.iterator():
+                archive_name = join('files', value)
+                try:
+                    with default_storage.open(value, 'rb') as f, \
+                            zip.open(archive_name, 'w', force_zip64=True) as archived_file:
+                        copyfileobj(f, archived_file)
+                except (IOError, OSError):
+                    pass
+
+        temp_zip.seek(0)
+        # the temporary file is closed, and deleted, when the response is closed
+        response = FileResponse(temp_zip, content_type='application/zip')
+        response['Content-Disposition'] = 'attachment; filename="export_entries_%d.zip"' % time()
         return response
@@ -155,119 +155,89 @@ def update_invoice_for_entry(invoice, form):
     inv.save()
 
 
-def form_entries_to_csv_writer(csv_writer, form):
+def get_form_entries_columns(form):
     """
-    Write form entries to csv_writer.
+    Returns the column names of the entries export of a form, and the
+    index of the column of each field by field id.
     """
     columns = []
     field_indexes = {}
-    file_field_ids = []
-    site_url = get_setting('site', 'global', 'siteurl')
     entry_time_name = FormEntry._meta.get_field("entry_time").verbose_name
     columns.append(str(entry_time_name))
     for field in form.fields.all().order_by('position', 'id'):
         if not field.field_type.split('.')[-1] in ['Description', 'Header']:
             columns.append(field.label)
             field_indexes[field.id] = 1+len(field_indexes)
-            if field.field_type == "FileField":
-                file_field_ids.append(field.id)
     if form.custom_payment:
         columns.append(str("Pricing"))
         columns.append(str("Price"))
         columns.append(str("Payment Method"))
-    csv_writer.writerow(columns)
-    # Loop through each field value order by entry, building up each
-    # entry as a row.
+    return columns, field_indexes
+
+
+def iter_form_entry_rows(form, columns, field_indexes, chunk_size=1000):
+    """
+    Yields the rows of the entries export of a form.
+
+    The entries are loaded by chunks (paginated by id) and the field
+    values of a chunk are fetched in a single query, then pivoted into
+    one row per entry.
+    """
     entries = FormEntry.objects.filter(form=form).order_by('pk')
-    for entry in entries:
-        values = FieldEntry.objects.filter(entry=entry)
-        row = [""] * len(columns)
-        entry_time = entry.entry_time.strftime("%Y-%m-%d %H:%M:%S")
-
-        if form.custom_payment:
-            if entry.pricing:
-                row[-3] = entry.pricing.label
-                if not entry.pricing.price:
-                    row[-2] = entry.custom_price
-                else:
-                    row[-2] = entry.pricing.price
-            row[-1] = entry.payment_method
-
-        row[0] = entry_time
-
-        for field_entry in values:
-            if not field_entry.field.field_type.split('.')[-1] in ['Description', 'Header']:
-                value = escape_csv(field_entry.value)
-                # Create download URL for file fields.
-                # if field_entry.field_id in file_field_ids:
-                #     url = reverse("admin:forms_form_file", args=(field_entry.id,))
-                #     value = '{site_url}{url}'.format(site_url=site_url, url=url)
-                # Only use values for fields that currently exist for the form.
-                try:
-                    row[field_indexes[field_entry.field_id]] = value
-                except KeyError:
-                    pass
-        # Write out the row.
-        csv_writer.writerow(row)
+    if form.custom_payment:
+        entries = entries.select_related('pricing', 'payment_method')
+
+    last_pk = 0
+    while True:
+        chunk = list(entries.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        # Only use values for fields that currently exist for the form
+        # (Description and Header fields have no column).
+        values = FieldEntry.objects.filter(entry_id__gte=chunk[0].pk,
+                                           entry_id__lte=last_pk,
+                                           field_id__in=field_indexes
+                                           ).values_list('entry_id', 'field_id', 'value')
+        values_by_entry = {}
+        for entry_id, field_id, value in values.iterator():
+            values_by_entry.setdefault(entry_id, []).append((field_id, value))
+
+        for entry in chunk:
+            row = [""] * len(columns)
+            row[0] = entry.entry_time.strftime("%Y-%m-%d %H:%M:%S")
+
+            if form.custom_payment:
+                if entry.pricing:
+                    row[-3] = entry.pricing.label
+                    if not entry.pricing.price:
+                        row[-2] = entry.custom_price
+                    else:
+                        row[-2] = entry.pricing.price
+                row[-1] = entry.payment_method
+
+            for field_id, value in values_by_entry.get(entry.pk, []):
+                row[field_indexes[field_id]] = escape_csv(value)
+            yield row
 
 
-def iter_form_entries(form):
+def form_entries_to_csv_writer(csv_writer, form):
     """
     Write form entries to csv_writer.
-    
-    Write out the column names and store the index of each field
-    against its ID for building each entry row. Also store the IDs of
-    fields with a type of FileField for converting their field values
     """
-    columns = []
-    field_indexes = {}
-    file_field_ids = []
-    entry_time_name = FormEntry._meta.get_field("entry_time").verbose_name
-    columns.append(str(entry_time_name))
-    for field in form.fields.all().order_by('position', 'id'):
-        if not field.field_type.split('.')[-1] in ['Description', 'Header']:
-            columns.append(field.label)
-            field_indexes[field.id] = 1+len(field_indexes)
-            if field.field_type == "FileField":
-                file_field_ids.append(field.id)
-    if form.custom_payment:
-        columns.append(str("Pricing"))
-        columns.append(str("Price"))
-        columns.append(str("Payment Method"))
+    columns, field_indexes = get_form_entries_columns(form)
+    csv_writer.writerow(columns)
+    csv_writer.writerows(iter_form_entry_rows(form, columns, field_indexes))
 
-    field_indexes[0] = 0
-    writer = csv.DictWriter(Echo(), fieldnames=field_indexes)
-    yield writer.writerow(dict(zip(field_indexes, columns)))
-    # Loop through each field value order by entry, building up each
-    # entry as a row.
-    entries = FormEntry.objects.filter(form=form).order_by('pk')
-    for entry in entries:
-        values = FieldEntry.objects.filter(entry=entry)
-        row = [""] * len(columns)
-        entry_time = entry.entry_time.strftime("%Y-%m-%d %H:%M:%S")
-
-        if form.custom_payment:
-            if entry.pricing:
-                row[-3] = entry.pricing.label
-                if not entry.pricing.price:
-                    row[-2] = entry.custom_price
-                else:
-                    row[-2] = entry.pricing.price
-            row[-1] = entry.payment_method
-
-        row[0] = entry_time
-
-        for field_entry in values:
-            if not field_entry.field.field_type.split('.')[-1] in ['Description', 'Header']:
-                value = escape_csv(field_entry.value)
-                # Create download URL for file fields.
-                # if field_entry.field_id in file_field_ids:
-                #     url = reverse("admin:forms_form_file", args=(field_entry.id,))
-                #     value = '{site_url}{url}'.format(site_url=site_url, url=url)
-                # Only use values for fields that currently exist for the form.
-                try:
-                    row[field_indexes[field_entry.field_id]] = value
-                except KeyError:
-                    pass
-        # Write out the row.
-        yield writer.writerow(dict(zip(field_indexes, row)))
+
+def iter_form_entries(form):
+    """
+    Yields the lines of the csv export of the form entries,
+    to be used as the content of a StreamingHttpResponse.
+    """
+    columns, field_indexes = get_form_entries_columns(form)
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in iter_form_entry_rows(form, columns, field_indexes):
+        yield writer.writerow(row)
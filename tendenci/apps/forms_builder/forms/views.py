@@ -329,7 +329,7 @@ def entries_export(request, id, include_files=False):
 
     entries = form_instance.entries.all()
 
-    if entries:
+    if entries.exists():
         if not settings.CELERY_IS_ACTIVE:
             task = FormEntriesExportTask()
             response = task.run(form_instance, entries, include_files)
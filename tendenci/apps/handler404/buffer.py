@@ -0,0 +1,105 @@
+import atexit
+import logging
+import os
+from threading import Event, Lock, Thread
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class Report404Buffer(object):
+    """
+    Counts the 404s by url in memory and adds the counts to Report404,
+    either from a background thread every REPORT404_FLUSH_INTERVAL seconds
+    or as soon as REPORT404_BUFFER_SIZE urls are pending.
+    """
+    def __init__(self):
+        self.counts = {}
+        self.lock = Lock()
+        self.wakeup = Event()
+        self.thread = None
+        self.pid = None
+
+    @property
+    def size(self):
+        return getattr(settings, 'REPORT404_BUFFER_SIZE', 500)
+
+    @property
+    def interval(self):
+        return getattr(settings, 'REPORT404_FLUSH_INTERVAL', 10)
+
+    def add(self, url):
+        # Truncate to only get the first 200 characters
+        url = url[:200]
+        with self.lock:
+            self.counts[url] = self.counts.get(url, 0) + 1
+            pending = len(self.counts)
+        if not self.size:
+            self.flush()
+            return
+        self.start()
+        if pending >= self.size:
+            self.wakeup.set()
+
+    def flush(self):
+        """
+        Adds the pending counts to the reports, with one update of the
+        existing reports and one insert of the new ones.
+        Returns the number of urls written.
+        """
+        from tendenci.apps.handler404.models import Report404
+
+        with self.lock:
+            counts, self.counts = self.counts, {}
+        if not counts:
+            return 0
+        try:
+            with transaction.atomic():
+                reports = Report404.objects.filter(url__in=list(counts))
+                existing = set(reports.values_list('url', flat=True))
+                if existing:
+                    # incremented in the database, so concurrent flushes add up
+                    reports.update(count=F('count') + Case(
+                        *[When(url=url, then=Value(counts[url])) for url in existing],
+                        default=Value(0), output_field=IntegerField()))
+                Report404.objects.bulk_create([
+                    Report404(url=url, count=count)
+                    for url, count in counts.items() if url not in existing], batch_size=500)
+        except Exception as e:
+            logger.error('Failed to write the counts of %d 404 urls: %s', len(counts), e)
+            # put the counts back, to be written with the next flush
+            with self.lock:
+                for url, count in counts.items():
+                    self.counts[url] = self.counts.get(url, 0) + count
+            return 0
+        return len(counts)
+
+    def start(self):
+        """
+        Starts the flushing thread, once per process (forked
+        worker processes each get their own thread).
+        """
+        if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.pid == os.getpid() and self.thread and self.thread.is_alive():
+                return
+            self.pid = os.getpid()
+            self.thread = Thread(target=self.run, name='report404-flush')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            self.flush()
+            close_old_connections()
+
+
+report404_buffer = Report404Buffer()
+# write whatever is left when the process exits
+atexit.register(report404_buffer.flush)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+
+from tendenci.apps.handler404.buffer import Report404Buffer
+from tendenci.apps.handler404.models import Report404
+
+
+class Report404BufferTest(TestCase):
+
+    def setUp(self):
+        # a buffer of its own, not started (it is flushed by the tests)
+        self.buffer = Report404Buffer()
+        self.buffer.start = lambda: None
+
+    def test_flush(self):
+        Report404.objects.create(url='/existing', count=5)
+        for url in ['/existing', '/existing', '/new', '/new', '/new', '/other']:
+            self.buffer.add(url)
+
+        self.assertEqual(self.buffer.flush(), 3)
+        counts = dict(Report404.objects.values_list('url', 'count'))
+        # the existing report is updated, the others inserted
+        self.assertEqual(counts, {'/existing': 7, '/new': 3, '/other': 1})
+        self.assertEqual(Report404.objects.filter(url='/existing').count(), 1)
+
+        # nothing pending
+        self.assertEqual(self.buffer.flush(), 0)
+
+        self.buffer.add('/new')
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(Report404.objects.get(url='/new').count, 4)
+
+    def test_truncated_url(self):
+        url = '/%s' % ('a' * 300)
+        self.buffer.add(url)
+        self.buffer.add(url)
+        self.buffer.flush()
+        self.assertEqual(Report404.objects.get().url, url[:200])
+        self.assertEqual(Report404.objects.get().count, 2)
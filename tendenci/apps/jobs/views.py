@@ -28,7 +28,8 @@ from tendenci.apps.perms.utils import (
     update_perms_and_save,
     has_perm,
     get_query_filters,
-    has_view_perm)
+    has_view_perm,
+    filter_viewable)
 from tendenci.apps.theme.shortcuts import themed_response as render_to_resp
 from tendenci.apps.exports.utils import run_export_task
 from tendenci.apps.jobs.models import Job, JobPricing
@@ -510,7 +511,9 @@ def pricing_delete(request, id, template_name="jobs/pricing-delete.html"):
 
 @is_enabled('jobs')
 def pricing_search(request, template_name="jobs/pricing-search.html"):
-    job_pricings = JobPricing.objects.all().order_by('duration')
+    job_pricings = filter_viewable(request.user,
+                                   JobPricing.objects.all().order_by('duration'),
+                                   'jobs.view_jobpricing')
 
     EventLog.objects.log()
     return render_to_resp(request=request, template_name=template_name,
@@ -0,0 +1,81 @@
+import time
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+    Expires a number of synthetic memberships and reports the throughput
+    of the expiry pipeline used by clean_memberships. The synthetic users,
+    profiles and memberships are created in a transaction that is rolled
+    back at the end.
+
+    Example: python manage.py benchmark_membership_expiry --memberships=100000
+    """
+    help = "Report the throughput of the membership expiry"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--memberships', type=int, default=100000,
+            help='The number of synthetic memberships to expire')
+        parser.add_argument('--membership-type', type=int,
+            help='The id of the membership type of the synthetic memberships (default: the first one)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+            help='The number of memberships expired per batch')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth.models import User
+        from django.db import transaction
+        from tendenci.apps.memberships.models import MembershipDefault, MembershipType
+        from tendenci.apps.memberships.utils import expire_memberships
+        from tendenci.apps.profiles.models import Profile
+
+        membership_types = MembershipType.objects.order_by('pk')
+        if options['membership_type']:
+            membership_types = membership_types.filter(pk=options['membership_type'])
+        membership_type = membership_types.first()
+        if not membership_type:
+            raise CommandError('No membership type found.')
+
+        num_memberships = options['memberships']
+        prefix = 'benchmark_expiry_%d_' % int(time.time())
+        expire_dt = datetime.now() - timedelta(days=membership_type.expiration_grace_period + 1)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username='%s%d' % (prefix, i),
+                     email='%s%d@example.com' % (prefix, i))
+                for i in range(num_memberships)], batch_size=1000)
+            users = list(User.objects.filter(username__startswith=prefix))
+            Profile.objects.bulk_create([
+                Profile(user=user,
+                        member_number=str(user.pk),
+                        creator=user,
+                        creator_username=user.username,
+                        owner=user,
+                        owner_username=user.username)
+                for user in users], batch_size=1000)
+            MembershipDefault.objects.bulk_create([
+                MembershipDefault(user=user,
+                                  membership_type=membership_type,
+                                  member_number=str(user.pk),
+                                  join_dt=expire_dt - timedelta(days=365),
+                                  expire_dt=expire_dt,
+                                  status=True,
+                                  status_detail='active',
+                                  creator_username=user.username,
+                                  owner_username=user.username)
+                for user in users], batch_size=1000)
+            membership_ids = list(MembershipDefault.objects.filter(
+                                    user__username__startswith=prefix
+                                    ).values_list('pk', flat=True))
+
+            start = time.time()
+            num_expired = expire_memberships(membership_ids,
+                                             batch_size=options['batch_size'])
+            elapsed = time.time() - start
+
+            transaction.set_rollback(True)
+
+        print('%d memberships expired in %.2fs, %.1f memberships/sec' % (
+              num_expired, elapsed, num_expired / elapsed if elapsed else 0))
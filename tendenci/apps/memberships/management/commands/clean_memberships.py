@@ -10,9 +10,10 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         from datetime import datetime
         from dateutil.relativedelta import relativedelta
-        from tendenci.apps.profiles.models import Profile
         from tendenci.apps.memberships.models import MembershipDefault, MembershipType
-        from tendenci.apps.user_groups.models import GroupMembership
+        from tendenci.apps.memberships.utils import expire_memberships
+
+        verbosity = int(kwargs.get('verbosity', 1))
 
         for membership_type in MembershipType.objects.all():
             grace_period = membership_type.expiration_grace_period
@@ -20,30 +21,15 @@ class Command(BaseCommand):
             # get expired memberships out of grace period
             # we can't move the expiration date, but we can
             # move todays day back.
-            memberships = MembershipDefault.objects.filter(
+            membership_ids = list(MembershipDefault.objects.filter(
                 membership_type=membership_type,
                 expire_dt__lt=datetime.now() - relativedelta(days=grace_period),
-                status=True).filter(status_detail='active')
-
-            for membership in memberships:
-                membership.status_detail = 'expired'
-                membership.save()
-
-                # update profile
-                # added try-except block due to error encountered
-                # on a site that might also be replicated tendenci wide
-                try:
-                    membership.user.profile.refresh_member_number()
-                except Profile.DoesNotExist:
-                    pass
-
-                # remove from group
-                GroupMembership.objects.filter(
-                    member=membership.user,
-                    group=membership.membership_type.group
-                ).delete()
-
-                # Check directory and set to inactive
-                if membership.directory:
-                    membership.directory.status_detail = 'inactive'
-                    membership.directory.save()
+                status=True).filter(status_detail='active'
+                ).values_list('pk', flat=True))
+            if not membership_ids:
+                continue
+
+            num_expired = expire_memberships(membership_ids,
+                            description='Expired by clean_memberships (%s)' % membership_type.name)
+            if verbosity > 1:
+                print('%s: %d memberships expired' % (membership_type.name, num_expired))
@@ -24,6 +24,7 @@ class Command(BaseCommand):
         from tendenci.apps.memberships.models import MembershipImport
         from tendenci.apps.memberships.models import MembershipImportData
         from tendenci.apps.memberships.utils import ImportMembDefault
+        from tendenci.apps.perms.bulk import bulk_save
 
         import_id = options['import_id']
         user_id = options['user_id']
@@ -32,23 +33,25 @@ class Command(BaseCommand):
         data_list = MembershipImportData.objects.filter(mimport=mimport).order_by('pk')
         imd = ImportMembDefault(request_user, mimport, dry_run=False)
 
-        for idata in data_list:
-            try:
-                imd.process_default_membership(idata)
-            except Exception as e:
-                print(e)
-
-            mimport.num_processed += 1
-
-            # save the status -----------------------------------------------
-            summary = 'insert:%d,update:%d,update_insert:%d,invalid:%d' % (
-                imd.summary_d['insert'],
-                imd.summary_d['update'],
-                imd.summary_d['update_insert'],
-                imd.summary_d['invalid'],
-            )
-            mimport.summary = summary
-            mimport.save()
+        # versions and event logs are written in bulk
+        with bulk_save():
+            for idata in data_list:
+                try:
+                    imd.process_default_membership(idata)
+                except Exception as e:
+                    print(e)
+
+                mimport.num_processed += 1
+
+                # save the status -----------------------------------------------
+                summary = 'insert:%d,update:%d,update_insert:%d,invalid:%d' % (
+                    imd.summary_d['insert'],
+                    imd.summary_d['update'],
+                    imd.summary_d['update_insert'],
+                    imd.summary_d['invalid'],
+                )
+                mimport.summary = summary
+                mimport.save()
 
         mimport.status = 'completed'
         mimport.complete_dt = datetime.now()
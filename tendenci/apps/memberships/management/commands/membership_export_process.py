@@ -84,6 +84,7 @@ class Command(BaseCommand):
             identifier=identifier,
             user_id=user_id,
             cp_id=cp_id,
-            ids=ids)
+            ids=ids,
+            verbosity=int(options.get('verbosity', 1)))
 
         print('Membership export done %s.' % identifier)
@@ -1,11 +1,33 @@
+import time
+
 from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
     """
-    Loop through users/membership-types
-    and add or remove the user from the group.
+    Add or remove the users from the groups of the membership types
+    depending on their memberships.
+
+    Use --dry-run to report the changes without making them.
     """
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', default=False,
+            help='Report the changes without making them')
+
+    def handle(self, *args, **options):
         from tendenci.apps.memberships.models import MembershipDefault
-        MembershipDefault.refresh_groups()
+
+        dry_run = options['dry_run']
+        verbosity = int(options['verbosity'])
+        start_time = time.time()
+        report = MembershipDefault.refresh_groups(dry_run=dry_run)
+
+        if verbosity > 0 or dry_run:
+            for changes in report:
+                print('%s%s (%d): %d active members, %d added, %d removed, %d duplicate active memberships archived, %.2fs' % (
+                      '[dry run] ' if dry_run else '',
+                      changes['group'].name, changes['group'].id, changes['active'],
+                      changes['added'], changes['removed'], changes['archived'],
+                      changes['time']))
+            print('%s groups %s in %.2fs' % (
+                  len(report), 'checked' if dry_run else 'refreshed', time.time() - start_time))
@@ -26,7 +26,8 @@ class Command(BaseCommand):
                                                         MembershipDefault,
                                                         NoticeLog,
                                                         NoticeDefaultLogRecord)
-        from tendenci.apps.base.utils import fieldify
+        from tendenci.apps.base.utils import fieldify, get_day_range_filter
+        from tendenci.apps.email_blocks.utils import filter_blocked
         from tendenci.apps.notifications import models as notification
         from tendenci.apps.site_settings.utils import get_setting
 
@@ -112,9 +113,20 @@ class Command(BaseCommand):
                                             ).strip()).split(',')
             return admin_emails
 
+        def get_notice_templates(notice):
+            """Compile the body and the subject of the notice, once per notice.
+            """
+            body = fieldify(notice.email_content)
+            body = body + ' <br /><br />{% include "email_footer.html" %}'
+            subject = notice.subject.replace('(name)',
+                        '{% autoescape off %}{{ notice_member_name }}{% endautoescape %}')
+            return (engines['django'].from_string(body),
+                    engines['django'].from_string(subject))
+
         def process_notice(notice):
             notice.members_sent = []
             num_sent = 0
+            start_time = time.time()
             if notice.notice_time == 'before':
                 start_dt = now + timedelta(days=notice.num_days)
             else:
@@ -130,34 +142,24 @@ class Command(BaseCommand):
                                     )
             if notice.notice_type == 'join':
                 memberships = memberships.filter(
-                                    join_dt__year=start_dt.year,
-                                    join_dt__month=start_dt.month,
-                                    join_dt__day=start_dt.day,
-                                    renewal=False)
+                                    renewal=False,
+                                    **get_day_range_filter('join_dt', start_dt))
             elif notice.notice_type == 'renewal':
                 memberships = memberships.filter(
-                                    renew_dt__year=start_dt.year,
-                                    renew_dt__month=start_dt.month,
-                                    renew_dt__day=start_dt.day,
-                                    renewal=True)
+                                    renewal=True,
+                                    **get_day_range_filter('renew_dt', start_dt))
             elif notice.notice_type == 'approve' or notice.notice_type == 'approve_renewal':
                 memberships = memberships.filter(
-                                    application_approved_denied_dt__year=start_dt.year,
-                                    application_approved_denied_dt__month=start_dt.month,
-                                    application_approved_denied_dt__day=start_dt.day,
-                                    application_approved=True)
+                                    application_approved=True,
+                                    **get_day_range_filter('application_approved_denied_dt', start_dt))
             elif notice.notice_type == 'disapprove' or notice.notice_type == 'disapprove_renewal':
                 memberships = memberships.filter(
-                                    application_approved_denied_dt__year=start_dt.year,
-                                    application_approved_denied_dt__month=start_dt.month,
-                                    application_approved_denied_dt__day=start_dt.day,
-                                    application_approved=False)
+                                    application_approved=False,
+                                    **get_day_range_filter('application_approved_denied_dt', start_dt))
             else:  # 'expire'
                 memberships = memberships.filter(
-                                    expire_dt__year=start_dt.year,
-                                    expire_dt__month=start_dt.month,
-                                    expire_dt__day=start_dt.day,
-                                    reminder=True)
+                                    reminder=True,
+                                    **get_day_range_filter('expire_dt', start_dt))
                 if get_setting('module', 'memberships', 'renewalreminderexcludecorpmembers'):
                     # exclude corp members
                     memberships = memberships.exclude(corporate_membership_id__gt=0)
@@ -191,44 +193,64 @@ class Command(BaseCommand):
                                   'password': passwd_str
                                   }
 
+                templates = get_notice_templates(notice)
+
+                # screen the recipients against the block list at once
+                emails = set(memberships.values_list('user__email', flat=True))
+                blocked_emails = emails - set(filter_blocked(list(emails)))
+
                 # log notice sent
                 notice_log = NoticeLog(notice=notice,
                                        num_sent=0)
                 notice_log.save()
                 notice.log = notice_log
                 notice.err = ''
-
-                for membership in memberships:
+                log_records = []
+
+                memberships = memberships.select_related('user',
+                                                         'user__profile',
+                                                         'user__demographics',
+                                                         'membership_type',
+                                                         'app',
+                                                         'directory',
+                                                         'payment_method')
+                for membership in memberships.iterator(chunk_size=500):
                     if notice.notice_type == 'expiration' and membership.auto_renew and membership.has_rp():
                         # skip if auto renew is set up for this membership
                         continue
+                    if membership.user.email in blocked_emails:
+                        continue
 
                     try:
-                        email_member(notice, membership, global_context)
+                        email_member(notice, membership, global_context, templates)
                         if memberships_count <= 50:
                             notice.members_sent.append(membership)
                         num_sent += 1
 
                         # log record
-                        notice_log_record = NoticeDefaultLogRecord(
+                        log_records.append(NoticeDefaultLogRecord(
                                                 notice_log=notice_log,
-                                                membership=membership)
-                        notice_log_record.save()
+                                                membership=membership))
                     except:
                         # catch the exception and email
                         notice.err += traceback.format_exc()
                         print(traceback.format_exc())
 
+                NoticeDefaultLogRecord.objects.bulk_create(log_records, batch_size=500)
+
                 if num_sent > 0:
                     notice_log.num_sent = num_sent
                     notice_log.save()
 
+            if verbosity > 0:
+                print('%s: %d of %d sent in %.2fs' % (notice.notice_name, num_sent,
+                                                      memberships_count,
+                                                      time.time() - start_time))
             return num_sent
 
-        def email_member(notice, membership, global_context):
+        def email_member(notice, membership, global_context, templates):
             user = membership.user
 
-            body = notice.email_content
             context = membership.get_field_items()
             context['membership'] = membership
             context.update(global_context)
@@ -272,18 +294,13 @@ class Command(BaseCommand):
                 'directory_edit_url': directory_edit_url,
             })
 
-            body = fieldify(body)
+            context['notice_member_name'] = user.get_full_name()
 
-            body = body + ' <br /><br />{% include "email_footer.html" %}'
-
-            template = engines['django'].from_string(body)
-            body = template.render(context=context)
+            body_template, subject_template = templates
+            body = body_template.render(context=context)
 
             email_recipient = user.email
-            subject = notice.subject.replace('(name)',
-                                        user.get_full_name())
-            template = engines['django'].from_string(subject)
-            subject = template.render(context=context)
+            subject = subject_template.render(context=context)
 
             email_context.update({
                 'subject':subject,
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('memberships', '0013_alter_membershipappfield_field_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='membershipdefault',
+            name='join_dt',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Join Date'),
+        ),
+        migrations.AlterField(
+            model_name='membershipdefault',
+            name='expire_dt',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Expire Date'),
+        ),
+        migrations.AlterField(
+            model_name='membershipdefault',
+            name='renew_dt',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Renew Date'),
+        ),
+        migrations.AlterField(
+            model_name='membershipdefault',
+            name='application_approved_denied_dt',
+            field=models.DateTimeField(db_index=True, default=None, null=True),
+        ),
+    ]
@@ -9,6 +9,7 @@ from dateutil.relativedelta import relativedelta
 from ast import literal_eval
 
 from django.db import models
+from django.db.models.signals import post_save
 from django.urls import reverse
 from django.db.models.query_utils import Q
 from django.template import engines
@@ -489,9 +490,9 @@ class MembershipDefault(TendenciBaseModel):
     referral_source_member_name = models.CharField(max_length=50, blank=True, default=u'')
     referral_source_member_number = models.CharField(max_length=50, blank=True, default=u'')
     affiliation_member_number = models.CharField(max_length=50, blank=True)
-    join_dt = models.DateTimeField(_('Join Date'), blank=True, null=True)
-    expire_dt = models.DateTimeField(_('Expire Date'), blank=True, null=True)
-    renew_dt = models.DateTimeField(_('Renew Date'), blank=True, null=True)
+    join_dt = models.DateTimeField(_('Join Date'), blank=True, null=True, db_index=True)
+    expire_dt = models.DateTimeField(_('Expire Date'), blank=True, null=True, db_index=True)
+    renew_dt = models.DateTimeField(_('Renew Date'), blank=True, null=True, db_index=True)
     primary_practice = models.CharField(max_length=100, blank=True, default=u'')
     how_long_in_practice = models.CharField(max_length=50, blank=True, default=u'')
     notes = models.TextField(blank=True)
@@ -518,7 +519,7 @@ class MembershipDefault(TendenciBaseModel):
         User, related_name='application_approved_set', null=True,
         on_delete=models.SET_NULL)
 
-    application_approved_denied_dt = models.DateTimeField(null=True, default=None)
+    application_approved_denied_dt = models.DateTimeField(null=True, default=None, db_index=True)
     application_approved_denied_user = models.ForeignKey(
         User, related_name='application_approved_denied_set', null=True,
         on_delete=models.SET_NULL)
@@ -718,52 +719,89 @@ class MembershipDefault(TendenciBaseModel):
         return memberships
 
     @classmethod
-    def refresh_groups(cls):
+    def refresh_groups(cls, dry_run=False):
         """
         Adds or Removes users from groups
         depending on their membership status_detail.
-        """
-        for membership_type in MembershipType.objects.all():
-            for user in User.objects.all():
-
-                status_details = MembershipDefault.objects.filter(
-                    user=user,
-                    membership_type=membership_type,
-                    status=True,
-                    status_detail__in=['active', 'pending', 'expired'],
-                ).values_list('status_detail', flat=True)
-
-                status_details = list(status_details)
-                if status_details.count('active') > 1:
-                    memberships = MembershipDefault.objects.filter(
-                        user=user,
-                        membership_type=membership_type,
-                        status=True,
-                        status_detail='active'
-                    ).order_by('-pk')[1:]
-
-                    for membership in memberships:
-                        membership.status_detail = 'archive'
-                        membership.save()
-
-                if 'active' in status_details:
 
-                    exists = GroupMembership.objects.filter(
-                        member=user,
-                        group=membership_type.group,
-                    ).exists()
+        Each group is reconciled in one pass: the users with an active
+        membership of the membership types of the group are compared
+        with the members of the group, and only the differences are
+        written. Duplicate active memberships of a user in a membership
+        type are archived, keeping the latest.
+
+        Returns a list of dicts, one per group, of the changes made
+        (or to be made, with dry_run) and the time it took.
+        """
+        types_by_group = {}
+        for membership_type in MembershipType.objects.filter(group__isnull=False).select_related('group'):
+            types_by_group.setdefault(membership_type.group, []).append(membership_type)
+
+        report = []
+        for group, membership_types in types_by_group.items():
+            start_time = time.time()
+            active = MembershipDefault.objects.filter(
+                membership_type__in=membership_types,
+                status=True,
+                status_detail='active',
+            )
 
-                    if not exists:
-                        GroupMembership.add_to_group(
-                            member=user,
-                            group=membership_type.group,
-                        )
-                else:
-                    # remove from group
-                    GroupMembership.objects.filter(
-                        member=user,
-                        group=membership_type.group,
-                    ).delete()
+            # duplicate active memberships, all but the latest per user and type
+            duplicates = active.values('user_id', 'membership_type_id').annotate(
+                            latest_pk=models.Max('pk'), num=models.Count('pk')
+                            ).filter(num__gt=1).order_by()
+            latest_pks = dict(((d['user_id'], d['membership_type_id']), d['latest_pk'])
+                              for d in duplicates)
+            to_archive = []
+            if latest_pks:
+                rows = active.filter(user_id__in=set(user_id for user_id, type_id in latest_pks)
+                                     ).values_list('pk', 'user_id', 'membership_type_id')
+                to_archive = [pk for pk, user_id, type_id in rows
+                              if (user_id, type_id) in latest_pks
+                              and pk != latest_pks[(user_id, type_id)]]
+
+            active_user_ids = set(active.values_list('user_id', flat=True).distinct())
+            member_ids = dict(GroupMembership.objects.filter(
+                                group=group).values_list('member_id', 'pk'))
+            to_add = active_user_ids - set(member_ids)
+            to_remove = [member_ids[user_id] for user_id in member_ids
+                         if user_id not in active_user_ids]
+
+            if not dry_run:
+                if to_archive:
+                    MembershipDefault.objects.filter(pk__in=to_archive).update(status_detail='archive')
+                GroupMembership.objects.bulk_create([
+                    GroupMembership(
+                        group=group,
+                        member_id=user_id,
+                        creator_id=user_id,
+                        creator_username=username,
+                        owner_id=user_id,
+                        owner_username=username,
+                        status=True,
+                        status_detail='active')
+                    for user_id, username in User.objects.filter(
+                        pk__in=to_add).values_list('pk', 'username')], batch_size=500)
+                if to_add and post_save.has_listeners(GroupMembership):
+                    # bulk_create doesn't send post_save, send it for the new members
+                    # (e.g. to subscribe them with campaign_monitor)
+                    for group_membership in GroupMembership.objects.filter(
+                            group=group, member_id__in=to_add).select_related('group', 'member'):
+                        post_save.send(sender=GroupMembership, instance=group_membership,
+                                       created=True, raw=False, using=GroupMembership.objects.db,
+                                       update_fields=None)
+                if to_remove:
+                    GroupMembership.objects.filter(pk__in=to_remove).delete()
+
+            report.append({
+                'group': group,
+                'active': len(active_user_ids),
+                'added': len(to_add),
+                'removed': len(to_remove),
+                'archived': len(to_archive),
+                'time': time.time() - start_time,
+            })
+        return report
 
     @classmethod
     def QS_ACTIVE(cls):
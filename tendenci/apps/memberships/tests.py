@@ -1,3 +1,114 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.signals import post_save
+from django.test import TestCase
+
+from tendenci.apps.directories.models import Directory
+from tendenci.apps.memberships.models import MembershipDefault, MembershipType
+from tendenci.apps.memberships.utils import expire_memberships
+from tendenci.apps.search.models import UnindexedItem
+from tendenci.apps.user_groups.models import Group, GroupMembership
+
+
+class RefreshGroupsTest(TestCase):
+
+    def setUp(self):
+        self.group = Group.objects.create(name='Members Group', sync_newsletters=False)
+        self.membership_type = MembershipType.objects.create(name='Member',
+                                                             description='Member',
+                                                             group=self.group)
+        self.active_user = User.objects.create_user('active', 'active@example.com')
+        self.duplicate_user = User.objects.create_user('duplicate', 'duplicate@example.com')
+        self.expired_user = User.objects.create_user('expired', 'expired@example.com')
+        self.former_member = User.objects.create_user('former', 'former@example.com')
+
+        self.create_membership(self.active_user, 'active')
+        self.older_duplicate = self.create_membership(self.duplicate_user, 'active')
+        self.latest_duplicate = self.create_membership(self.duplicate_user, 'active')
+        self.create_membership(self.expired_user, 'expired')
+        self.group.add_user(self.former_member)
+
+    def create_membership(self, user, status_detail):
+        return MembershipDefault.objects.create(user=user,
+                                                membership_type=self.membership_type,
+                                                status=True,
+                                                status_detail=status_detail)
+
+    def get_member_ids(self):
+        return set(GroupMembership.objects.filter(group=self.group
+                                                  ).values_list('member_id', flat=True))
+
+    def test_refresh_groups_dry_run(self):
+        [report] = MembershipDefault.refresh_groups(dry_run=True)
+        self.assertEqual((report['active'], report['added'], report['removed'], report['archived']),
+                         (2, 2, 1, 1))
+        # nothing changed
+        self.assertEqual(self.get_member_ids(), {self.former_member.pk})
+        self.older_duplicate.refresh_from_db()
+        self.assertEqual(self.older_duplicate.status_detail, 'active')
+
+    def test_refresh_groups(self):
+        saved = []
+
+        def group_membership_saved(sender, instance, created, **kwargs):
+            saved.append((instance.member_id, created))
+
+        post_save.connect(group_membership_saved, sender=GroupMembership)
+        try:
+            [report] = MembershipDefault.refresh_groups()
+        finally:
+            post_save.disconnect(group_membership_saved, sender=GroupMembership)
+
+        self.assertEqual((report['active'], report['added'], report['removed'], report['archived']),
+                         (2, 2, 1, 1))
+        self.assertEqual(self.get_member_ids(), {self.active_user.pk, self.duplicate_user.pk})
+        # post_save is sent for the members added
+        self.assertEqual(sorted(saved), sorted([(self.active_user.pk, True),
+                                                (self.duplicate_user.pk, True)]))
+
+        # the older duplicate membership is archived, the latest kept
+        self.older_duplicate.refresh_from_db()
+        self.latest_duplicate.refresh_from_db()
+        self.assertEqual(self.older_duplicate.status_detail, 'archive')
+        self.assertEqual(self.latest_duplicate.status_detail, 'active')
+
+        # nothing left to change
+        [report] = MembershipDefault.refresh_groups()
+        self.assertEqual((report['added'], report['removed'], report['archived']), (0, 0, 0))
+
+
+
+class ExpireMembershipsTest(TestCase):
+
+    def setUp(self):
+        group = Group.objects.create(name='Members Group', sync_newsletters=False)
+        membership_type = MembershipType.objects.create(name='Member',
+                                                        description='Member',
+                                                        group=group)
+        self.directory = Directory.objects.create(headline='Member Directory',
+                                                  slug='member-directory',
+                                                  status_detail='active')
+        user = User.objects.create_user('member', 'member@example.com')
+        self.membership = MembershipDefault.objects.create(user=user,
+                                                           membership_type=membership_type,
+                                                           directory=self.directory,
+                                                           status=True,
+                                                           status_detail='active')
+        # the items queued on create
+        UnindexedItem.objects.all().delete()
+
+    def test_expire_memberships_queues_directories(self):
+        self.assertEqual(expire_memberships([self.membership.pk]), 1)
+
+        self.membership.refresh_from_db()
+        self.directory.refresh_from_db()
+        self.assertEqual(self.membership.status_detail, 'expired')
+        self.assertEqual(self.directory.status_detail, 'inactive')
+        # updated without post_save, the directory is queued to be indexed again
+        self.assertTrue(UnindexedItem.objects.filter(
+                            content_type=ContentType.objects.get_for_model(Directory),
+                            object_id=self.directory.pk).exists())
+
 # from tendenci.apps.base.test import TestCase
 # from selenium.common.exceptions import NoSuchElementException
 # 
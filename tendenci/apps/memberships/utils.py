@@ -17,9 +17,12 @@ import simplejson
 from django.contrib.auth.models import User
 from django.template import loader
 from django.template.defaultfilters import slugify
-from django.db.models import Q
+from django.db.models import Q, Prefetch, Value
+from django.db.models.functions import Coalesce
+from django.contrib.contenttypes.models import ContentType
 from django.core.files.storage import default_storage
 from django.core import exceptions
+from django.core.exceptions import FieldDoesNotExist, ObjectDoesNotExist
 from django.utils.encoding import smart_str
 from django.db.models.fields import AutoField
 from django.db.models import ForeignKey, OneToOneField
@@ -47,6 +50,7 @@ from tendenci.apps.profiles.models import Profile
 from tendenci.apps.profiles.utils import make_username_unique, spawn_username
 from tendenci.apps.emails.models import Email
 from tendenci.apps.educations.models import Education
+from tendenci.apps.invoices.models import Invoice
 from tendenci.apps.base.utils import escape_csv, Echo
 
 
@@ -312,8 +316,15 @@ def get_membership_rows(
         export_type=u'all',
         export_status_detail=u'',
         cp_id=0,
-        ids=''):
+        ids='',
+        chunk_size=1000):
+    """
+    Yields the export rows of the memberships.
 
+    The memberships are loaded by chunks (paginated by id) along with
+    their user, profile, demographics, educations and invoice, in a
+    few queries per chunk.
+    """
     if ids:
         ids = ids.split(',')
         memberships = MembershipDefault.objects.filter(id__in=ids)
@@ -336,56 +347,121 @@ def get_membership_rows(
     if cp_id:
         memberships = memberships.filter(corp_profile_id=cp_id)
 
-    for membership in memberships:
-        row_dict = {}
-
-        user = membership.user
-        invoice = membership.get_invoice()
-
-        [profile] = Profile.objects.filter(user=user)[:1] or [None]
-        education_list = user.educations.all().order_by('pk')[0:4]
-        [demographic] = MembershipDemographic.objects.filter(user=user)[:1] or [None]
-
-        for field_name in user_field_list:
-            row_dict[field_name] = get_obj_field_value(field_name, user)
-
-        if profile:
-            for field_name in profile_field_list:
-                orig_field_name = field_name
-                if field_name == 'profile_status_detail':
-                    field_name = 'status_detail'
-                elif field_name == 'profile_status':
-                    field_name = 'status'
-                row_dict[orig_field_name] = get_obj_field_value(
-                    field_name, profile, field_name in foreign_keys)
-
-        if education_list:
-            cnt = 0
-            for education in education_list:
-                row_dict[education_field_list[cnt]] = education.school
-                row_dict[education_field_list[cnt+1]] = education.major
-                row_dict[education_field_list[cnt+2]] = education.degree
-                row_dict[education_field_list[cnt+3]] = education.graduation_year
-                cnt += 4
-
-        if demographic:
-            for field_name in demographic_field_list:
-                row_dict[field_name] = get_obj_field_value(
-                    field_name, demographic, field_name in foreign_keys)
-
-        for field_name in membership_field_list:
+    memberships = memberships.select_related(
+                        'user', 'user__profile', 'user__demographics',
+                        'membership_set__invoice'
+                        ).prefetch_related(
+                        Prefetch('user__educations',
+                                 queryset=Education.objects.order_by('pk'),
+                                 to_attr='export_educations')
+                        ).order_by('pk')
+    content_type = ContentType.objects.get_for_model(MembershipDefault)
+
+    last_pk = 0
+    while True:
+        chunk = list(memberships.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        # the invoices of the memberships not in a membership set
+        # are bound by content type (see MembershipDefault.get_invoice)
+        invoices = {}
+        object_ids = [membership.pk for membership in chunk if not membership.membership_set_id]
+        if object_ids:
+            for invoice in Invoice.objects.filter(object_type=content_type,
+                                                  object_id__in=object_ids):
+                invoices.setdefault(invoice.object_id, invoice)
+
+        for membership in chunk:
+            yield get_membership_row(
+                membership,
+                invoices,
+                user_field_list,
+                profile_field_list,
+                education_field_list,
+                demographic_field_list,
+                membership_field_list,
+                invoice_field_list,
+                foreign_keys)
+
+
+def get_membership_row(
+        membership,
+        invoices,
+        user_field_list,
+        profile_field_list,
+        education_field_list,
+        demographic_field_list,
+        membership_field_list,
+        invoice_field_list,
+        foreign_keys):
+    row_dict = {}
+
+    user = membership.user
+    if membership.membership_set_id:
+        invoice = membership.membership_set.invoice
+    else:
+        invoice = invoices.get(membership.pk)
+
+    try:
+        profile = user.profile
+    except ObjectDoesNotExist:
+        profile = None
+    education_list = user.export_educations[0:4]
+    try:
+        demographic = user.demographics
+    except ObjectDoesNotExist:
+        demographic = None
+
+    for field_name in user_field_list:
+        row_dict[field_name] = get_obj_field_value(field_name, user)
+
+    if profile:
+        for field_name in profile_field_list:
+            orig_field_name = field_name
+            if field_name == 'profile_status_detail':
+                field_name = 'status_detail'
+            elif field_name == 'profile_status':
+                field_name = 'status'
+            row_dict[orig_field_name] = get_obj_field_value(
+                field_name, profile, field_name in foreign_keys)
+
+    if education_list:
+        cnt = 0
+        for education in education_list:
+            row_dict[education_field_list[cnt]] = education.school
+            row_dict[education_field_list[cnt+1]] = education.major
+            row_dict[education_field_list[cnt+2]] = education.degree
+            row_dict[education_field_list[cnt+3]] = education.graduation_year
+            cnt += 4
+
+    if demographic:
+        for field_name in demographic_field_list:
             row_dict[field_name] = get_obj_field_value(
-                field_name, membership, field_name in foreign_keys)
+                field_name, demographic, field_name in foreign_keys)
 
-        if invoice:
-            for field_name in invoice_field_list:
-                row_dict[field_name] = get_obj_field_value(
-                    field_name, invoice, field_name in foreign_keys)
+    for field_name in membership_field_list:
+        row_dict[field_name] = get_obj_field_value(
+            field_name, membership, field_name in foreign_keys)
+
+    if invoice:
+        for field_name in invoice_field_list:
+            row_dict[field_name] = get_obj_field_value(
+                field_name, invoice, field_name in foreign_keys)
 
-        yield row_dict
+    return row_dict
 
 
 def get_obj_field_value(field_name, obj, is_foreign_key=False):
+    if is_foreign_key:
+        # the id, without fetching the related object
+        try:
+            field = obj._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            field = None
+        if field is not None and field.concrete and (field.many_to_one or field.one_to_one):
+            return getattr(obj, field.attname)
     value = getattr(obj, field_name)
     if value and is_foreign_key and hasattr(value, 'id'):
         value = value.id
@@ -396,7 +472,7 @@ def process_export(
         export_fields='all_fields',
         export_type='all',
         export_status_detail='active',
-        identifier=u'', user_id=0, cp_id=0, ids=''):
+        identifier=u'', user_id=0, cp_id=0, ids='', verbosity=0):
     from tendenci.apps.perms.models import TendenciBaseModel
 
     if export_fields == 'main_fields':
@@ -546,9 +622,14 @@ def process_export(
     app_ids_dict = dict(MembershipApp.objects.all().values_list('id', 'name'))
 
     identifier = identifier or int(ttime.time())
+    # the temp file marks the export as in progress (see membership_default_export_status);
+    # the rows are written directly to the export file
     file_name_temp = 'export/memberships/%s_%d_temp.csv' % (identifier, cp_id)
+    file_name = 'export/memberships/%s_%d.csv' % (identifier, cp_id)
+    if not default_storage.exists(file_name_temp):
+        default_storage.save(file_name_temp, ContentFile(b''))
 
-    with default_storage.open(file_name_temp, 'w') as csvfile:
+    with default_storage.open(file_name, 'w') as csvfile:
         csv_writer = csv.DictWriter(csvfile, fieldnames=title_list)
         csv_writer.writeheader()
 
@@ -565,7 +646,8 @@ def process_export(
             cp_id,
             ids=ids)
 
-        for row_dict in membership_rows:
+        start_time = ttime.time()
+        for num_rows, row_dict in enumerate(membership_rows, 1):
 
             items_dict = {}
             for field_name in title_list:
@@ -594,11 +676,11 @@ def process_export(
                 items_dict[field_name] = item
             csv_writer.writerow(items_dict)
 
-    # rename the file name
-    file_name = 'export/memberships/%s_%d.csv' % (identifier, cp_id)
-    default_storage.save(file_name, default_storage.open(file_name_temp, 'rb'))
+            if verbosity > 0 and num_rows % 1000 == 0:
+                elapsed = ttime.time() - start_time
+                print('%d rows exported, %.1f rows/sec' % (num_rows, num_rows / elapsed if elapsed else 0))
 
-    # delete the temp file
+    # the export is ready
     default_storage.delete(file_name_temp)
 
     # notify user that export is ready to download
@@ -2226,16 +2308,22 @@ def email_membership_members(email, memberships, **kwargs):
     msg = '<div class="hide" id="m-streaming-content" style="margin: 2em 5em;text-align: left; line-height: 1.3em;">'
     msg += '<h1>Processing ...</h1>'
 
+    if hasattr(memberships, 'select_related'):
+        memberships = memberships.select_related('user')
+    template = Template(email.body)
+    # screen the recipients against the block list at once
+    allowed_emails = set(Email.filter_blocked(
+                            [member.user.email for member in memberships]))
+
     for member in memberships:
         first_name = member.user.first_name
         last_name = member.user.last_name
 
         email.recipient = member.user.email
 
-        if email.recipient:
+        if email.recipient and email.recipient in allowed_emails:
             view_url = '{0}{1}'.format(site_url, reverse('membership.details', args=[member.id]))
             edit_url = '{0}{1}'.format(site_url, reverse('membership_default.edit', args=[member.id]))
-            template = Template(email.body)
             context = Context({'site_url': site_url,
                                'site_display_name': site_display_name,
                                "first_name": first_name,
@@ -2290,3 +2378,110 @@ def email_membership_members(email, memberships, **kwargs):
     rendered = _strip_content_above_doctype(rendered)
     yield rendered
 
+
+
+def refresh_member_numbers(user_ids):
+    """
+    Refreshes the member number of the profiles of the users, set-wise:
+    the member number of their first active membership, or blank.
+    """
+    user_ids = set(user_ids)
+    member_numbers = {}
+    for user_id, member_number in MembershipDefault.objects.filter(
+                            user_id__in=user_ids,
+                            status=True,
+                            status_detail__iexact='active'
+                            ).order_by('pk').values_list('user_id', 'member_number'):
+        member_numbers.setdefault(user_id, member_number)
+
+    # no active membership left
+    Profile.objects.filter(user_id__in=user_ids - set(member_numbers)
+                           ).exclude(member_number='').update(member_number='')
+
+    profiles = Profile.objects.filter(user_id__in=member_numbers
+                                      ).values_list('user_id', 'member_number')
+    for user_id, profile_member_number in profiles:
+        member_number = member_numbers[user_id]
+        if not member_number:
+            # the membership needs a member number first
+            Profile.objects.get(user_id=user_id).refresh_member_number()
+        elif member_number != profile_member_number:
+            Profile.objects.filter(user_id=user_id).update(member_number=member_number)
+
+
+def expire_memberships(membership_ids, request_user=None, action_taken=False,
+                       deactivate_directories=True, batch_size=1000, description=''):
+    """
+    Expires the active memberships of membership_ids, in batches:
+        - Set status_detail to 'expired', with a single update
+        - Remove the users from the groups of the membership types
+        - Set the directories to inactive (with deactivate_directories)
+        - Refresh the member numbers of the profiles
+        - Write one event log per batch
+
+    With action_taken, the memberships are marked as an action taken
+    by request_user, as MembershipDefault.expire does.
+    Returns the number of memberships expired.
+    """
+    from tendenci.apps.directories.models import Directory
+    from tendenci.apps.event_logs.models import EventLog
+    from tendenci.apps.search.indexing import queue_unindexed_items
+    from tendenci.apps.user_groups.models import GroupMembership
+
+    membership_ids = list(membership_ids)
+    num_expired = 0
+    for i in range(0, len(membership_ids), batch_size):
+        now = datetime.now()
+        rows = list(MembershipDefault.objects.filter(
+                        pk__in=membership_ids[i:i + batch_size],
+                        status=True,
+                        status_detail='active'
+                        ).values_list('pk', 'user_id', 'membership_type__group_id', 'directory_id'))
+        if not rows:
+            continue
+        ids = [row[0] for row in rows]
+
+        updates = {'status_detail': 'expired', 'update_dt': now}
+        if action_taken:
+            updates['action_taken'] = True
+            updates['action_taken_dt'] = Coalesce('action_taken_dt', Value(now))
+            if request_user:
+                updates['action_taken_user'] = request_user
+        MembershipDefault.objects.filter(pk__in=ids).update(**updates)
+        # update() doesn't send post_save, queue the search indexing
+        queue_unindexed_items(MembershipDefault, ids)
+
+        # remove from the groups
+        user_ids_by_group = {}
+        for pk, user_id, group_id, directory_id in rows:
+            if group_id:
+                user_ids_by_group.setdefault(group_id, set()).add(user_id)
+        for group_id, user_ids in user_ids_by_group.items():
+            GroupMembership.objects.filter(group_id=group_id, member_id__in=user_ids).delete()
+
+        directory_ids = [row[3] for row in rows if row[3]]
+        if deactivate_directories and directory_ids:
+            Directory.objects.filter(pk__in=directory_ids).update(status_detail='inactive')
+            queue_unindexed_items(Directory, directory_ids)
+
+        refresh_member_numbers(row[1] for row in rows)
+
+        EventLog(
+            content_type=ContentType.objects.get_for_model(MembershipDefault),
+            source='',
+            event_id=0,
+            event_name='',
+            event_type='',
+            event_data='Expired memberships: %s' % ', '.join(str(pk) for pk in ids),
+            category='',
+            username=request_user.username if request_user else '',
+            user=request_user,
+            headline='%d memberships expired' % len(ids),
+            description=description,
+            application='memberships',
+            action='expire',
+            model_name='membership',
+        ).save()
+
+        num_expired += len(ids)
+    return num_expired
@@ -1002,15 +1002,14 @@ def membership_default_export_status(request, identifier,
             raise Http403
 
     export_path = 'export/memberships/%s_%d.csv' % (identifier, cp_id)
-    download_ready = False
-    if default_storage.exists(export_path):
-        download_ready = True
-    else:
-        temp_export_path = 'export/memberships/%s_%d_temp.csv' % (
+    temp_export_path = 'export/memberships/%s_%d_temp.csv' % (
                                             identifier, cp_id)
-
-        if not default_storage.exists(temp_export_path) and \
-                not default_storage.exists(export_path):
+    download_ready = False
+    # the temp file is there while the export is in progress
+    if not default_storage.exists(temp_export_path):
+        if default_storage.exists(export_path):
+            download_ready = True
+        else:
             raise Http404
 
     context = {'identifier': identifier,
@@ -1040,7 +1039,9 @@ def membership_default_export_check_status(request, identifier):
         if not (corp_profile and corp_profile.is_rep(request.user)):
             raise Http403
     export_path = 'export/memberships/%s_%d.csv' % (identifier, cp_id)
-    if default_storage.exists(export_path):
+    temp_export_path = 'export/memberships/%s_%d_temp.csv' % (identifier, cp_id)
+    if default_storage.exists(export_path) and \
+            not default_storage.exists(temp_export_path):
         status = 'done'
     return HttpResponse(status)
 
@@ -1064,7 +1065,8 @@ def membership_default_export_download(request, identifier):
 
     file_name = '%s_%s.csv' % (identifier, cp_id)
     file_path = 'export/memberships/%s' % file_name
-    if not default_storage.exists(file_path):
+    if not default_storage.exists(file_path) or \
+            default_storage.exists('export/memberships/%s_%s_temp.csv' % (identifier, cp_id)):
         raise Http404
 
     response = HttpResponse(content_type='text/csv')
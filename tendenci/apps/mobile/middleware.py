@@ -1,6 +1,8 @@
 from django.conf import settings
 from django.utils.deprecation import MiddlewareMixin
 
+from tendenci.apps.robots.matcher import AgentMatcher
+
 mobile_agents = [
 #    'iPad',  # Removed on 2012-07-11
     'iPhone',
@@ -34,6 +36,8 @@ mobile_agents = [
     'SonyEricsson'
 ]
 
+mobile_agent_matcher = AgentMatcher((ma, True) for ma in mobile_agents)
+
 def user_agent(request):
     if 'HTTP_USER_AGENT' in request.META:
         return request.META['HTTP_USER_AGENT'].lower()
@@ -48,9 +52,7 @@ def is_mobile_cookie_on(request):
 
 def is_mobile_browser(request):
     if request.user_agent:
-        for ma in mobile_agents:
-            if ma.lower() in request.user_agent:
-                return True
+        return bool(mobile_agent_matcher.match(request.user_agent))
     return False
 
 def show_mobile(request):
@@ -1 +1,4 @@
 NAV_PRE_KEY = "nav"
+# cache tag of the rendered html and the lookups of a nav, invalidated
+# when the nav, its items or the pages they link to are saved
+NAV_CACHE_TAG = "navs.%s"
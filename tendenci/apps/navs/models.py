@@ -7,7 +7,7 @@ from tendenci.apps.perms.object_perms import ObjectPermission
 from tendenci.apps.perms.models import TendenciBaseModel
 from tendenci.apps.pages.models import Page
 from tendenci.apps.navs.managers import NavManager
-from tendenci.apps.navs.signals import update_nav_links
+from tendenci.apps.navs.signals import update_nav_links, update_item_nav, update_page_navs
 from tendenci.libs.abstracts.models import OrderingBaseModel
 from tendenci.apps.navs.utils import clear_nav_cache
 from tendenci.apps.base.validators import UnicodeNameValidator
@@ -43,6 +43,7 @@ class Nav(TendenciBaseModel):
     def top_items(self):
         """
         Returns all items with level 0.
+        Use get_nav_tree to get them along with their children.
         """
         return self.navitem_set.filter(level=0).order_by('position')
 
@@ -73,6 +74,10 @@ class NavItem(OrderingBaseModel):
         """
         returns the item's direct children
         """
+        if hasattr(self, '_children'):
+            # set by get_nav_tree
+            return self._children
+
         level = self.level or 0
         level_down = level + 1
         position = self.position or 0
@@ -139,3 +144,7 @@ class NavItem(OrderingBaseModel):
 
 # Update page nav items when a page is saved
 models.signals.post_save.connect(update_nav_links, sender=Nav)
+models.signals.post_delete.connect(update_nav_links, sender=Nav)
+models.signals.post_save.connect(update_item_nav, sender=NavItem)
+models.signals.post_delete.connect(update_item_nav, sender=NavItem)
+models.signals.post_save.connect(update_page_navs, sender=Page)
@@ -1,11 +1,21 @@
-from django.core.cache import cache
-from django.conf import settings
-
-from tendenci.apps.navs.cache import NAV_PRE_KEY
+from tendenci.apps.base.cache import invalidate_cache_tag
+from tendenci.apps.navs.cache import NAV_CACHE_TAG
 
 
 def update_nav_links(sender, instance, **kwargs):
-    keys = [settings.CACHE_PRE_KEY, NAV_PRE_KEY, str(instance.id)]
-    key = '.'.join(keys)
+    invalidate_cache_tag(NAV_CACHE_TAG % instance.id)
+
+
+def update_item_nav(sender, instance, **kwargs):
+    invalidate_cache_tag(NAV_CACHE_TAG % instance.nav_id)
+
+
+def update_page_navs(sender, instance, **kwargs):
+    """
+    Invalidates the navs linking to the page, its url or status may have changed.
+    """
+    from tendenci.apps.navs.models import NavItem
 
-    cache.delete(key)
+    nav_ids = NavItem.objects.filter(page=instance).values_list('nav_id', flat=True).distinct()
+    for nav_id in nav_ids:
+        invalidate_cache_tag(NAV_CACHE_TAG % nav_id)
@@ -2,10 +2,9 @@ from builtins import str
 from django.template import Library, TemplateSyntaxError, Variable, Node
 from django.utils.translation import gettext_lazy as _
 from tendenci.apps.base.template_tags import ListNode, parse_tag_kwargs
-from tendenci.apps.perms.utils import get_query_filters
 from django.contrib.auth.models import AnonymousUser, User
 from tendenci.apps.navs.models import Nav
-from tendenci.apps.navs.utils import get_nav, cache_nav
+from tendenci.apps.navs.utils import get_nav, cache_nav, get_viewable_nav, get_nav_tree
 
 register = Library()
 
@@ -53,17 +52,14 @@ def navigation(context, nav_id):
         pass
 
     try:
-        filters = get_query_filters(user, 'navs.view_nav')
-        navs = Nav.objects.filter(filters).filter(id=nav_id)
-        if user.is_authenticated:
-            if not user.profile.is_superuser:
-                navs = navs.distinct()
-        nav = navs[0]
+        nav = get_viewable_nav(user, nav_id)
     except:
         return None
+    if not nav:
+        return None
     context.update({
         "nav": nav,
-        "items": nav.top_items,
+        "items": get_nav_tree(nav),
     })
     return context
 
@@ -85,7 +81,7 @@ def load_nav(context, nav_id, show_title=False, **kwargs):
         return None
     context.update({
         "nav": nav,
-        "items": nav.top_items,
+        "items": get_nav_tree(nav),
         "show_title": show_title,
         "is_bootstrap": is_bootstrap,
         'is_site_map': is_site_map,
@@ -130,13 +126,7 @@ def nav(context, nav_id, show_title=False, is_site_map=False):
         pass
 
     try:
-        filters = get_query_filters(user, 'navs.view_nav')
-        navs = Nav.objects.filter(filters).filter(id=nav_id)
-        if user.is_authenticated:
-            if not user.profile.is_superuser:
-                navs = navs.distinct()
-
-        nav_object = navs[0]
+        nav_object = get_viewable_nav(user, nav_id)
         nav = get_nav(nav_object.pk, is_site_map=is_site_map)
         if not nav:
             nav = cache_nav(nav_object, show_title, is_site_map=is_site_map)
@@ -169,13 +159,7 @@ def bootstrap_nav(context, nav_id, show_title=False):
         pass
 
     try:
-        filters = get_query_filters(user, 'navs.view_nav')
-        navs = Nav.objects.filter(filters).filter(id=nav_id)
-        if user.is_authenticated:
-            if not user.profile.is_superuser:
-                navs = navs.distinct()
-
-        nav_object = navs[0]
+        nav_object = get_viewable_nav(user, nav_id)
         nav = get_nav(nav_object.pk)
         if not nav:
             nav = cache_nav(nav_object, show_title)
@@ -268,13 +252,9 @@ class GetNavNode(Node):
             pk = self.pk
 
         try:
-            filters = get_query_filters(user, 'navs.view_nav')
-            nav = Nav.objects.filter(filters).filter(pk=pk)
-            if user.is_authenticated:
-                if not user.profile.is_superuser:
-                    nav = nav.distinct()
-
-            context[self.context_var] = nav[0]
+            nav = get_viewable_nav(user, pk)
+            if nav:
+                context[self.context_var] = nav
         except:
             pass
 
@@ -1,3 +1,64 @@
+from django.test import TestCase
+
+from tendenci.apps.navs.models import Nav, NavItem
+from tendenci.apps.navs.utils import get_nav_tree
+
+
+class NavTreeTest(TestCase):
+
+    def setUp(self):
+        self.nav = Nav.objects.create(title="Test Nav")
+        # (label, level), the last items being a deep child and top items without children
+        items = [('Item 1', 0),
+                 ('Item 1.1', 1),
+                 ('Item 1.1.1', 2),
+                 ('Item 1.1.2', 2),
+                 ('Item 1.2', 1),
+                 ('Item 2', 0),
+                 ('Item 3', 0),
+                 ('Item 3.1', 1),
+                 ('Item 3.1.1', 2),
+                 ('Item 3.1.1.1', 3),
+                 ('Item 3.2', 1),
+                 ('Item 3.2.1', 2),
+                 ('Item 4', 0),
+                 ('Item 5', 0),
+                 ('Item 5.1', 1),
+                 ('Item 5.1.1', 2)]
+        for position, (label, level) in enumerate(items):
+            NavItem.objects.create(nav=self.nav, label=label, level=level, position=position)
+
+    def assertSameChildren(self, tree_items):
+        """
+        Compares the _children set by get_nav_tree with the children queried.
+        """
+        for tree_item in tree_items:
+            item = NavItem.objects.get(pk=tree_item.pk)
+            self.assertEqual([child.pk for child in tree_item._children],
+                             [child.pk for child in item.children])
+            self.assertSameChildren(tree_item._children)
+
+    def test_get_nav_tree(self):
+        tree = get_nav_tree(self.nav)
+        self.assertEqual([item.label for item in tree],
+                         ['Item 1', 'Item 2', 'Item 3', 'Item 4', 'Item 5'])
+        self.assertEqual([item.label for item in tree[2].children], ['Item 3.1', 'Item 3.2'])
+        self.assertEqual([item.label for item in tree[4].children[0].children], ['Item 5.1.1'])
+        self.assertSameChildren(tree)
+
+    def test_get_nav_tree_queries(self):
+        with self.assertNumQueries(1):
+            tree = get_nav_tree(self.nav)
+            labels = []
+            items = list(tree)
+            while items:
+                item = items.pop(0)
+                labels.append(item.label)
+                items[0:0] = item.children
+        self.assertEqual(labels, list(NavItem.objects.filter(nav=self.nav
+                                        ).order_by('position').values_list('label', flat=True)))
+
+
 # import logging
 # 
 # from django.test import Client, TestCase
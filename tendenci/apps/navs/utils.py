@@ -2,7 +2,8 @@ from django.core.cache import cache
 from django.conf import settings
 from django.template.loader import render_to_string
 
-from tendenci.apps.navs.cache import NAV_PRE_KEY
+from tendenci.apps.base.cache import tagged_cache_key, invalidate_cache_tag
+from tendenci.apps.navs.cache import NAV_PRE_KEY, NAV_CACHE_TAG
 
 
 def get_pre_key(is_site_map=False):
@@ -10,12 +11,15 @@ def get_pre_key(is_site_map=False):
         return 'site_map'
     return NAV_PRE_KEY
 
+def get_nav_cache_key(id, is_site_map=False):
+    keys = [settings.CACHE_PRE_KEY, get_pre_key(is_site_map), str(id)]
+    return tagged_cache_key('.'.join(keys), NAV_CACHE_TAG % id)
+
 def cache_nav(nav, show_title=False, is_site_map=False):
     """
     Caches a nav's rendered html code
     """
-    keys = [settings.CACHE_PRE_KEY, get_pre_key(is_site_map), str(nav.id)]
-    key = '.'.join(keys)
+    key = get_nav_cache_key(nav.id, is_site_map=is_site_map)
     value = render_to_string(template_name="navs/render_nav.html",
                         context={'nav':nav,
                          "show_title": show_title,
@@ -27,8 +31,7 @@ def get_nav(id, is_site_map=False):
     """
     Get the nav from the cache.
     """
-    keys = [settings.CACHE_PRE_KEY, get_pre_key(is_site_map), str(id)]
-    key = '.'.join(keys)
+    key = get_nav_cache_key(id, is_site_map=is_site_map)
     nav = cache.get(key)
     return nav
 
@@ -36,8 +39,70 @@ def clear_nav_cache(nav):
     """
     Clear nav cache
     """
-    # delete nav and sitemap cache
-    for is_site_map in [False, True]:
-        keys = [settings.CACHE_PRE_KEY, get_pre_key(is_site_map), str(nav.id)]
-        key = '.'.join(keys)
-        cache.delete(key)
+    # invalidates the nav and sitemap html and the nav lookups
+    invalidate_cache_tag(NAV_CACHE_TAG % nav.id)
+
+def get_nav_cache_user_class(user):
+    """
+    Returns the class of users sharing the same view permission
+    on the navs, or None if it depends on the user.
+    """
+    if not user.is_authenticated:
+        return 'anonymous'
+    if user.profile.is_superuser:
+        return 'superuser'
+    return None
+
+def get_viewable_nav(user, id):
+    """
+    Returns the nav if the user can view it, None otherwise.
+    The lookup is cached for anonymous users and superusers.
+    """
+    from tendenci.apps.perms.utils import get_query_filters
+    from tendenci.apps.navs.models import Nav
+
+    id = int(id)
+    cache_key = None
+    user_class = get_nav_cache_user_class(user)
+    if user_class:
+        keys = [settings.CACHE_PRE_KEY, NAV_PRE_KEY, 'viewable', user_class, str(id)]
+        cache_key = tagged_cache_key('.'.join(keys), NAV_CACHE_TAG % id)
+        nav = cache.get(cache_key)
+        if nav is not None:
+            # 0 is cached when the nav is not viewable
+            return nav or None
+
+    filters = get_query_filters(user, 'navs.view_nav')
+    navs = Nav.objects.filter(filters).filter(id=id)
+    if user.is_authenticated:
+        if not user.profile.is_superuser:
+            navs = navs.distinct()
+    nav = navs.first()
+
+    if cache_key:
+        cache.set(cache_key, nav or 0, 432000)
+    return nav
+
+def get_nav_tree(nav):
+    """
+    Returns the top items of the nav, with the children of every item
+    set, from a single query.
+
+    The children of an item are the items one level down between the
+    item and its next sibling (the next item of the same level).
+    """
+    from tendenci.apps.navs.models import NavItem
+
+    items = NavItem.objects.filter(nav=nav).select_related('page').order_by('position')
+    top_items = []
+    # the last item seen at each level
+    parents = {}
+    for item in items:
+        item._children = []
+        level = item.level or 0
+        if level == 0:
+            top_items.append(item)
+        elif level - 1 in parents:
+            parents[level - 1]._children.append(item)
+        parents[level] = item
+    return top_items
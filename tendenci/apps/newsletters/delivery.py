@@ -0,0 +1,285 @@
+import re
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from threading import local
+
+from django.db.models import Prefetch
+
+from tendenci.apps.base.utils import validate_email
+from tendenci.apps.email_blocks.utils import filter_blocked
+from tendenci.apps.newsletters.utils import get_newsletter_connection
+
+
+# the unsubscribe url placeholder can be messed up in the href,
+# e.g. <a href="http://[unsubscribe_url]">. Only href values are replaced.
+UNSUBSCRIBE_URL_RE = r'(href=\")([^\"]*)(\[unsubscribe_url\])(\")'
+# placeholders filled in from the membership of the recipient
+MEMBERSHIP_KEYS = ('membership_link', 'directory_url', 'directory_edit_url',
+                   'membership_type', 'invoice_link')
+UNSUBSCRIBE_MARKER = '\x00unsubscribe_url\x00'
+
+
+class PersonalizedTemplate(object):
+    """
+    The subject and body of a newsletter, parsed once. Rendering for
+    a recipient is a single pass over the pre-split body instead of a
+    series of str.replace and re.sub calls per recipient.
+    """
+    def __init__(self, subject, body, browser_view_url):
+        self.subject = subject
+        # the browser view url is the same for everybody
+        body = body.replace('[browser_view_url]', browser_view_url)
+        body = re.sub(UNSUBSCRIBE_URL_RE, r'\1' + UNSUBSCRIBE_MARKER + r'\4', body)
+
+        tokens = ['[username]', '[firstname]', UNSUBSCRIBE_MARKER] + \
+                 ['[%s]' % key for key in MEMBERSHIP_KEYS]
+        token_re = '(%s)' % '|'.join(re.escape(token) for token in tokens)
+        # odd items are the tokens
+        self.parts = re.split(token_re, body)
+        self.uses_membership = any(('[%s]' % key) in self.parts[1::2]
+                                   for key in MEMBERSHIP_KEYS)
+        self.uses_unsubscribe_url = UNSUBSCRIBE_MARKER in self.parts[1::2]
+
+    def render_subject(self, user):
+        subject = self.subject
+        if '[firstname]' in subject:
+            subject = subject.replace('[firstname]', user.first_name)
+        if '[lastname]' in subject:
+            subject = subject.replace('[lastname]', user.last_name)
+        return subject
+
+    def render_body(self, user, unsubscribe_url='', membership_urls=None):
+        values = {
+            '[username]': user.username,
+            '[firstname]': user.first_name,
+            UNSUBSCRIBE_MARKER: unsubscribe_url,
+        }
+        for key in MEMBERSHIP_KEYS:
+            token = '[%s]' % key
+            if membership_urls is not None:
+                values[token] = membership_urls.get(key, '')
+            else:
+                # leave the placeholder as is
+                values[token] = token
+        parts = self.parts[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values[parts[i]]
+        return ''.join(parts)
+
+
+class NewsletterSender(object):
+    """
+    Sends a newsletter to its recipients.
+
+    Recipients are loaded in chunks with their user and profile, the
+    messages of a chunk are sent by a pool of worker threads that keep
+    their connection open, and every delivery is recorded in
+    NewsletterDeliveryRecord so that an interrupted run (see
+    NewsletterRecurringData) resumes where it stopped.
+    """
+    def __init__(self, newsletter, run, site_url, workers=4, chunk_size=200, verbosity=1):
+        self.newsletter = newsletter
+        self.run = run
+        self.site_url = site_url
+        self.workers = max(1, workers)
+        self.chunk_size = chunk_size
+        self.verbosity = verbosity
+        self.sent_count = 0
+        self.failed_count = 0
+        self.thread_data = local()
+        self.connections = []
+        self.template = None
+        self.membership_needed = False
+
+    def get_connection(self):
+        """
+        Returns the connection of the current worker thread,
+        opened once and reused for all its messages.
+        """
+        connection = getattr(self.thread_data, 'connection', None)
+        if connection is None:
+            connection = get_newsletter_connection()
+            connection.open()
+            self.thread_data.connection = connection
+            self.connections.append(connection)
+        return connection
+
+    def send_message(self, email, msg):
+        try:
+            msg.connection = self.get_connection()
+            msg.send()
+            return email, 'sent'
+        except Exception as e:
+            # reopen the connection for the next message
+            connection = getattr(self.thread_data, 'connection', None)
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+                self.thread_data.connection = None
+            if self.verbosity > 0:
+                print(u"Failed to send to {}: {}".format(email, e))
+            return email, 'failed'
+
+    def iter_chunks(self):
+        """
+        Yields the recipients in chunks, paginated by email
+        (the recipients are distinct on member email).
+        """
+        from tendenci.apps.memberships.models import MembershipDefault
+
+        recipients = self.newsletter.get_recipients().select_related(
+                                'member', 'member__profile', 'group')
+        if self.membership_needed:
+            memberships = MembershipDefault.objects.exclude(
+                                status_detail='archive'
+                                ).select_related('membership_type', 'directory'
+                                ).order_by('-create_dt')
+            recipients = recipients.prefetch_related(
+                Prefetch('member__membershipdefault_set',
+                         queryset=memberships,
+                         to_attr='newsletter_memberships'))
+
+        last_email = None
+        while True:
+            chunk = recipients
+            if last_email is not None:
+                chunk = chunk.filter(member__email__gt=last_email)
+            chunk = list(chunk[:self.chunk_size])
+            if not chunk:
+                break
+            yield chunk
+            last_email = chunk[-1].member.email
+
+    def get_membership_urls(self, user):
+        memberships = getattr(user, 'newsletter_memberships', None)
+        if memberships:
+            return memberships[0].get_common_urls(site_url=self.site_url)
+        return None
+
+    def build_messages(self, recipient, delivered):
+        """
+        Returns a list of (email address, EmailMessage) to send to a recipient.
+        """
+        from tendenci.apps.emails.models import Email
+
+        newsletter = self.newsletter
+        user = recipient.member
+        profile = getattr(user, 'profile', None)
+
+        # Skip if Don't Send Email is on
+        if newsletter.enforce_direct_mail_flag:
+            if profile and not profile.direct_mail:
+                return []
+
+        addresses = [user.email]
+        if newsletter.send_to_email2 and profile and validate_email(profile.email2):
+            addresses.append(profile.email2)
+        addresses = [address for address in addresses if address not in delivered]
+        # skip if not a valid email address
+        if not addresses or not validate_email(user.email):
+            return []
+
+        unsubscribe_url = ''
+        if self.template.uses_unsubscribe_url:
+            unsubscribe_url = recipient.noninteractive_unsubscribe_url
+        membership_urls = None
+        if self.membership_needed:
+            membership_urls = self.get_membership_urls(user)
+
+        email = newsletter.email
+        email_to_send = Email(
+                subject=self.template.render_subject(user),
+                body=self.template.render_body(user, unsubscribe_url, membership_urls),
+                sender=email.sender,
+                sender_display=email.sender_display,
+                reply_to=email.reply_to)
+
+        messages = []
+        for address in addresses:
+            email_to_send.recipient = address
+            msg = email_to_send.get_message()
+            if msg:
+                messages.append((address, msg))
+        return messages
+
+    def record(self, results):
+        from tendenci.apps.newsletters.models import NewsletterDeliveryRecord
+
+        NewsletterDeliveryRecord.objects.bulk_create([
+            NewsletterDeliveryRecord(run=self.run, email=email, status=status)
+            for email, status in results], ignore_conflicts=True)
+
+        for email, status in results:
+            if status == 'sent':
+                self.sent_count += 1
+            else:
+                self.failed_count += 1
+
+    def send(self):
+        """
+        Sends the newsletter to the recipients not yet delivered in this run.
+        Returns the number of emails sent in this run.
+        """
+        from tendenci.apps.newsletters.models import NewsletterDeliveryRecord
+
+        newsletter = self.newsletter
+        email = newsletter.email
+        self.template = PersonalizedTemplate(email.subject, email.body,
+                                             newsletter.get_browser_view_url())
+
+        group = newsletter.group
+        self.membership_needed = self.template.uses_membership and bool(
+                group and group.membership_types.all().exists())
+
+        # failed deliveries are retried
+        records = NewsletterDeliveryRecord.objects.filter(run=self.run)
+        records.filter(status='failed').delete()
+        delivered = set(records.values_list('email', flat=True))
+        self.sent_count = len(delivered)
+        if delivered and self.verbosity > 0:
+            print("Resuming, %d emails already sent." % len(delivered))
+
+        start_time = time.time()
+        initial_count = self.sent_count
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                for chunk in self.iter_chunks():
+                    messages = []
+                    for recipient in chunk:
+                        messages.extend(self.build_messages(recipient, delivered))
+                    # screen the addresses of the whole chunk against the block list at once
+                    allowed = set(filter_blocked([address for address, msg in messages]))
+                    messages = [(address, msg) for address, msg in messages if address in allowed]
+
+                    results = list(executor.map(lambda m: self.send_message(*m), messages))
+                    self.record(results)
+                    delivered.update(email for email, status in results if status == 'sent')
+                    self.update_progress_since(start_time, initial_count)
+
+                    if self.verbosity > 0:
+                        print("Sent %d emails (%d failed), %.2f msgs/sec" % (
+                              self.sent_count, self.failed_count, self.run.msgs_per_sec or 0))
+            finally:
+                for connection in self.connections:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+        self.run.finish_dt = datetime.datetime.now()
+        self.run.save(update_fields=['finish_dt'])
+        return self.sent_count
+
+    def update_progress_since(self, start_time, initial_count):
+        """
+        Saves the sent count and the throughput of this process
+        (emails sent before a resume are not counted in the throughput).
+        """
+        elapsed = time.time() - start_time
+        self.run.email_sent_count = self.sent_count
+        if elapsed > 0:
+            self.run.msgs_per_sec = round((self.sent_count - initial_count) / elapsed, 2)
+        self.run.save(update_fields=['email_sent_count', 'msgs_per_sec'])
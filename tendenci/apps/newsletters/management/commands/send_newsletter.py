@@ -1,8 +1,6 @@
 
-from builtins import str
 import datetime
 import traceback
-import re
 from logging import getLogger
 from django.core.management.base import BaseCommand, CommandError
 from django.core.cache import cache
@@ -20,9 +18,16 @@ class Command(BaseCommand):
         example:
         python manage.py send_newsletter 1
 
+    If a previous run of the newsletter was interrupted, it is resumed
+    and the recipients already sent to are skipped.
+
     """
     def add_arguments(self, parser):
         parser.add_argument('newsletter_id', type=int)
+        parser.add_argument('--workers', type=int, default=4,
+            help='Number of threads sending emails')
+        parser.add_argument('--chunk-size', type=int, default=200,
+            help='Number of recipients loaded at a time')
 
     def send_newsletter(self, newsletter_id, **kwargs):
         from tendenci.apps.emails.models import Email
@@ -31,6 +36,7 @@ class Command(BaseCommand):
         from tendenci.apps.base.utils import validate_email
 
         from tendenci.apps.newsletters.utils import get_newsletter_connection
+        from tendenci.apps.newsletters.delivery import NewsletterSender
 
         connection = get_newsletter_connection()
         if not connection:
@@ -62,100 +68,36 @@ class Command(BaseCommand):
             newsletter.send_status = 'resending'
 
         elif newsletter.send_status == 'resent':
-            newsletter.send_status == 'resending'
+            newsletter.send_status = 'resending'
 
         newsletter.save()
 
-        if newsletter.schedule:
-            # save start_dt and status for the recurring
+        # every run is recorded, it holds the progress of the run so that
+        # an interrupted send is resumed when the command is run again
+        [nr_data] = NewsletterRecurringData.objects.filter(
+                        newsletter=newsletter,
+                        finish_dt__isnull=True,
+                        send_status=newsletter.send_status
+                        ).order_by('-start_dt')[:1] or [None]
+        if not nr_data:
             nr_data = NewsletterRecurringData(
                         newsletter=newsletter,
                         start_dt=datetime.datetime.now(),
                         send_status=newsletter.send_status)
             nr_data.save()
-            newsletter.nr_data = nr_data
+        newsletter.nr_data = nr_data
 
-        recipients = newsletter.get_recipients()
         email = newsletter.email
         # replace relative to absolute urls
         self.site_url = get_setting('site', 'global', 'siteurl')
         email.body = email.body.replace("src=\"/", "src=\"%s/" % self.site_url)
         email.body = email.body.replace("href=\"/", "href=\"%s/" % self.site_url)
 
-        if newsletter.group and newsletter.group.membership_types.all().exists():
-            membership_type = newsletter.group.membership_types.all()[0]
-        else:
-            membership_type = None
-
-        counter = 0
-        for recipient in recipients:
-            if hasattr(recipient.member, 'profile'):
-                profile = recipient.member.profile
-            else:
-                profile = None
-
-            # Skip if Don't Send Email is on
-            if newsletter.enforce_direct_mail_flag:
-                if profile and not profile.direct_mail:
-                    continue
-
-            # skip if not a valid email address
-            if not validate_email(recipient.member.email):
-                continue
-
-            subject = email.subject
-            body = email.body
-
-            if '[firstname]' in subject:
-                subject = subject.replace('[firstname]', recipient.member.first_name)
-
-            if '[lastname]' in subject:
-                subject = subject.replace('[lastname]', recipient.member.last_name)
-
-            if '[username]' in body:
-                body = body.replace('[username]', recipient.member.username)
-
-            if '[firstname]' in body:
-                body = body.replace('[firstname]', recipient.member.first_name)
-
-            if '[unsubscribe_url]' in body:
-                #body = body.replace('[unsubscribe_url]', recipient.noninteractive_unsubscribe_url)
-                # The unsubscribe_url link should be something like <a href="[unsubscribe_url]">Unsubscribe</a>.
-                # But it can be messed up sometimes. Let's prevent that from happening.
-                p = r'(href=\")([^\"]*)(\[unsubscribe_url\])(\")'
-                body = re.sub(p, r'\1' + recipient.noninteractive_unsubscribe_url + r'\4', body)
-
-            if '[browser_view_url]' in body:
-                body = body.replace('[browser_view_url]', newsletter.get_browser_view_url())
-
-            if membership_type:
-                [membership] = recipient.member.membershipdefault_set.exclude(
-                        status_detail='archive').order_by('-create_dt')[:1] or [None]
-                if membership:
-                    # do find and replace
-                    urls_dict = membership.get_common_urls(site_url=self.site_url)
-                    for key in urls_dict.keys():
-                        body = body.replace('[%s]' % key, urls_dict[key])
-
-            email_to_send = Email(
-                    subject=subject,
-                    body=body,
-                    sender=email.sender,
-                    sender_display=email.sender_display,
-                    reply_to=email.reply_to,
-                    recipient=recipient.member.email
-                    )
-            print(u"Sending to {}".format(str(recipient.member.email)))
-            email_to_send.send(connection=connection)
-            counter += 1
-            print(u"Newsletter sent to {}".format(str(recipient.member.email)))
-
-            if newsletter.send_to_email2 and hasattr(recipient.member, 'profile') \
-                and validate_email(recipient.member.profile.email2):
-                email_to_send.recipient = recipient.member.profile.email2
-                email_to_send.send(connection=connection)
-                counter += 1
-                print(u"Newsletter sent to {}".format(str(recipient.member.profile.email2)))
+        sender = NewsletterSender(newsletter, nr_data, self.site_url,
+                                  workers=kwargs.get('workers', 4),
+                                  chunk_size=kwargs.get('chunk_size', 200),
+                                  verbosity=kwargs.get('verbosity', 1))
+        counter = sender.send()
 
         if newsletter.send_status == 'sending':
             newsletter.send_status = 'sent'
@@ -171,14 +113,15 @@ class Command(BaseCommand):
         newsletter.email_sent_count = counter
 
         newsletter.save()
-        if newsletter.schedule and newsletter.nr_data:
+        if newsletter.nr_data:
             # save the finish_dt and email_sent_count for the recurring
             newsletter.nr_data.finish_dt = datetime.datetime.now()
             newsletter.nr_data.email_sent_count = newsletter.email_sent_count
             newsletter.nr_data.send_status = newsletter.send_status
             newsletter.nr_data.save()
 
-        print("Successfully sent %s newsletter emails." % counter)
+        print("Successfully sent %s newsletter emails (%s msgs/sec)." % (
+              counter, newsletter.nr_data.msgs_per_sec))
 
         print("Sending confirmation message to creator...")
         # send confirmation email
@@ -213,7 +156,10 @@ class Command(BaseCommand):
         newsletter_id = options['newsletter_id']
 
         try:
-            self.send_newsletter(newsletter_id)
+            self.send_newsletter(newsletter_id,
+                                 workers=options['workers'],
+                                 chunk_size=options['chunk_size'],
+                                 verbosity=options['verbosity'])
         except:
             print(traceback.format_exc())
             newsletter_url = '%s%s' % (get_setting('site', 'global', 'siteurl'),
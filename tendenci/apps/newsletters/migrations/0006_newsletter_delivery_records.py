@@ -0,0 +1,30 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsletters', '0005_alter_newsletter_enforce_direct_mail_flag'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='newsletterrecurringdata',
+            name='msgs_per_sec',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='NewsletterDeliveryRecord',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('sent', 'Sent'), ('failed', 'Failed')], default='sent', max_length=10)),
+                ('create_dt', models.DateTimeField(auto_now_add=True)),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='delivery_records', to='newsletters.newsletterrecurringdata')),
+            ],
+            options={
+                'unique_together': {('run', 'email')},
+            },
+        ),
+    ]
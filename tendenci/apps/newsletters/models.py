@@ -537,3 +537,23 @@ class NewsletterRecurringData(models.Model):
     # number of emails sent
     email_sent_count = models.IntegerField(null=True, blank=True, default=0)
     send_status = models.CharField(max_length=30, default='queued')
+    # sending throughput, in messages per second
+    msgs_per_sec = models.FloatField(null=True, blank=True)
+
+
+class NewsletterDeliveryRecord(models.Model):
+    """
+    Per-recipient progress of a newsletter run (NewsletterRecurringData),
+    so that an interrupted send can resume where it stopped.
+    """
+    STATUS_CHOICES = (
+        ('sent', _('Sent')),
+        ('failed', _('Failed')),
+    )
+    run = models.ForeignKey(NewsletterRecurringData, related_name="delivery_records", on_delete=models.CASCADE)
+    email = models.CharField(max_length=255)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='sent')
+    create_dt = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('run', 'email')
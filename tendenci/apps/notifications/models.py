@@ -343,7 +343,7 @@ def send_emails(emails, label, extra_context=None, on_site=True):
     )
     """
     # exclude blocked emails
-    emails = [e for e in emails if not Email.is_blocked(e)]
+    emails = Email.filter_blocked(emails)
     if not emails:
         return
     
@@ -1,6 +1,7 @@
 import logging
 
 from django.conf import settings
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponseRedirect
 from django.contrib.auth.decorators import login_required
@@ -15,6 +16,8 @@ from tendenci.apps.payments.authorizenet.utils import prepare_authorizenet_sim_f
 from tendenci.apps.invoices.models import Invoice
 from tendenci.apps.base.http import Http403
 from tendenci.apps.event_logs.models import EventLog
+from tendenci.apps.events.inventory import (SeatsUnavailable, clear_seats_cache,
+                                            hold_registration_seats, lock_seats)
 from tendenci.apps.site_settings.utils import get_setting
 
 
@@ -38,27 +41,14 @@ def pay_online(request, invoice_id, guid="", merchant_account=None, template_nam
     if obj.__class__.__name__ == 'Registration':
         block_message = ''
         event = obj.event
-        spots_available = event.get_spots_status()[1]
-        if not spots_available:
-            block_message = gettext('No seats available for this event. Please cancel your registration or contact event organizer.')
-        else:
-            pricings = {}
-            for registrant in obj.registrant_set.filter(cancel_dt__isnull=True):
-                pricing = registrant.pricing
-                if pricing.registration_cap:
-                    if pricing not in pricings:
-                        pricings[pricing] = 1
-                    else:
-                        pricings[pricing] += 1
-            for p in pricings:
-                price_spots_available = p.spots_available()
-                if price_spots_available < pricings[p]:
-                    if not price_spots_available:
-                        block_message += gettext('No seats available for price option "{}". '.format(p.title))
-                    else:
-                        block_message += gettext('The available seats for price option "{}" is not enough for this registration. '.format(p.title))
-            if block_message:
-                block_message += gettext('Please cancel your registration and re-register at a different price.')
+        # checked with the seats locked, and the seats held again while paying
+        try:
+            with transaction.atomic():
+                lock_seats(event)
+                hold_registration_seats(obj, check=True)
+        except SeatsUnavailable as e:
+            block_message = '%s %s' % (e, gettext('Please cancel your registration or contact event organizer.'))
+        clear_seats_cache(event.pk)
 
         if block_message:
             messages.add_message(request, messages.ERROR, block_message)
@@ -1,10 +1,8 @@
-from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User, Permission
 from django.db.models.base import Model
 from django.contrib.auth.backends import ModelBackend
 
-from tendenci.apps.perms.object_perms import ObjectPermission
-from tendenci.apps.perms.utils import can_view
+from tendenci.apps.perms.utils import get_permission_context
 
 
 class ObjectPermBackend(ModelBackend):
@@ -68,44 +66,16 @@ class ObjectPermBackend(ModelBackend):
             user_obj._perm_cache.update(self.get_group_permissions(user_obj))
         return user_obj._perm_cache
 
-    def get_group_object_permissions(self, user_obj, obj):
-        if not obj.pk:
-            return []
-        app_label = obj._meta.app_label
-        user_obj_attr = '_%s_%d_group_object_perm_cache' % (
-            app_label,
-            obj.pk
-        )
-        if not hasattr(user_obj, user_obj_attr):
-            content_type = ContentType.objects.get_for_model(obj)
-            filters = {
-               'group__members': user_obj,
-               'content_type': content_type,
-               'object_id': obj.pk
-            }
-            group_object_perms = ObjectPermission.objects.filter(**filters)
-            user_obj._group_object_perm_cache = set([u"%s.%s.%s" % (p.object_id, p.content_type.app_label, p.codename) for p in group_object_perms])
-        return user_obj._group_object_perm_cache
-
     def get_all_object_permissions(self, user_obj, obj):
+        """
+        Returns the object permissions of the user and its groups on obj,
+        from the permission context of the user (see get_permission_context).
+        """
         if not obj.pk:
             return []
         app_label = obj._meta.app_label
-        user_obj_attr = '_%s_%d_object_perm_cache' % (
-            app_label,
-            obj.pk
-        )
-        if not hasattr(user_obj, user_obj_attr):
-            content_type = ContentType.objects.get_for_model(obj)
-            filters = {
-                'content_type': content_type,
-                'object_id': obj.pk,
-                'user': user_obj
-            }
-            perms = ObjectPermission.objects.filter(**filters)
-            user_obj._object_perm_cache = set([u"%s.%s.%s" % (p.object_id, p.content_type.app_label, p.codename) for p in perms])
-            user_obj._object_perm_cache.update(self.get_group_object_permissions(user_obj, obj))
-        return user_obj._object_perm_cache
+        codenames = get_permission_context(user_obj).get_object_perms(obj)
+        return set([u"%s.%s.%s" % (obj.pk, app_label, codename) for codename in codenames])
 
     def has_perm(self, user, perm, obj=None):
         # check codename, return false if its a malformed codename
@@ -167,21 +137,6 @@ class ObjectPermBackend(ModelBackend):
         if not isinstance(obj, Model):
             return False
 
-        # lets check the search index for view permissions
-        # before we ever hit the database, faster
-        if 'view' in perm:
-            try:  # test for an index and make the query
-                from haystack import connections
-                site = connections['default'].unified_index()
-
-                site.get_index(obj.__class__)
-                if can_view(user, obj):
-                    return True
-            except AssertionError:
-                raise
-            except:
-                pass
-
         # check the permissions on the object level of groups or user
         perm = '%s.%s' % (obj.pk, perm)
         if perm in self.get_all_object_permissions(user, obj):
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from threading import local
+
+# pending versions are written every BULK_SAVE_FLUSH_SIZE versions
+BULK_SAVE_FLUSH_SIZE = 500
+
+_state = local()
+
+
+def is_bulk_save():
+    """
+    Returns True inside a bulk_save() block.
+    """
+    return getattr(_state, 'depth', 0) > 0
+
+
+def add_version(version):
+    """
+    Adds an unsaved Version, written at the end of the bulk_save() block.
+    Saved right away outside of the block (e.g. when the transaction of the
+    object saved in the block commits after the end of the block).
+    """
+    if not is_bulk_save():
+        version.save()
+        return
+    _state.versions.append(version)
+    if len(_state.versions) >= BULK_SAVE_FLUSH_SIZE:
+        flush_versions()
+
+
+def flush_versions():
+    from tendenci.apps.versions.models import Version
+
+    versions, _state.versions = _state.versions, []
+    if versions:
+        Version.objects.bulk_create(versions, batch_size=BULK_SAVE_FLUSH_SIZE)
+
+
+@contextmanager
+def bulk_save():
+    """
+    Bulk-save mode for TendenciBaseModel, for jobs saving many objects.
+
+    Within the block, the original state of the objects is captured when
+    they are loaded instead of being fetched again on save, and their
+    versions and event logs are written in bulk at the end of the block.
+
+    Usage:
+        with bulk_save():
+            for membership in MembershipDefault.objects.filter(...):
+                membership.status_detail = 'expired'
+                membership.save()
+
+    Only the objects loaded within the block benefit from the captured
+    state; the others are fetched on save as usual. The versions pending
+    when the block exits with an exception are dropped.
+    """
+    from tendenci.apps.event_logs.buffer import event_log_buffer
+
+    if not is_bulk_save():
+        _state.versions = []
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    except BaseException:
+        _state.depth -= 1
+        if _state.depth == 0:
+            # don't write anything on the way out, the transaction may be broken
+            _state.versions = []
+        raise
+    _state.depth -= 1
+    if _state.depth == 0:
+        flush_versions()
+        event_log_buffer.flush()
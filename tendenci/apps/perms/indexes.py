@@ -1,6 +1,8 @@
 from haystack import indexes
 
 from django.conf import settings
+from django.contrib.contenttypes.fields import GenericRelation
+from django.db.models import Prefetch
 
 from tendenci.apps.perms.object_perms import ObjectPermission
 #from tendenci.apps.search.indexes import CustomSearchIndex
@@ -40,59 +42,40 @@ class TendenciBaseSearchIndex(indexes.SearchIndex):
     def get_model(self):
         return None
 
-    def prepare_allow_anonymous_view(self, obj):
-        if is_whoosh():
+    def __init__(self, *args, **kwargs):
+        super(TendenciBaseSearchIndex, self).__init__(*args, **kwargs)
+        # checked once per index rather than per field and object
+        self.booleans_as_int = is_whoosh()
+
+    def prepare_boolean(self, value):
+        """
+        Whoosh stores the booleans as integers.
+        """
+        if self.booleans_as_int:
             try:
-                temp = int(obj.allow_anonymous_view)
+                temp = int(value)
             except TypeError:
                 temp = 0
             return temp
-        return obj.allow_anonymous_view
+        return value
+
+    def prepare_allow_anonymous_view(self, obj):
+        return self.prepare_boolean(obj.allow_anonymous_view)
 
     def prepare_allow_user_view(self, obj):
-        if is_whoosh():
-            try:
-                temp = int(obj.allow_user_view)
-            except TypeError:
-                temp = 0
-            return temp
-        return obj.allow_user_view
+        return self.prepare_boolean(obj.allow_user_view)
 
     def prepare_allow_member_view(self, obj):
-        if is_whoosh():
-            try:
-                temp = int(obj.allow_member_view)
-            except TypeError:
-                temp = 0
-            return temp
-        return obj.allow_member_view
+        return self.prepare_boolean(obj.allow_member_view)
 
     def prepare_allow_user_edit(self, obj):
-        if is_whoosh():
-            try:
-                temp = int(obj.allow_user_edit)
-            except TypeError:
-                temp = 0
-            return temp
-        return obj.allow_user_edit
+        return self.prepare_boolean(obj.allow_user_edit)
 
     def prepare_allow_member_edit(self, obj):
-        if is_whoosh():
-            try:
-                temp = int(obj.allow_member_edit)
-            except TypeError:
-                temp = 0
-            return temp
-        return obj.allow_member_edit
+        return self.prepare_boolean(obj.allow_member_edit)
 
     def prepare_status(self, obj):
-        if is_whoosh():
-            try:
-                temp = int(obj.status)
-            except TypeError:
-                temp = 0
-            return temp
-        return obj.status
+        return self.prepare_boolean(obj.status)
 
     def prepare_order(self, obj):
         return obj.create_dt
@@ -100,6 +83,36 @@ class TendenciBaseSearchIndex(indexes.SearchIndex):
     def get_updated_field(self):
         return 'update_dt'
 
+    def get_perms_relation(self):
+        """
+        Returns the name of the GenericRelation of the model
+        to ObjectPermission, or None if it has none.
+        """
+        model = self.get_model()
+        if model is None:
+            return None
+        for field in model._meta.private_fields:
+            if isinstance(field, GenericRelation) and field.related_model is ObjectPermission:
+                return field.name
+        return None
+
+    def build_queryset(self, using=None, start_date=None, end_date=None):
+        """
+        Loads the view permissions of the objects along with them, with one
+        query per batch of objects indexed instead of one query per object.
+        """
+        queryset = super(TendenciBaseSearchIndex, self).build_queryset(
+                        using=using, start_date=start_date, end_date=end_date)
+        relation = self.get_perms_relation()
+        if relation:
+            model = self.get_model()
+            codename = 'view_%s' % model._meta.model_name
+            queryset = queryset.prefetch_related(
+                Prefetch(relation,
+                         queryset=ObjectPermission.objects.filter(codename=codename),
+                         to_attr='index_view_perms'))
+        return queryset
+
     def prepare_users_can_view(self, obj):
         """
         This needs to be overwritten if 'view' permission label does not follow the standard convention:
@@ -112,4 +125,8 @@ class TendenciBaseSearchIndex(indexes.SearchIndex):
         This needs to be overwritten if 'view' permission label does not follow the standard convention:
         (app_label).view_(module_name)
         """
+        perms = getattr(obj, 'index_view_perms', None)
+        if perms is not None:
+            # loaded by build_queryset
+            return [perm.group_id for perm in perms if perm.group_id]
         return ObjectPermission.objects.groups_with_perms('%s.view_%s' % (obj._meta.app_label, obj._meta.model_name), obj)
@@ -1,3 +1,5 @@
+from functools import partial
+
 from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils.translation import gettext_lazy as _
@@ -9,6 +11,7 @@ from tendenci.apps.entities.models import Entity
 from tendenci.apps.versions.models import Version
 from tendenci.apps.categories.models import Category
 from tendenci.apps.site_settings.utils import get_setting
+from tendenci.apps.perms.bulk import is_bulk_save, add_version
 
 # Abstract base class for authority fields
 class TendenciBaseModel(models.Model):
@@ -134,7 +137,29 @@ class TendenciBaseModel(models.Model):
     class Meta:
         abstract = True
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(TendenciBaseModel, cls).from_db(db, field_names, values)
+        if is_bulk_save():
+            # keep the original state, so that saving
+            # doesn't need to fetch the object again
+            instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def get_original(self):
+        """
+        Returns the object as currently stored, from the state captured
+        when it was loaded in bulk-save mode if any.
+        """
+        loaded_values = getattr(self, '_loaded_values', None)
+        if loaded_values and len(loaded_values) == len(self._meta.concrete_fields):
+            return self.__class__.from_db(self._state.db, list(loaded_values),
+                                          list(loaded_values.values()))
+        return self.__class__.objects.get(pk=self.pk)
+
     def save(self, *args, **kwargs):
+        bulk = is_bulk_save()
+        version = None
         with transaction.atomic():
             if self.pk:
                 log = kwargs.get('log', True)
@@ -144,7 +169,11 @@ class TendenciBaseModel(models.Model):
 
                 # Save a version of this content.
                 try:
-                    Version.objects.save_version(self.__class__.objects.get(pk=self.pk), self)
+                    if bulk:
+                        # queued once saved, see below
+                        version = Version.objects.save_version(self.get_original(), self, commit=False)
+                    else:
+                        Version.objects.save_version(self.__class__.objects.get(pk=self.pk), self)
                 except Exception:
                     pass
                     #print("version error: ", e)
@@ -153,6 +182,17 @@ class TendenciBaseModel(models.Model):
                 kwargs.pop('log')
             super(TendenciBaseModel, self).save(*args, **kwargs)
 
+            if version:
+                # written at the end of the bulk_save() block,
+                # if the transaction of the save commits
+                transaction.on_commit(partial(add_version, version))
+
+        if bulk:
+            # the saved state is the original state of the next save
+            self._loaded_values = dict((f.attname, self.__dict__[f.attname])
+                                       for f in self._meta.concrete_fields
+                                       if f.attname in self.__dict__)
+
     def delete(self, *args, **kwargs):
         if self.pk:
             log = kwargs.get('log', True)
@@ -0,0 +1,64 @@
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from tendenci.apps.jobs.models import JobPricing
+from tendenci.apps.perms.object_perms import ObjectPermission
+from tendenci.apps.perms.utils import filter_viewable
+from tendenci.apps.profiles.models import Profile
+
+
+class FilterViewableTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('viewer', 'viewer@example.com', 'secret')
+        Profile.objects.create_profile(self.user)
+        self.creator = User.objects.create_user('creator', 'creator@example.com', 'secret')
+        Profile.objects.create_profile(self.creator)
+        self.content_type = ContentType.objects.get_for_model(JobPricing)
+
+    def create_pricings(self, num):
+        """
+        Creates num pricings, every other one viewable by the user through
+        an object permission. Returns the viewable ones.
+        """
+        viewable = []
+        for i in range(num):
+            pricing = JobPricing.objects.create(duration=i + 1,
+                                                creator=self.creator,
+                                                owner=self.creator)
+            if i % 2 == 0:
+                ObjectPermission.objects.create(user=self.user,
+                                                content_type=self.content_type,
+                                                codename='view_jobpricing',
+                                                object_id=pricing.pk)
+                viewable.append(pricing)
+        return viewable
+
+    def count_queries(self, pricings):
+        # a fresh user, without the permissions cached on it
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+        with CaptureQueriesContext(connection) as queries:
+            filter_viewable(user, pricings, 'jobs.view_jobpricing')
+        return len(queries)
+
+    def test_filter_viewable(self):
+        viewable = self.create_pricings(6)
+        pricings = JobPricing.objects.order_by('duration')
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(filter_viewable(user, pricings, 'jobs.view_jobpricing'), viewable)
+        # the pricings created by the user are viewable too
+        own_pricing = JobPricing.objects.create(duration=10, creator=self.user, owner=self.user)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(filter_viewable(user, pricings, 'jobs.view_jobpricing'),
+                         viewable + [own_pricing])
+
+    def test_filter_viewable_queries(self):
+        self.create_pricings(20)
+        pricings = list(JobPricing.objects.order_by('duration'))
+
+        num_queries = self.count_queries(pricings[:2])
+        self.assertEqual(self.count_queries(pricings), num_queries)
@@ -11,6 +11,69 @@ from tendenci.apps.perms.object_perms import ObjectPermission
 
 PUBLIC_FILTER = {'status':True,'status_detail':"active",'allow_anonymous_view':True}
 
+
+class PermissionContext(object):
+    """
+    The group ids and the object permissions of a user, loaded once and
+    kept on the user object, so for the request for request.user.
+
+    The object permissions are loaded for a batch of objects at once
+    with load_object_perms, or per object when checked otherwise.
+    """
+    def __init__(self, user):
+        self.user = user
+        self._group_ids = None
+        # the codenames of the user and its groups by (content type id, object id)
+        self.object_perms = {}
+
+    @property
+    def group_ids(self):
+        if self._group_ids is None:
+            self._group_ids = list(self.user.group_member.values_list('group_id', flat=True))
+        return self._group_ids
+
+    def load_object_perms(self, objects):
+        """
+        Loads the object permissions of the user on the objects not
+        loaded yet, with one query per model.
+        """
+        ids_by_content_type = {}
+        for obj in objects:
+            if not obj.pk:
+                continue
+            content_type = ContentType.objects.get_for_model(obj)
+            if (content_type.id, obj.pk) not in self.object_perms:
+                ids_by_content_type.setdefault(content_type.id, set()).add(obj.pk)
+
+        for content_type_id, object_ids in ids_by_content_type.items():
+            for object_id in object_ids:
+                self.object_perms[(content_type_id, object_id)] = set()
+            perms = ObjectPermission.objects.filter(content_type_id=content_type_id,
+                                                    object_id__in=object_ids
+                                    ).filter(Q(user=self.user) | Q(group_id__in=self.group_ids)
+                                    ).values_list('object_id', 'codename')
+            for object_id, codename in perms:
+                self.object_perms[(content_type_id, object_id)].add(codename)
+
+    def get_object_perms(self, obj):
+        """
+        Returns the codenames of the permissions of the user on obj.
+        """
+        if not obj.pk:
+            return set()
+        key = (ContentType.objects.get_for_model(obj).id, obj.pk)
+        if key not in self.object_perms:
+            self.load_object_perms([obj])
+        return self.object_perms[key]
+
+
+def get_permission_context(user):
+    context = getattr(user, '_permission_context', None)
+    if context is None:
+        context = PermissionContext(user)
+        user._permission_context = context
+    return context
+
 def set_perm_bits(request, form, instance):
     """
     Sets object-level permissions bits for a model instance
@@ -162,6 +225,26 @@ def has_perm(user, perm, obj=None):
     return user.has_perm(perm, obj)
 
 
+def filter_viewable(user, objects, perm=None):
+    """
+    Returns the objects the user can view, e.g. for the rows of a list page.
+    The object permissions are loaded for all the objects at once, so the
+    number of queries does not depend on the number of objects.
+
+    perm defaults to the view permission of the model of each object.
+    """
+    objects = list(objects)
+    if user.is_authenticated and not user.profile.is_superuser:
+        get_permission_context(user).load_object_perms(objects)
+
+    viewable = []
+    for obj in objects:
+        obj_perm = perm or '%s.view_%s' % (obj._meta.app_label, obj._meta.model_name)
+        if has_perm(user, obj_perm, obj):
+            viewable.append(obj)
+    return viewable
+
+
 def has_view_perm(user, perm, obj=None):
     """
     Method used in details views to check permissions faster on a single object.
@@ -227,7 +310,7 @@ def get_query_filters(user, perm, **kwargs):
                 status_detail_q = Q(status_detail__in=['active', 'published'])
 
                 if perms_field:
-                    group_ids = [int(g.group.id) for g in user.group_member.select_related('group')]
+                    group_ids = get_permission_context(user).group_ids
                     group_q = Q(perms__group__in=group_ids)
 
                 creator_perm_q = Q(creator=user)
@@ -242,7 +325,7 @@ def get_query_filters(user, perm, **kwargs):
                 status_detail_q = Q(status_detail__in=['active', 'published'])
 
                 if perms_field:
-                    group_ids = [int(g.group.id) for g in user.group_member.select_related('group')]
+                    group_ids = get_permission_context(user).group_ids
                     group_q = Q(perms__group__in=group_ids)
 
                 creator_perm_q = Q(creator=user)
@@ -272,10 +355,9 @@ def get_groups_query_filters(user, **kwargs):
             group_q = Q()
             perm = 'change_group'
             # groups user is member of
-            group_ids = [int(g.group.id) for g in user.group_member.select_related('group')]
+            group_ids = get_permission_context(user).group_ids
 
-            content_type = ContentType.objects.get(
-                    app_label=Group._meta.app_label, model=Group._meta.model_name)
+            content_type = ContentType.objects.get_for_model(Group)
             # get a list of groups that the user can change
             group_ids_with_perm = ObjectPermission.objects.filter(
                             codename=perm,
@@ -1 +1,3 @@
 PHOTO_PRE_KEY = "photo"
+# cache tag of the resized images of a photo, e.g. photos.12
+PHOTO_CACHE_TAG = "photos.%s"
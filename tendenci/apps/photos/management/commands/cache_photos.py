@@ -1,22 +1,22 @@
-
 from django.core.management.base import BaseCommand
 
 
 class Command(BaseCommand):
     help = ('Loops through all of the photos to create a cached version.')
 
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1,
+            help='Number of worker processes rendering the photos')
+        parser.add_argument('--force', action='store_true', default=False,
+            help='Regenerate the sizes already in storage')
+
     def handle(self, *args, **options):
         from tendenci.apps.photos.models import Image
-        from tendenci.apps.photos.utils.caching import cache_photo_size
-
-        for photo in Image.objects.all().order_by('-pk'):
-
-            cache_kwargs_list = []
-            cache_kwargs_list.append({"id": photo.pk, "size": "422x700", "constrain": True})
-            cache_kwargs_list.append({"id": photo.pk, "size": "102x78", "crop": True})
-            cache_kwargs_list.append({"id": photo.pk, "size": "640x640", "constrain": True})
-
-            for cache_kwargs in cache_kwargs_list:
-                cache_photo_size(**cache_kwargs)
-
-            print(photo.pk)
+        from tendenci.apps.photos.utils.pregenerate import pregenerate_photo_sizes
+
+        photos = Image.objects.all().prefetch_related('photoset').order_by('-pk')
+        pregenerate_photo_sizes(photos,
+                                processes=options['processes'],
+                                force=options['force'],
+                                verbosity=options['verbosity'],
+                                stdout=self.stdout)
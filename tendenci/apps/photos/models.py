@@ -21,7 +21,6 @@ from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.core.exceptions import SuspiciousOperation
 from django.conf import settings
-from django.core.cache import cache
 from django.utils.encoding import smart_str, force_str
 from functools import partial as curry
 from django.utils.translation import gettext_lazy as _
@@ -37,7 +36,9 @@ from tendenci.apps.perms.models import TendenciBaseModel
 from tendenci.apps.perms.object_perms import ObjectPermission
 from tendenci.apps.perms.utils import get_query_filters
 from tendenci.apps.base.fields import DictField
+from tendenci.apps.base.cache import invalidate_cache_tag
 from tendenci.apps.base.utils import apply_orientation, correct_filename
+from tendenci.apps.photos.cache import PHOTO_CACHE_TAG
 from tendenci.apps.photos.managers import PhotoManager, PhotoSetManager
 from tendenci.apps.meta.models import Meta as MetaTags
 from tendenci.apps.photos.module_meta import PhotoMeta
@@ -621,11 +622,8 @@ class PhotoSet(OrderingBaseModel, TendenciBaseModel):
         if not self.is_public():
             for photo in Image.objects.filter(photoset=self.pk):
                 set_s3_file_permission(photo.image.file, public=False)
-                cache_set = cache.get("photos_cache_set.%s" % photo.pk)
-                if cache_set is not None:
-                    # TODO remove cached images
-                    cache.delete_many(cache.get("photos_cache_set.%s" % photo.pk))
-                    cache.delete("photos_cache_set.%s" % photo.pk)
+                # TODO remove cached images
+                invalidate_cache_tag(PHOTO_CACHE_TAG % photo.pk)
 
     def get_default_cover_photo_small(self):
         return static('images/default-photo-small.jpg')
@@ -794,11 +792,8 @@ class Image(OrderingBaseModel, ImageModel, TendenciBaseModel):
             if hasattr(settings, 'USE_S3_STORAGE') and settings.USE_S3_STORAGE \
                 and self.image and default_storage.exists(self.image.name):
                 set_s3_file_permission(self.image.file, public=False)
-            cache_set = cache.get("photos_cache_set.%s" % self.pk)
-            if cache_set is not None:
-                # TODO remove cached images
-                cache.delete_many(cache.get("photos_cache_set.%s" % self.pk))
-                cache.delete("photos_cache_set.%s" % self.pk)
+            # TODO remove cached images
+            invalidate_cache_tag(PHOTO_CACHE_TAG % self.pk)
 
         
 
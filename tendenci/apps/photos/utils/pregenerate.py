@@ -0,0 +1,199 @@
+import time
+from io import BytesIO
+from multiprocessing import Pool
+
+from PIL import Image as PILImage
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections
+from django.urls import reverse
+
+from tendenci.apps.base.utils import image_rescale, apply_orientation
+from tendenci.apps.files.utils import aspect_ratio, validate_image_size, generate_image_cache_key
+from tendenci.apps.base.cache import get_cache_tag_generation
+from tendenci.apps.photos.cache import PHOTO_PRE_KEY, PHOTO_CACHE_TAG
+
+# The sizes used on the photo set and batch edit pages. They can be
+# overridden with the PHOTOS_PREGENERATE_SIZES setting.
+DEFAULT_PREGENERATE_SIZES = [
+    {"size": "422x700", "constrain": True},
+    {"size": "102x78", "crop": True},
+    {"size": "640x640", "constrain": True},
+]
+
+
+def get_pregenerate_sizes():
+    return getattr(settings, 'PHOTOS_PREGENERATE_SIZES', DEFAULT_PREGENERATE_SIZES)
+
+
+def get_size_targets(photo_id, file_name, sizes):
+    """
+    Returns the description of the cached files of a photo, one per size:
+    (size, crop, constrain, quality, file path in storage, cache key, cached url).
+    These are the same files and keys photo_size and cache_photo_size use.
+    """
+    # the keys are tagged as with tagged_cache_key, reading the generation once
+    generation = get_cache_tag_generation(PHOTO_CACHE_TAG % photo_id)
+    targets = []
+    for options in sizes:
+        size = options['size']
+        crop = options.get('crop', False)
+        constrain = options.get('constrain', False)
+        quality = options.get('quality', 90)
+
+        args = [photo_id, size]
+        if crop:
+            args.append("crop")
+        if constrain:
+            args.append("constrain")
+        if quality:
+            args.append(quality)
+        request_path = reverse('photo.size', args=args)
+
+        file_path = 'cached%s%s' % (request_path, file_name)
+        cache_key = generate_image_cache_key(file=str(photo_id), size=size, pre_key=PHOTO_PRE_KEY,
+                                             crop=crop, unique_key=str(photo_id), quality=quality,
+                                             constrain=constrain)
+        cache_key = '%s.g%s' % (cache_key, generation)
+        if settings.USE_S3_STORAGE:
+            cached_url = file_path
+        else:
+            cached_url = "%s%s" % (settings.MEDIA_URL, file_path)
+        targets.append((size, crop, constrain, quality, file_path, cache_key, cached_url))
+    return targets
+
+
+def render_photo_sizes(task):
+    """
+    Renders all the missing sizes of one photo from a single decode of
+    the original. Runs in the worker processes, without database access.
+
+    task is a tuple of (photo id, original file name, targets, force).
+    Returns a tuple of (photo id, [(cache key, cached url)], number of
+    images generated, error or None).
+    """
+    photo_id, image_name, targets, force = task
+
+    if force:
+        missing = list(targets)
+    else:
+        missing = [t for t in targets if not default_storage.exists(t[4])]
+    done = [(t[5], t[6]) for t in targets if t not in missing]
+    if not missing:
+        return photo_id, done, 0, None
+
+    try:
+        with default_storage.open(image_name, 'rb') as f:
+            image = PILImage.open(BytesIO(f.read()))
+            # the target sizes are computed on the stored dimensions,
+            # as photo.image_dimensions() does
+            original_size = image.size
+
+            sizes = []
+            for target in missing:
+                size, crop, constrain = target[0], target[1], target[2]
+                new_size = [int(s) for s in size.split('x')]
+                new_size = aspect_ratio(original_size, new_size, constrain)
+                sizes.append(validate_image_size(new_size))
+
+            if image.format == 'JPEG':
+                # let the decoder downscale by a power of 2 while keeping both
+                # dimensions larger than the largest size needed (cropping
+                # included), much faster than decoding the full image
+                largest = max(max(s) for s in sizes)
+                image.draft('RGB', (largest, largest))
+
+            image = apply_orientation(image)
+            if image.mode != "RGB":
+                image = image.convert("RGB")
+            image.load()
+    except Exception as e:
+        return photo_id, done, 0, str(e)
+
+    generated = 0
+    for target, new_size in zip(missing, sizes):
+        crop, quality, file_path, cache_key, cached_url = target[1], target[3], target[4], target[5], target[6]
+        if crop:
+            resized = image_rescale(image, new_size)
+        else:
+            resized = image.resize(new_size, PILImage.LANCZOS, reducing_gap=3.0)
+
+        output = BytesIO()
+        resized.save(output, "JPEG", quality=quality)
+        if force and default_storage.exists(file_path):
+            default_storage.delete(file_path)
+        default_storage.save(file_path, ContentFile(output.getvalue()))
+        output.close()
+        generated += 1
+        done.append((cache_key, cached_url))
+
+    image.close()
+    return photo_id, done, generated, None
+
+
+def get_photo_tasks(photos, sizes, force=False):
+    """
+    Yields the tasks of the public photos (only their cached sizes are
+    saved to storage).
+    """
+    for photo in photos:
+        if not photo.image:
+            continue
+        if not (photo.is_public_photo() and photo.is_public_photoset()):
+            continue
+        targets = get_size_targets(photo.pk, photo.image_filename(), sizes)
+        yield (photo.pk, photo.image.name, targets, force)
+
+
+def pregenerate_photo_sizes(photos, sizes=None, processes=1, force=False, verbosity=1, stdout=None):
+    """
+    Generates the cached sizes of the photos and registers them in the
+    cache, so that photo_size redirects to them right away.
+
+    With processes > 1 the photos are rendered by a pool of worker
+    processes. Sizes already in storage are skipped unless force is True.
+    Returns a dict of statistics.
+    """
+    sizes = sizes or get_pregenerate_sizes()
+    tasks = get_photo_tasks(photos, sizes, force=force)
+    stats = {'photos': 0, 'generated': 0, 'errors': 0}
+    start = time.time()
+
+    def report(final=False):
+        elapsed = time.time() - start
+        rate = stats['generated'] / elapsed if elapsed else 0
+        if verbosity > 0 and stdout:
+            stdout.write('%s %d photos, %d images generated, %d errors, %.1f images/sec' % (
+                         'Done:' if final else 'Processed', stats['photos'],
+                         stats['generated'], stats['errors'], rate))
+
+    def collect(result):
+        photo_id, done, generated, error = result
+        stats['photos'] += 1
+        stats['generated'] += generated
+        if error:
+            stats['errors'] += 1
+            if verbosity > 1 and stdout:
+                stdout.write('Photo %s: %s' % (photo_id, error))
+        if done:
+            cache.set_many(dict(done))
+        if stats['photos'] % 100 == 0:
+            report()
+
+    if processes > 1:
+        tasks = list(tasks)
+        # the worker processes must not share the database connections
+        connections.close_all()
+        with Pool(processes) as pool:
+            for result in pool.imap_unordered(render_photo_sizes, tasks, chunksize=4):
+                collect(result)
+    else:
+        for task in tasks:
+            collect(render_photo_sizes(task))
+
+    stats['elapsed'] = time.time() - start
+    report(final=True)
+    return stats
@@ -37,13 +37,15 @@ from tendenci.apps.files.utils import get_image, aspect_ratio, generate_image_ca
 from tendenci.apps.user_groups.models import Group
 # from djcelery.models import TaskMeta
 
-from tendenci.apps.photos.cache import PHOTO_PRE_KEY
+from tendenci.apps.base.cache import tagged_cache_key
+from tendenci.apps.photos.cache import PHOTO_PRE_KEY, PHOTO_CACHE_TAG
 #from tendenci.apps.photos.search_indexes import PhotoSetIndex
 from tendenci.apps.photos.models import Image, PhotoSet, AlbumCover, License, PhotoCategory
 from tendenci.apps.photos.forms import (
     PhotoEditForm, PhotoSetForm, PhotoBatchEditForm,
     PhotoForm, PhotoBaseFormSet,PhotoSetSearchForm)
 from tendenci.apps.photos.utils import get_privacy_settings
+from tendenci.apps.photos.utils.caching import prefetch_photo_urls
 from tendenci.apps.photos.tasks import ZipPhotoSetTask
 from tendenci.apps.base.utils import apply_orientation
 
@@ -230,6 +232,7 @@ def photo_size(request, id, size, crop=False, quality=90, download=False, constr
         quality = int(quality)
 
     cache_key = generate_image_cache_key(file=id, size=size, pre_key=PHOTO_PRE_KEY, crop=crop, unique_key=id, quality=quality, constrain=constrain)
+    cache_key = tagged_cache_key(cache_key, PHOTO_CACHE_TAG % id)
     cached_image = cache.get(cache_key)
     if cached_image:
         if settings.USE_S3_STORAGE:
@@ -283,14 +286,6 @@ def photo_size(request, id, size, crop=False, quality=90, download=False, constr
         else:
             full_file_path = "%s%s" % (settings.MEDIA_URL, file_path)
             cache.set(cache_key, full_file_path)
-        cache_group_key = "photos_cache_set.%s" % photo.pk
-        cache_group_list = cache.get(cache_group_key)
-
-        if cache_group_list is None:
-            cache.set(cache_group_key, [cache_key])
-        else:
-            cache_group_list += [cache_key]
-            cache.set(cache_group_key, cache_group_list)
 
     return response
 
@@ -806,6 +801,11 @@ def photos_batch_edit(request, photoset_id=0, template_name="photos/batch-edit.h
 
     default_group_id = Group.objects.get_initial_group_id()
 
+    # the image urls of the template, with one cache lookup per size
+    photos = [photo_form.instance for photo_form in photo_formset.forms]
+    prefetch_photo_urls(photos, size='422x700', constrain=True)
+    prefetch_photo_urls(photos, size='102x78', crop=True)
+
     return render_to_resp(request=request, template_name=template_name, context={
         "photo_formset": photo_formset,
         "photo_set": photo_set,
@@ -0,0 +1,67 @@
+import time
+from io import StringIO
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Exports a number of synthetic profiles and reports the throughput
+    of the profiles export. The synthetic users and profiles are created
+    in a transaction that is rolled back at the end.
+
+    Example: python manage.py benchmark_profile_export --profiles=10000
+    """
+    help = "Report the throughput of the profiles export"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profiles', type=int, default=5000,
+            help='The number of synthetic profiles to export')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+            help='The number of profiles loaded per query')
+        parser.add_argument('--export-fields', default='all_fields',
+            choices=['all_fields', 'main_fields'],
+            help='The fields to export')
+
+    def handle(self, *args, **options):
+        from django.contrib.auth.models import User
+        from django.db import transaction
+        from tendenci.apps.profiles.models import Profile
+        from tendenci.apps.profiles.utils import get_export_field_lists, write_profiles_csv
+
+        num_profiles = options['profiles']
+        prefix = 'benchmark_export_%d_' % int(time.time())
+        user_field_list, profile_field_list = get_export_field_lists(options['export_fields'])
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username='%s%d' % (prefix, i),
+                     first_name='First%d' % i,
+                     last_name='Last%d' % i,
+                     email='%s%d@example.com' % (prefix, i))
+                for i in range(num_profiles)], batch_size=1000)
+            users = User.objects.filter(username__startswith=prefix)
+            Profile.objects.bulk_create([
+                Profile(user=user,
+                        company='Company %d' % user.pk,
+                        city='City',
+                        phone='555-0100',
+                        creator=user,
+                        creator_username=user.username,
+                        owner=user,
+                        owner_username=user.username)
+                for user in users], batch_size=1000)
+            profiles = Profile.objects.filter(user__username__startswith=prefix)
+
+            csvfile = StringIO()
+            start = time.time()
+            num_processed = write_profiles_csv(csvfile, profiles,
+                                               user_field_list, profile_field_list,
+                                               chunk_size=options['chunk_size'])
+            elapsed = time.time() - start
+
+            transaction.set_rollback(True)
+
+        print('%d profiles exported (%s, %d bytes) in %.2fs, %.1f rows/sec' % (
+              num_processed, options['export_fields'], len(csvfile.getvalue()),
+              elapsed, num_processed / elapsed if elapsed else 0))
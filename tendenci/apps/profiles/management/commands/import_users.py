@@ -24,6 +24,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         from tendenci.apps.profiles.models import UserImport, UserImportData
         from tendenci.apps.profiles.utils import ImportUsers
+        from tendenci.apps.perms.bulk import bulk_save
         from tendenci.apps.user_groups.models import GroupMembership
 
         import_id = options['import_id']
@@ -37,22 +38,24 @@ class Command(BaseCommand):
         if uimport.group_id and uimport.clear_group_membership:
             GroupMembership.objects.filter(group_id=uimport.group_id).delete()
 
-        for idata in data_list:
-            try:
-                imu.process_user(idata)
-            except Exception:
-                print(traceback.format_exc())
-
-            uimport.num_processed += 1
-
-            # save the status -----------------------------------------------
-            summary = 'insert:%d,update:%d,invalid:%d' % (
-                imu.summary_d['insert'],
-                imu.summary_d['update'],
-                imu.summary_d['invalid'],
-            )
-            uimport.summary = summary
-            uimport.save()
+        # versions and event logs are written in bulk
+        with bulk_save():
+            for idata in data_list:
+                try:
+                    imu.process_user(idata)
+                except Exception:
+                    print(traceback.format_exc())
+
+                uimport.num_processed += 1
+
+                # save the status -----------------------------------------------
+                summary = 'insert:%d,update:%d,invalid:%d' % (
+                    imu.summary_d['insert'],
+                    imu.summary_d['update'],
+                    imu.summary_d['invalid'],
+                )
+                uimport.summary = summary
+                uimport.save()
 
         uimport.status = 'completed'
         uimport.complete_dt = datetime.now()
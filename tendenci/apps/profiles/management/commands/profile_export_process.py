@@ -49,6 +49,7 @@ class Command(BaseCommand):
         process_export(
             export_fields=export_fields,
             identifier=identifier,
-            user_id=user_id)
+            user_id=user_id,
+            verbosity=int(options.get('verbosity', 1)))
 
         print('Profile export done %s.' % identifier)
@@ -8,9 +8,12 @@ from decimal import Decimal
 import dateutil.parser as dparser
 import pytz
 import csv
+from operator import attrgetter
 
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.urls import reverse
 from django.db.models import Q
@@ -245,7 +248,75 @@ def clean_username(username):
     return username
 
 
-def process_export(export_fields='all_fields', identifier=u'', user_id=0):
+def get_export_progress_key(identifier):
+    return '.'.join([settings.CACHE_PRE_KEY, 'profiles_export', str(identifier)])
+
+
+def get_export_progress(identifier):
+    """
+    Returns the progress of the profiles export, a dict of
+    num_processed and total, or None if unknown.
+    """
+    return cache.get(get_export_progress_key(identifier))
+
+
+def format_export_value(item):
+    if item:
+        if isinstance(item, datetime):
+            item = item.strftime('%Y-%m-%d %H:%M:%S')
+        elif isinstance(item, date):
+            item = item.strftime('%Y-%m-%d')
+        elif isinstance(item, time):
+            item = item.strftime('%H:%M:%S')
+        elif isinstance(item, str):
+            item = escape_csv(item)
+    return item
+
+
+def write_profiles_csv(csvfile, profiles, user_field_list, profile_field_list,
+                       chunk_size=2000, progress=None):
+    """
+    Writes the profiles to csvfile, loading them by chunks
+    (paginated by id) along with their user.
+    progress is called with the number of profiles written after each chunk.
+    Returns the number of profiles written.
+    """
+    field_list = user_field_list + profile_field_list
+    # the getters of the columns are built once,
+    # profile fields taking precedence over user fields
+    columns = []
+    for field_name in field_list:
+        if field_name in profile_field_list:
+            columns.append(attrgetter(field_name))
+        else:
+            columns.append(attrgetter('user.%s' % field_name))
+
+    csv_writer = csv.writer(csvfile)
+    csv_writer.writerow(field_list)
+
+    profiles = profiles.select_related('user', 'industry').order_by('pk')
+    num_processed = 0
+    last_pk = 0
+    while True:
+        chunk = list(profiles.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1].pk
+
+        csv_writer.writerows([format_export_value(get_value(profile)) for get_value in columns]
+                             for profile in chunk)
+
+        num_processed += len(chunk)
+        if progress:
+            progress(num_processed)
+
+    return num_processed
+
+
+def get_export_field_lists(export_fields='all_fields'):
+    """
+    Returns the user fields and the profile fields to export.
+    """
     from tendenci.apps.perms.models import TendenciBaseModel
 
     if export_fields == 'main_fields':
@@ -304,43 +375,38 @@ def process_export(export_fields='all_fields', identifier=u'', user_id=0):
         profile_field_list.remove('user')
         # append base fields at the end
 
-    field_list = user_field_list + profile_field_list
+    return user_field_list, profile_field_list
+
+
+def process_export(export_fields='all_fields', identifier=u'', user_id=0, verbosity=0):
+    user_field_list, profile_field_list = get_export_field_lists(export_fields)
 
     identifier = identifier or int(ttime.time())
+    # the temp file marks the export as in progress (see profile_export_status);
+    # the rows are written directly to the export file
     file_name_temp = 'export/profiles/%s_temp.csv' % identifier
-
-    with default_storage.open(file_name_temp, 'w') as csvfile:
-        csv_writer = csv.DictWriter(csvfile, fieldnames=field_list)
-        csv_writer.writeheader()
-
-        profiles = Profile.objects.all()
-        for profile in profiles:
-            p_user = profile.user
-            row_dict = {}
-            for field_name in field_list:
-                if field_name in profile_field_list:
-                    item = getattr(profile, field_name)
-                elif field_name in user_field_list:
-                    item = getattr(p_user, field_name)
-                else:
-                    item = ''
-                if item:
-                    if isinstance(item, datetime):
-                        item = item.strftime('%Y-%m-%d %H:%M:%S')
-                    elif isinstance(item, date):
-                        item = item.strftime('%Y-%m-%d')
-                    elif isinstance(item, time):
-                        item = item.strftime('%H:%M:%S')
-                    elif isinstance(item, str):
-                        item = escape_csv(item)
-                row_dict[field_name] = item
-            csv_writer.writerow(row_dict)
-
-    # rename the file name
     file_name = 'export/profiles/%s.csv' % identifier
-    default_storage.save(file_name, default_storage.open(file_name_temp, 'rb'))
-
-    # delete the temp file
+    if not default_storage.exists(file_name_temp):
+        default_storage.save(file_name_temp, ContentFile(b''))
+
+    profiles = Profile.objects.all()
+    progress_key = get_export_progress_key(identifier)
+    total = profiles.count()
+    start_time = ttime.time()
+
+    def progress(num_processed):
+        cache.set(progress_key, {'num_processed': num_processed, 'total': total}, 60 * 60 * 24)
+        if verbosity > 0:
+            elapsed = ttime.time() - start_time
+            print('%d/%d profiles exported, %.1f rows/sec' % (
+                  num_processed, total, num_processed / elapsed if elapsed else 0))
+
+    progress(0)
+    with default_storage.open(file_name, 'w') as csvfile:
+        write_profiles_csv(csvfile, profiles, user_field_list, profile_field_list,
+                           progress=progress)
+
+    # the export is ready
     default_storage.delete(file_name_temp)
 
     # notify user that export is ready to download
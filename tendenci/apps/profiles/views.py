@@ -56,7 +56,7 @@ from tendenci.apps.profiles.forms import (ProfileForm, ExportForm,
 UserPermissionForm, UserGroupsForm, ValidatingPasswordChangeForm,
 UserMembershipForm, ProfileMergeForm, ProfileSearchForm, UserUploadForm,
 ActivateForm, PhotoUploadForm)
-from tendenci.apps.profiles.utils import get_member_reminders, ImportUsers
+from tendenci.apps.profiles.utils import get_member_reminders, ImportUsers, get_export_progress
 from tendenci.apps.events.models import Registrant
 from tendenci.apps.memberships.models import MembershipType
 from tendenci.apps.memberships.forms import EducationForm
@@ -1389,17 +1389,20 @@ def profile_export_status(request, identifier, template_name="profiles/export_st
         raise Http403
 
     export_path = 'export/profiles/%s.csv' % identifier
+    temp_export_path = 'export/profiles/%s_temp.csv' % identifier
     download_ready = False
-    if default_storage.exists(export_path):
+    # the temp file is there while the export is in progress
+    if default_storage.exists(temp_export_path):
+        progress = get_export_progress(identifier)
+    elif default_storage.exists(export_path):
         download_ready = True
+        progress = None
     else:
-        temp_export_path = 'export/profiles/%s_temp.csv' % identifier
-        if not default_storage.exists(temp_export_path) and \
-                not default_storage.exists(export_path):
-            raise Http404
+        raise Http404
 
     context = {'identifier': identifier,
-               'download_ready': download_ready}
+               'download_ready': download_ready,
+               'progress': progress}
     return render_to_resp(request=request, template_name=template_name, context=context)
 
 
@@ -1412,7 +1415,8 @@ def profile_export_download(request, identifier):
 
     file_name = '%s.csv' % identifier
     file_path = 'export/profiles/%s' % file_name
-    if not default_storage.exists(file_path):
+    if not default_storage.exists(file_path) or \
+            default_storage.exists('export/profiles/%s_temp.csv' % identifier):
         raise Http404
 
     response = HttpResponse(content_type='text/csv')
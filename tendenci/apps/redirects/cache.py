@@ -0,0 +1,3 @@
+# cache tag of the redirect table, invalidated when a redirect is saved
+# or deleted so that every process compiles the table again
+REDIRECTS_CACHE_TAG = "redirects"
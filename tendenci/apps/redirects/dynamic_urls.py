@@ -1,3 +0,0 @@
-from tendenci.apps.redirects.utils import get_redirect_patterns
-
-urlpatterns = get_redirect_patterns()
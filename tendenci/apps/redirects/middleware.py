@@ -1,4 +1,3 @@
-from django.urls import resolve
 from django.utils.http import urlquote
 from django.utils.deprecation import MiddlewareMixin
 
@@ -11,24 +10,20 @@ class RedirectMiddleware(MiddlewareMixin):
             return response  # No need to check for a redirect for non-404 responses.
         # use urlquote so we can support '?' in the redirect
         path = urlquote(request.get_full_path())
-        from tendenci.apps.handler404.models import Report404
-        try:
-            view, args, kwargs = resolve(path, urlconf='tendenci.apps.redirects.dynamic_urls')
-            kwargs['request'] = request
+        from tendenci.apps.redirects.utils import redirect_table
+        from tendenci.apps.handler404.buffer import report404_buffer
+
+        # the redirect patterns match the path without the leading slash
+        found = redirect_table.find(path[1:] if path.startswith('/') else path)
+        if found:
+            view, args, kwargs = found
             try:
-                return view(*args, **kwargs)
-            except:
-                raise
-        except Exception:
-            # No redirect was found. Return the response.
-            # Log the 404
-            # print("e: ", e)
-            report_list = Report404.objects.filter(url=path)[:1]
-            if report_list:
-                report = report_list[0]
-                report.count = report.count + 1
-            else:
-                # Truncate to only get the first 200 characters
-                report = Report404(url=path[:200])
-            report.save()
-            return response
+                return view(request, *args, **kwargs)
+            except Exception:
+                # e.g. a to url not matching the pattern
+                pass
+
+        # No redirect was found. Return the response.
+        # Count the 404, the counts are written in batches
+        report404_buffer.add(path)
+        return response
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from tendenci.apps.redirects.managers import RedirectManager
+from tendenci.apps.redirects.signals import clear_redirect_table
 
 HTTP_STATUS_CHOICES = (
     (301, _('301 - Permanent Redirect')),
@@ -41,3 +42,7 @@ class Redirect(models.Model):
         if 'log' in kwargs:
             kwargs.pop('log')
         super(Redirect, self).save(*args, **kwargs)
+
+
+models.signals.post_save.connect(clear_redirect_table, sender=Redirect)
+models.signals.post_delete.connect(clear_redirect_table, sender=Redirect)
@@ -0,0 +1,7 @@
+def clear_redirect_table(sender, instance, **kwargs):
+    """
+    Compile the redirect table again when a redirect is saved or deleted.
+    """
+    from tendenci.apps.redirects.utils import redirect_table
+
+    redirect_table.clear()
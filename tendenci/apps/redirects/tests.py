@@ -0,0 +1,48 @@
+from django.test import RequestFactory, TestCase
+from django.utils.http import urlquote
+
+from tendenci.apps.redirects.models import Redirect
+from tendenci.apps.redirects.utils import redirect_table
+
+
+class RedirectTableTest(TestCase):
+
+    def setUp(self):
+        Redirect.objects.create(from_url='old-page', to_url='new-page')
+        Redirect.objects.create(from_url='page?id=1', to_url='page-one', http_status=302)
+        Redirect.objects.create(from_url=r'blog/(?P<slug>[\w-]+)', to_url='news/%(slug)s',
+                                uses_regex=True)
+        Redirect.objects.create(from_url='inactive-page', to_url='new-page', status=0)
+
+    def redirect(self, path):
+        """
+        Returns the response of the redirect found for path, the way
+        RedirectMiddleware looks it up, or None.
+        """
+        path = urlquote(path)
+        found = redirect_table.find(path[1:])
+        if not found:
+            return None
+        view, args, kwargs = found
+        return view(RequestFactory().get(path), *args, **kwargs)
+
+    def test_exact_match(self):
+        response = self.redirect('/old-page')
+        self.assertEqual((response.status_code, response['Location']), (301, '/new-page'))
+        self.assertEqual(self.redirect('/old-page/')['Location'], '/new-page')
+        self.assertIsNone(self.redirect('/old-page/more'))
+        self.assertIsNone(self.redirect('/inactive-page'))
+
+    def test_query_string_match(self):
+        response = self.redirect('/page?id=1')
+        self.assertEqual((response.status_code, response['Location']), (302, '/page-one'))
+        self.assertIsNone(self.redirect('/page?id=2'))
+
+    def test_regex_match(self):
+        self.assertEqual(self.redirect('/blog/hello-world')['Location'], '/news/hello-world')
+        self.assertIsNone(self.redirect('/blog/hello/world'))
+
+    def test_table_compiled_again_on_change(self):
+        self.assertIsNone(self.redirect('/another-page'))
+        Redirect.objects.create(from_url='another-page', to_url='new-page')
+        self.assertEqual(self.redirect('/another-page')['Location'], '/new-page')
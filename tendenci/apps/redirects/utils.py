@@ -1,35 +1,87 @@
-from django.conf.urls import url
+import re
+from threading import Lock
+
 from django.utils.http import urlquote
 from django.views.generic import RedirectView
+
+from tendenci.apps.base.cache import get_cache_tag_generation, invalidate_cache_tag
+from tendenci.apps.redirects.cache import REDIRECTS_CACHE_TAG
 from tendenci.apps.redirects.models import Redirect
 
-def get_redirect_patterns():
+
+def get_redirect_url_kwargs(redirect):
     """
-        Gets the redirect patterns out of the database
-        and assigns them to the django patterns object.
+        Returns the pattern of the from url of the redirect
+        and the arguments of its RedirectView.
     """
-    redirects = Redirect.objects.filter(status=True).order_by('uses_regex')
-    url_list = []
-    for redirect in redirects:
-        extra = {}
-
-        # use urlquote so we can support '?' in the redirect
-        if not redirect.uses_regex:
-            pattern = r'^%s/?$' % urlquote(redirect.from_url)
-        else:
-            pattern = r'^%s/?$' % redirect.from_url
-
-        if 'http' in redirect.to_url:
-            extra.update({'url':'%s' % redirect.to_url})
-        elif 'https' in redirect.to_url:
-            extra.update({'url':'%s' % redirect.to_url})
-        else:
-            extra.update({'url':'/%s' % redirect.to_url})
-
-        if redirect.http_status == 302:
-            extra.update({'permanent': False})
-            url_list.append(url(pattern, RedirectView.as_view(**extra)))
-        else:
-            url_list.append(url(pattern, RedirectView.as_view(**extra)))
-
-    return url_list
+    extra = {}
+
+    # use urlquote so we can support '?' in the redirect
+    if not redirect.uses_regex:
+        pattern = r'^%s/?$' % urlquote(redirect.from_url)
+    else:
+        pattern = r'^%s/?$' % redirect.from_url
+
+    if 'http' in redirect.to_url:
+        extra.update({'url':'%s' % redirect.to_url})
+    else:
+        extra.update({'url':'/%s' % redirect.to_url})
+
+    if redirect.http_status == 302:
+        extra.update({'permanent': False})
+
+    return pattern, extra
+
+
+class RedirectTable(object):
+    """
+        The active redirects, compiled once per process and compiled
+        again when a redirect is saved or deleted (in any process).
+    """
+    def __init__(self):
+        self.patterns = []
+        self.generation = None
+        self.lock = Lock()
+
+    def compile(self):
+        patterns = []
+        redirects = Redirect.objects.filter(status=True).order_by('uses_regex')
+        for redirect in redirects:
+            pattern, extra = get_redirect_url_kwargs(redirect)
+            try:
+                regex = re.compile(pattern)
+            except re.error:
+                continue
+            patterns.append((regex, RedirectView.as_view(**extra)))
+        return patterns
+
+    def get_patterns(self):
+        generation = get_cache_tag_generation(REDIRECTS_CACHE_TAG)
+        # without a shared cache (generation is None) the table is
+        # compiled again on every lookup
+        if generation is None or generation != self.generation:
+            with self.lock:
+                if generation is None or generation != self.generation:
+                    self.patterns = self.compile()
+                    self.generation = generation
+        return self.patterns
+
+    def find(self, path):
+        """
+            Returns the view and the arguments of the first redirect
+            matching the path (without the leading slash), or None.
+        """
+        for regex, view in self.get_patterns():
+            match = regex.fullmatch(path)
+            if match:
+                kwargs = match.groupdict()
+                args = () if kwargs else match.groups()
+                return view, args, kwargs
+        return None
+
+    def clear(self):
+        invalidate_cache_tag(REDIRECTS_CACHE_TAG)
+        self.generation = None
+
+
+redirect_table = RedirectTable()
@@ -13,7 +13,6 @@ from tendenci.apps.exports.utils import run_export_task
 
 from tendenci.apps.redirects.models import Redirect
 from tendenci.apps.redirects.forms import RedirectForm
-from tendenci.apps.redirects import dynamic_urls
 
 
 @login_required
@@ -57,10 +56,6 @@ def add(request, form_class=RedirectForm, template_name="redirects/add.html"):
 
             messages.add_message(request, messages.SUCCESS, _('Successfully added %(r)s' % {'r':redirect}))
 
-            # reload the urls
-            from imp import reload
-            reload(dynamic_urls)
-
             return HttpResponseRedirect(reverse('redirects'))
     else:
         form = form_class()
@@ -87,10 +82,6 @@ def edit(request, id, form_class=RedirectForm, template_name="redirects/edit.htm
 
             messages.add_message(request, messages.SUCCESS, _('Successfully edited %(r)s' % {'r':redirect}))
 
-            # reload the urls
-            from imp import reload
-            reload(dynamic_urls)
-
             return HttpResponseRedirect(reverse('redirects'))
 
     return render_to_resp(request=request,
@@ -1,24 +1,52 @@
 from builtins import str
+import time
+from threading import Lock
 
 from django.db.models import Manager
-from django.core.cache import cache
-from django.conf import settings
-from django.db.models.query import QuerySet
 
-from tendenci.apps.robots.cache import CACHE_PRE_KEY, cache_all_robots
+from tendenci.apps.base.cache import get_cache_tag_generation
+from tendenci.apps.robots.cache import ROBOTS_CACHE_TAG
+from tendenci.apps.robots.matcher import AgentMatcher
 
+# how often (in seconds) a process checks if the robots have changed
+VERSION_CHECK_INTERVAL = 10
+
+# per-process matcher of the active robots
+_robot_matcher = {
+    'matcher': None,
+    'version': None,
+    'checked': 0,
+}
+_robot_matcher_lock = Lock()
 
-class RobotManager(Manager):
-    def get_by_agent(self, user_agent):
 
-        keys = [settings.CACHE_PRE_KEY, CACHE_PRE_KEY, 'all']
-        key = '.'.join(keys)
+def reset_robot_matcher():
+    _robot_matcher['matcher'] = None
 
-        robots = cache.get(key)
-        if not (robots and isinstance(robots, QuerySet)):
-            cache_all_robots()
-            robots = cache.get(key, [])
 
+class RobotManager(Manager):
+    def get_matcher(self):
+        """
+        Returns the matcher of the active robots for this process. It is
+        rebuilt when the robots version in the cache has changed.
+        """
+        matcher = _robot_matcher['matcher']
+        now = time.time()
+        if matcher is not None and now - _robot_matcher['checked'] < VERSION_CHECK_INTERVAL:
+            return matcher
+
+        version = get_cache_tag_generation(ROBOTS_CACHE_TAG)
+        with _robot_matcher_lock:
+            matcher = _robot_matcher['matcher']
+            if matcher is None or version is None or version != _robot_matcher['version']:
+                robots = self.filter(status=True, status_detail='active').order_by('id')
+                matcher = AgentMatcher((robot.name, robot) for robot in robots)
+                _robot_matcher['matcher'] = matcher
+                _robot_matcher['version'] = version
+            _robot_matcher['checked'] = now
+        return matcher
+
+    def get_by_agent(self, user_agent):
         # UnicodeDecodeError: 'ascii' codec can't decode byte 0xf3
         # http://stackoverflow.com/questions/2392732/sqlite-python-unicode-and-non-utf-data
         try:
@@ -26,7 +54,4 @@ class RobotManager(Manager):
         except TypeError:
             pass
 
-        for robot in robots:
-            if robot.name.lower() in user_agent.lower():
-                return robot
-        return None
+        return self.get_matcher().match(user_agent)
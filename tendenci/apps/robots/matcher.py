@@ -0,0 +1,53 @@
+import re
+from collections import OrderedDict
+from threading import Lock
+
+
+class AgentMatcher(object):
+    """
+    Matches user agents against a list of (name, value) patterns with a
+    single compiled regex instead of a substring test per name. The name
+    is matched case insensitively anywhere in the user agent, and the
+    value of the pattern is returned. When a user agent matches several
+    names, the longest one wins.
+
+    Results are memoized per user agent in a bounded LRU cache.
+    """
+    def __init__(self, patterns, cache_size=2048):
+        self.values = {}
+        for name, value in patterns:
+            name = (name or '').strip().lower()
+            # the first pattern listed wins, as the loop it replaces did
+            if name and name not in self.values:
+                self.values[name] = value
+
+        names = sorted(self.values, key=len, reverse=True)
+        if names:
+            self.regex = re.compile('|'.join(re.escape(name) for name in names))
+        else:
+            self.regex = None
+
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.lock = Lock()
+
+    def match(self, user_agent):
+        """
+        Returns the value of the pattern found in the user agent, or None.
+        """
+        if not user_agent or self.regex is None:
+            return None
+
+        with self.lock:
+            if user_agent in self.cache:
+                self.cache.move_to_end(user_agent)
+                return self.cache[user_agent]
+
+        match = self.regex.search(user_agent.lower())
+        value = self.values[match.group(0)] if match else None
+
+        with self.lock:
+            self.cache[user_agent] = value
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return value
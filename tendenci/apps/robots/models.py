@@ -1,7 +1,10 @@
 from django.db import models
+from django.db.models.signals import post_save, post_delete
 from django.utils.translation import gettext_lazy as _
 
-from tendenci.apps.robots.managers import RobotManager
+from tendenci.apps.robots.managers import RobotManager, reset_robot_matcher
+from tendenci.apps.base.cache import invalidate_cache_tag
+from tendenci.apps.robots.cache import ROBOTS_CACHE_TAG
 
 
 STATUS_CHOICES = (('active',_('Active')),('inactive',_('Inactive')),)
@@ -20,3 +23,14 @@ class Robot(models.Model):
 
     def __str__(self):
         return self.name
+
+
+def robots_changed(sender, **kwargs):
+    """
+    Invalidates the robot matcher of every process.
+    """
+    invalidate_cache_tag(ROBOTS_CACHE_TAG)
+    reset_robot_matcher()
+
+post_save.connect(robots_changed, sender=Robot, weak=False)
+post_delete.connect(robots_changed, sender=Robot, weak=False)
@@ -0,0 +1,166 @@
+import logging
+import time
+from datetime import datetime
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, transaction
+from haystack import connection_router, connections
+from haystack.exceptions import NotHandled
+from haystack.utils import get_model_ct
+
+from tendenci.apps.search.models import UnindexedItem
+
+logger = logging.getLogger(__name__)
+
+
+def get_queue_stats():
+    """
+    Returns the number of items waiting to be indexed (queue_depth) and
+    the age in seconds of the oldest one (index_lag, 0 if none).
+    """
+    queue = UnindexedItem.objects.all()
+    queue_depth = queue.count()
+    index_lag = 0
+    oldest = queue.order_by('create_dt').values_list('create_dt', flat=True).first()
+    if oldest:
+        index_lag = max(0, int((datetime.now() - oldest).total_seconds()))
+    return {'queue_depth': queue_depth, 'index_lag': index_lag}
+
+
+def queue_unindexed_items(model, object_ids):
+    """
+    Queues objects to be indexed, as the QueuedSignalProcessor does on
+    post_save, for the objects changed without it (e.g. by a queryset
+    update()). Does nothing if the model has no search index.
+    """
+    object_ids = set(object_ids)
+    if not object_ids:
+        return
+    indexed_models = set()
+    for using in connection_router.for_write():
+        indexed_models.update(connections[using].get_unified_index().get_indexed_models())
+    if model not in indexed_models:
+        return
+
+    content_type = ContentType.objects.get_for_model(model)
+    queued = set(UnindexedItem.objects.filter(content_type=content_type,
+                                              object_id__in=object_ids
+                                              ).values_list('object_id', flat=True))
+    UnindexedItem.objects.bulk_create([
+        UnindexedItem(content_type=content_type, object_id=object_id)
+        for object_id in object_ids - queued], batch_size=500)
+
+
+class IndexingWorker(object):
+    """
+    Indexes the objects queued in UnindexedItem by the QueuedSignalProcessor.
+
+    The queued items are claimed (removed from the queue) in batches, so
+    that an object saved again while its batch is processed is queued and
+    indexed again. The objects of a batch are loaded with one query per
+    model and sent to the search backends in one update per model; the
+    queued objects no longer in the index queryset are removed from the
+    index.
+    """
+    def __init__(self, batch_size=500, verbosity=1):
+        self.batch_size = batch_size
+        self.verbosity = verbosity
+        self.indexed_count = 0
+        self.removed_count = 0
+
+    def claim(self):
+        """
+        Removes a batch of items from the queue and returns them
+        as a dict of object ids by content type id.
+        """
+        with transaction.atomic():
+            rows = list(UnindexedItem.objects.select_for_update(skip_locked=True
+                            ).order_by('pk'
+                            ).values_list('pk', 'content_type_id', 'object_id'
+                            )[:self.batch_size])
+            if rows:
+                UnindexedItem.objects.filter(pk__in=[row[0] for row in rows]).delete()
+
+        claimed = {}
+        for pk, content_type_id, object_id in rows:
+            claimed.setdefault(content_type_id, set()).add(object_id)
+        return claimed
+
+    def requeue(self, claimed):
+        UnindexedItem.objects.bulk_create([
+            UnindexedItem(content_type_id=content_type_id, object_id=object_id)
+            for content_type_id, object_ids in claimed.items()
+            for object_id in object_ids], batch_size=500)
+
+    def index_objects(self, model, object_ids):
+        for using in connection_router.for_write():
+            try:
+                index = connections[using].get_unified_index().get_index(model)
+            except NotHandled:
+                continue
+            backend = connections[using].get_backend()
+
+            objects = index.build_queryset(using=using).in_bulk(list(object_ids))
+            if objects:
+                backend.update(index, list(objects.values()))
+                self.indexed_count += len(objects)
+
+            # deleted, or no longer meant to be indexed
+            for object_id in object_ids:
+                if object_id not in objects:
+                    backend.remove('%s.%s' % (get_model_ct(model), object_id))
+                    self.removed_count += 1
+
+    def process_batch(self):
+        """
+        Indexes a batch of queued items. Returns the number of items claimed.
+        """
+        claimed = self.claim()
+        if not claimed:
+            return 0
+
+        try:
+            for content_type_id, object_ids in claimed.items():
+                model = ContentType.objects.get_for_id(content_type_id).model_class()
+                if model is None:
+                    continue
+                self.index_objects(model, object_ids)
+        except Exception:
+            # put the items back to the queue for the next run
+            self.requeue(claimed)
+            raise
+
+        return sum(len(object_ids) for object_ids in claimed.values())
+
+    def process_queue(self):
+        """
+        Indexes the queued items until the queue is empty.
+        Returns the number of items claimed.
+        """
+        count = 0
+        while True:
+            processed = self.process_batch()
+            if not processed:
+                break
+            count += processed
+            if self.verbosity > 1:
+                print("Indexed %d, removed %d" % (self.indexed_count, self.removed_count))
+        return count
+
+    def run(self, interval=10):
+        """
+        Indexes the queued items continuously, checking the queue
+        every interval seconds once it is empty.
+        """
+        while True:
+            try:
+                self.process_queue()
+            except Exception as e:
+                logger.error('Failed to index the queued items: %s', e)
+            if self.verbosity > 0:
+                stats = get_queue_stats()
+                print("%s queue_depth=%d index_lag=%d indexed=%d removed=%d" % (
+                      datetime.now().strftime('%Y-%m-%d %H:%M:%S'), stats['queue_depth'],
+                      stats['index_lag'], self.indexed_count, self.removed_count))
+            close_old_connections()
+            time.sleep(interval)
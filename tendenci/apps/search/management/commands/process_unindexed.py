@@ -1,44 +1,45 @@
 #process_unindexed.py
-from datetime import datetime
-
 from django.core.management.base import BaseCommand
-from django.core.management import call_command
 
 
 class Command(BaseCommand):
     """
-    Command used to process unindexed items by querying per Model
-    and running update_index based on a calculated age
-    for models with unindexed items.
+    Command used to index the items queued by the QueuedSignalProcessor.
+
+    By default the queue is processed until it is empty. With --continuous
+    the command keeps running and checks the queue every --interval seconds,
+    which bounds the time an item waits to be indexed.
+
+    --stats prints the number of queued items and the age in seconds of
+    the oldest one, e.g. for monitoring:
+
+        queue_depth=12 index_lag=8
     """
 
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+            help='The number of queued items indexed at once')
+        parser.add_argument('--continuous', action='store_true', default=False,
+            help='Keep running and index the items as they are queued')
+        parser.add_argument('--interval', type=int, default=10,
+            help='The number of seconds between the checks of the queue with --continuous')
+        parser.add_argument('--stats', action='store_true', default=False,
+            help='Print the queue depth and the index lag, and exit')
+
     def handle(self, **options):
-        from tendenci.apps.search.models import UnindexedItem
-        items = []
-        ages = []
+        from tendenci.apps.search.indexing import IndexingWorker, get_queue_stats
+
         verbosity = int(options.get('verbosity', 0))
 
-        unindexed_items = UnindexedItem.objects.all().select_related('content_type').order_by('create_dt')
-        for ui in unindexed_items:
-            app = ui.content_type.app_label
-            if app not in items:
-                items.append(app)
-
-                age = datetime.now() - unindexed_items[0].create_dt
-                age = (int(age.days)*60*60*24) + age.seconds
-                age = (age / 3600) + 1
-                ages.append(int(age))
-
-        # If we have items, then we find the max age and run a single
-        # update_index command for those apps with the longest age.
-        if items and ages:
-            ages.sort()
-            ages.reverse()
-            max_age = ages[0]
-            # Remove is required because soft-deletes cannot be updated
-            # in the index as the index cannot query for them to update
-            # them.
-            params = {'age': max_age, 'batchsize': 25, 'remove': True, 'verbosity': verbosity}
-
-            call_command('update_index', *items, **params)
-            unindexed_items.delete()
+        if options['stats']:
+            print("queue_depth=%(queue_depth)d index_lag=%(index_lag)d" % get_queue_stats())
+            return
+
+        worker = IndexingWorker(batch_size=options['batch_size'], verbosity=verbosity)
+        if options['continuous']:
+            worker.run(interval=options['interval'])
+        else:
+            count = worker.process_queue()
+            if verbosity > 0:
+                print("Processed %d queued items (%d indexed, %d removed)." % (
+                      count, worker.indexed_count, worker.removed_count))
@@ -1 +1,4 @@
 SETTING_PRE_KEY = "settings"
+# cache tag of the settings snapshot (see site_settings.utils),
+# invalidated every time a setting is saved or deleted
+SETTINGS_SNAPSHOT_CACHE_TAG = "settings_snapshot"
@@ -0,0 +1,78 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Renders a page a number of times and reports the cache calls
+    made per request, to keep an eye on the settings cache traffic.
+
+    Example: python manage.py benchmark_settings_cache --path=/ --requests=20
+    """
+    help = "Count the cache calls made per rendered page"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/',
+            help='The url path to render')
+        parser.add_argument('--requests', type=int, default=10,
+            help='The number of times the page is rendered')
+
+    def handle(self, *args, **options):
+        from django.conf import settings
+        from django.core.cache import caches
+        from django.test import Client
+        from django.test.utils import override_settings
+        from tendenci.apps.site_settings.cache import SETTING_PRE_KEY
+
+        path = options['path']
+        num_requests = options['requests']
+        settings_prefix = '%s.%s.' % (settings.CACHE_PRE_KEY, SETTING_PRE_KEY)
+
+        backend = caches['default']
+        calls = Counter()
+        settings_calls = Counter()
+
+        def counted(name):
+            method = getattr(backend, name)
+
+            def wrapper(key, *args, **kwargs):
+                calls[name] += 1
+                keys = key if name in ('get_many', 'set_many', 'delete_many') else [key]
+                if any(str(k).startswith(settings_prefix) for k in keys):
+                    settings_calls[name] += 1
+                return method(key, *args, **kwargs)
+            return wrapper
+
+        method_names = ['get', 'set', 'add', 'delete', 'incr', 'decr',
+                        'get_many', 'set_many', 'delete_many']
+        for name in method_names:
+            setattr(backend, name, counted(name))
+
+        client = Client()
+        try:
+            with override_settings(ALLOWED_HOSTS=['*']):
+                # warm up the settings snapshot and the other caches
+                client.get(path)
+                calls.clear()
+                settings_calls.clear()
+
+                start = time.time()
+                for i in range(num_requests):
+                    response = client.get(path)
+                elapsed = time.time() - start
+        finally:
+            for name in method_names:
+                delattr(backend, name)
+
+        total = sum(calls.values())
+        total_settings = sum(settings_calls.values())
+        print('%s rendered %d times (status %s) in %.2fs, %.1fms per page' % (
+              path, num_requests, response.status_code,
+              elapsed, elapsed * 1000 / num_requests))
+        print('Cache calls per page: %.1f' % (total / num_requests))
+        print('Settings cache calls per page: %.1f' % (total_settings / num_requests))
+        for name, count in sorted(calls.items()):
+            print('    %s: %.1f (settings: %.1f)' % (
+                  name, count / num_requests, settings_calls[name] / num_requests))
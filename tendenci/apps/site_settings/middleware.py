@@ -0,0 +1,17 @@
+from django.utils.deprecation import MiddlewareMixin
+
+from tendenci.apps.site_settings.utils import (begin_settings_request,
+                                               end_settings_request)
+
+
+class SettingsSnapshotMiddleware(MiddlewareMixin):
+    """
+    Limits the check of the settings snapshot version to once per request.
+    Should be placed first so that every settings lookup is covered.
+    """
+    def process_request(self, request):
+        begin_settings_request()
+
+    def process_response(self, request, response):
+        end_settings_request()
+        return response
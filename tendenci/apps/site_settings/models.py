@@ -2,6 +2,7 @@ from urllib.parse import urlparse
 from django.contrib.sites.models import Site
 from django.conf import settings
 from django.db import models
+from django.db.models.signals import post_delete
 from django.urls import reverse
 from django.core.management import call_command
 from django.utils.translation import gettext_lazy as _
@@ -89,12 +90,6 @@ class Setting(models.Model):
         if self.is_secure in ('true', 'false'):
             self.is_secure = self.is_secure == 'true'
 
-        try:
-            #get the old value as reference for updating the cache
-            orig = Setting.objects.get(pk = self.pk)
-        except Setting.DoesNotExist:
-            orig = None
-
         #call touch settings if this is the setting theme
         if self.name == 'theme':
             from tendenci.apps.theme.utils import theme_options
@@ -104,16 +99,9 @@ class Setting(models.Model):
         else:
             super(Setting, self).save(*args, **kwargs)
 
-        #update the cache when value has changed
-        if orig and self.value != orig.value:
-            from tendenci.apps.site_settings.utils import (delete_setting_cache,
-                cache_setting, delete_all_settings_cache)
-
-            # delete the cache for all the settings to reset the context
-            delete_all_settings_cache()
-            # delete and set cache for single key and save the value in the database
-            delete_setting_cache(self.scope, self.scope_category, self.name)
-            cache_setting(self.scope, self.scope_category, self.name, self)
+        # invalidate the settings snapshot of every process
+        from tendenci.apps.site_settings.utils import bump_settings_version
+        bump_settings_version()
 
     def update_site_domain(self, site_url):
         """
@@ -129,3 +117,10 @@ class Setting(models.Model):
                 django_site.domain = netloc
                 django_site.name = netloc
                 django_site.save()
+
+
+def setting_deleted(sender, **kwargs):
+    from tendenci.apps.site_settings.utils import bump_settings_version
+    bump_settings_version()
+
+post_delete.connect(setting_deleted, sender=Setting, weak=False)
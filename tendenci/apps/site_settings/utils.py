@@ -1,10 +1,24 @@
 from decimal import Decimal
+from threading import local, Lock
 import django
 from django.core.cache import cache
 from django.conf import settings as d_settings
+from django.template import engines, TemplateSyntaxError
 
+from tendenci.apps.base.cache import get_cache_tag_generation, invalidate_cache_tag
 from tendenci.apps.site_settings.models import Setting
-from tendenci.apps.site_settings.cache import SETTING_PRE_KEY
+from tendenci.apps.site_settings.cache import SETTING_PRE_KEY, SETTINGS_SNAPSHOT_CACHE_TAG
+
+
+# Per-process, typed snapshot of every setting. It is rebuilt from the
+# database only when the version key in the cache changes, so reading
+# settings costs one cache hit per request instead of one per setting.
+_snapshot = None
+_snapshot_lock = Lock()
+
+# set by SettingsSnapshotMiddleware while a request is being processed,
+# so that the version key is checked only once per request.
+_thread_locals = local()
 
 
 def get_setting_key(items=[]):
@@ -22,6 +36,139 @@ def get_setting_key(items=[]):
 def delete_all_settings_cache():
     key = get_setting_key(['all'])
     cache.delete(key)
+    bump_settings_version()
+
+
+def bump_settings_version():
+    """
+    Invalidates the settings snapshot in every process.
+    """
+    invalidate_cache_tag(SETTINGS_SNAPSHOT_CACHE_TAG)
+    # the local snapshot is always rebuilt on the next access, even
+    # if the cache backend doesn't store the version
+    global _snapshot
+    _snapshot = None
+
+
+def convert_setting_value(setting):
+    """
+    Converts the raw value of a setting to its data type.
+    Settings of the file type are returned as the raw file id, they are
+    looked up by get_setting.
+    """
+    value = setting.get_value().strip()
+    if setting.data_type == 'boolean':
+        value = value[:1].lower() == 't'
+    if setting.data_type == 'decimal':
+        if value:
+            value = Decimal(value)
+        else:
+            value = 0
+    if setting.data_type == 'int':
+        if value:
+            try:
+                value = int(value)
+            except ValueError:
+                value = 0
+        else:
+            value = 0  # default to 0
+    return value
+
+
+def convert_setting_context_value(setting):
+    """
+    Converts the raw value of a setting for the settings
+    context processor. Unlike get_setting, decimals are kept as strings.
+    """
+    value = setting.get_value().strip()
+    if setting.data_type == 'boolean':
+        value = value[:1].lower() == 't'
+    if setting.data_type == 'int':
+        if value:
+            try:  # catch possible errors when int() is called
+                value = int(value)
+            except ValueError:
+                value = 0
+        else:
+            value = 0  # default to 0
+    return value
+
+
+def build_settings_snapshot():
+    """
+    Loads all settings with a single query and converts their values.
+    Returns a tuple of (values, contexts, contact_message) where values
+    is keyed by (scope, scope_category, name) and contexts is keyed by
+    the SCOPE_SCOPECATEGORY_NAME context variable name.
+    """
+    values = {}
+    contexts = {}
+    contact_message = None
+    for setting in Setting.objects.all():
+        values[(setting.scope, setting.scope_category, setting.name)] = (
+                                    setting.data_type, convert_setting_value(setting))
+
+        context_key = '_'.join([setting.scope, setting.scope_category,
+                                setting.name]).upper()
+        value = convert_setting_context_value(setting)
+        # the social_media addon's contact_message setting is a
+        # template rendered with the page url, compile it once here
+        if setting.name == 'contact_message':
+            try:
+                contact_message = (context_key, engines['django'].from_string(value))
+            except TemplateSyntaxError:
+                contact_message = None
+        contexts[context_key] = value
+
+    return values, contexts, contact_message
+
+
+def get_settings_snapshot():
+    """
+    Returns the per-process settings snapshot, rebuilding it if the
+    version in the cache has changed. While a request is being processed,
+    the version is checked only once (see SettingsSnapshotMiddleware).
+    """
+    global _snapshot
+    snapshot = _snapshot
+    in_request = hasattr(_thread_locals, 'checked')
+    if snapshot is not None and in_request and _thread_locals.checked:
+        return snapshot
+
+    # None if the cache backend can't hold the version (e.g. DummyCache)
+    version = get_cache_tag_generation(SETTINGS_SNAPSHOT_CACHE_TAG)
+    # without a version (the cache backend doesn't store it),
+    # the snapshot is rebuilt once per request
+    if snapshot is None or version != snapshot['version'] or (
+                                    version is None and in_request):
+        with _snapshot_lock:
+            snapshot = _snapshot
+            if snapshot is None or version != snapshot['version'] or (
+                                    version is None and in_request):
+                values, contexts, contact_message = build_settings_snapshot()
+                snapshot = {
+                    'version': version,
+                    'values': values,
+                    'contexts': contexts,
+                    'contact_message': contact_message,
+                }
+                _snapshot = snapshot
+    if in_request:
+        _thread_locals.checked = True
+    return snapshot
+
+
+def begin_settings_request():
+    """
+    Marks the beginning of a request. The snapshot version will be
+    checked on the first settings access of the request only.
+    """
+    _thread_locals.checked = False
+
+
+def end_settings_request():
+    if hasattr(_thread_locals, 'checked'):
+        del _thread_locals.checked
 
 
 def cache_setting(scope, scope_category, name, value):
@@ -55,6 +202,7 @@ def delete_setting_cache(scope, scope_category, name):
     """
     key = get_setting_key([scope, scope_category, name])
     cache.delete(key)
+    bump_settings_version()
 
 
 def delete_settings_cache(scope, scope_category):
@@ -70,6 +218,7 @@ def delete_settings_cache(scope, scope_category):
     for setting in settings:
         key = get_setting_key([setting.scope, setting.scope_category, setting.name])
         cache.delete(key)
+    bump_settings_version()
 
 
 def get_setting(scope, scope_category, name):
@@ -79,57 +228,33 @@ def get_setting(scope, scope_category, name):
         Returns the value of the setting if it exists
         otherwise it returns an empty string
     """
-    key = get_setting_key([scope, scope_category, name])
-
-    if django.apps.apps.models_ready:
-        setting = cache.get(key)
+    if not django.apps.apps.models_ready:
+        # the snapshot can't be built yet, hit the database directly
+        try:
+            setting = Setting.objects.get(scope=scope,
+                                          scope_category=scope_category,
+                                          name=name)
+        except Exception:
+            return u''
+        data_type, value = setting.data_type, convert_setting_value(setting)
     else:
-        setting = None
-
-    if setting is None:
-        #setting is not in the cache
         try:
-            #try to get the setting and cache it
-            filters = {
-                'scope': scope,
-                'scope_category': scope_category,
-                'name': name
-            }
-            setting = Setting.objects.get(**filters)
-            cache_setting(setting.scope, setting.scope_category, setting.name, setting)
+            snapshot = get_settings_snapshot()
         except Exception:
-            setting = None
-
-    #check if the setting has been set and evaluate the value
-    if setting is not None:
+            # the settings table isn't available (e.g. before migrate)
+            return u''
         try:
-            # test is get_value will work
-            value = setting.get_value().strip()
-        except AttributeError:
+            data_type, value = snapshot['values'][(scope, scope_category, name)]
+        except KeyError:
             return u''
-        # convert data types
-        if setting.data_type == 'boolean':
-            value = value[0].lower() == 't'
-        if setting.data_type == 'decimal':
-            if value:
-                value = Decimal(value)
-            else:
-                value = 0
-        if setting.data_type == 'int':
-            if value.strip():
-                value = int(value.strip())
-            else:
-                value = 0  # default to 0
-        if setting.data_type == 'file':
-            from tendenci.apps.files.models import File as TFile
-            try:
-                tfile = TFile.objects.get(pk=value)
-            except TFile.DoesNotExist:
-                tfile = None
-            value = tfile
-        return value
 
-    return u''
+    if data_type == 'file':
+        from tendenci.apps.files.models import File as TFile
+        try:
+            value = TFile.objects.get(pk=value)
+        except (TFile.DoesNotExist, ValueError):
+            value = None
+    return value
 
 
 def get_global_setting(name):
@@ -141,28 +266,12 @@ def get_module_setting(scope_category, name):
 
 
 def check_setting(scope, scope_category, name):
-    #check cache first
-    key = get_setting_key([scope, scope_category, name])
-    setting = cache.get(key)
-    if setting is not None:
-        return True
-
-    missing_key = get_setting_key([scope, scope_category, name, "missing"])
-
-    missing = cache.get(missing_key)
-    if missing is None:
-        #check the db if it is not in the cache
-        exists = Setting.objects.filter(scope=scope,
+    try:
+        snapshot = get_settings_snapshot()
+    except Exception:
+        return Setting.objects.filter(scope=scope,
             scope_category=scope_category, name=name).exists()
-
-        #cache that it does not exist
-        if not exists:
-            #set to True to signify that it is missing so we do not
-            #come back into this if statement and query db again
-            cache.set(missing_key, True)
-
-        return exists
-    return False
+    return (scope, scope_category, name) in snapshot['values']
 
 
 def get_form_list(user):
@@ -0,0 +1,164 @@
+import json
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from tendenci.apps.sitemaps import TendenciSitemap
+from tendenci.apps.site_settings.utils import get_setting
+
+# the sitemap files are written to the default storage, in SITEMAP_DIR
+SITEMAP_DIR = 'sitemaps'
+SITEMAP_INDEX_FILE = '%s/sitemap.xml' % SITEMAP_DIR
+SITEMAP_STATE_FILE = '%s/sitemaps.json' % SITEMAP_DIR
+# the maximum number of urls in a sitemap file (sitemaps protocol limit)
+SITEMAP_MAX_URLS = 50000
+
+
+def _try_import(module):
+    try:
+        __import__(module)
+    except ImportError:
+        pass
+
+
+def get_all_sitemaps():
+    """
+    Returns the sitemap classes of the enabled modules.
+    """
+    # the sitemaps are defined in the feeds modules
+    for app in settings.INSTALLED_APPS:
+        _try_import(app + '.feeds')
+    return [sitemap_class for sitemap_class in TendenciSitemap.__subclasses__()
+            if get_setting('module', sitemap_class.__module__.split('.')[-2], 'enabled')]
+
+
+def get_section_name(sitemap_class):
+    """
+    e.g. ArticleSitemap -> article
+    """
+    name = sitemap_class.__name__
+    if name.endswith('Sitemap'):
+        name = name[:-len('Sitemap')]
+    return name.lower()
+
+
+def get_section_file_name(section, page):
+    return '%s/sitemap-%s-%d.xml' % (SITEMAP_DIR, section, page)
+
+
+def get_section_state(sitemap):
+    """
+    Returns the number of items of the sitemap and the last time one of
+    them was updated, to tell whether the section changed since the last
+    build. Returns None if unknown (the section is then always built).
+    """
+    items = sitemap.items()
+    if not hasattr(items, 'model'):
+        return None
+    field_names = [field.name for field in items.model._meta.fields]
+    if 'update_dt' not in field_names:
+        return None
+    state = items.order_by().aggregate(count=Count('pk'), update_dt=Max('update_dt'))
+    return {'count': state['count'], 'update_dt': str(state['update_dt'])}
+
+
+def save_sitemap_file(file_name, content):
+    if default_storage.exists(file_name):
+        default_storage.delete(file_name)
+    default_storage.save(file_name, ContentFile(content.encode('utf-8')))
+
+
+def delete_section_files(section, first_page, last_page):
+    for page in range(first_page, last_page + 1):
+        file_name = get_section_file_name(section, page)
+        if default_storage.exists(file_name):
+            default_storage.delete(file_name)
+
+
+def load_sitemaps_state():
+    if not default_storage.exists(SITEMAP_STATE_FILE):
+        return {}
+    try:
+        with default_storage.open(SITEMAP_STATE_FILE, 'rb') as f:
+            return json.loads(f.read().decode('utf-8'))
+    except ValueError:
+        return {}
+
+
+def build_section(sitemap, section, site, protocol):
+    """
+    Writes the files of a section, SITEMAP_MAX_URLS urls per file.
+    Returns the number of files written.
+    """
+    sitemap.limit = min(sitemap.limit, SITEMAP_MAX_URLS)
+    paginator = sitemap.paginator
+    if not paginator.count:
+        return 0
+    for page in paginator.page_range:
+        urls = sitemap.get_urls(page=page, site=site, protocol=protocol)
+        content = render_to_string('sitemap.xml', {'urlset': urls})
+        save_sitemap_file(get_section_file_name(section, page), content)
+    return paginator.num_pages
+
+
+def build_sitemaps(force=False, verbosity=1):
+    """
+    Writes the sitemap files of all the sections to storage,
+    sitemap-<section>-<n>.xml, along with the sitemap index.
+
+    A section is built again only if its items changed since the last
+    build (see get_section_state), unless force is True.
+    """
+    protocol = get_setting('site', 'global', 'siteurl').split(':')[0] or 'http'
+    site = Site.objects.get_current()
+
+    state = load_sitemaps_state()
+    if state.get('protocol') != protocol or state.get('domain') != site.domain:
+        force = True
+    previous_sections = state.get('sections', {})
+
+    sections = {}
+    for sitemap_class in get_all_sitemaps():
+        sitemap = sitemap_class()
+        section = get_section_name(sitemap_class)
+        section_state = get_section_state(sitemap)
+        previous = previous_sections.get(section)
+
+        if not force and previous and section_state is not None \
+                and previous['state'] == section_state:
+            sections[section] = previous
+            if verbosity > 1:
+                print("Unchanged %s" % section)
+            continue
+
+        num_files = build_section(sitemap, section, site, protocol)
+        if previous:
+            # remove the files left from a larger build
+            delete_section_files(section, num_files + 1, previous['files'])
+        sections[section] = {'state': section_state, 'files': num_files}
+        if verbosity > 0:
+            print("Built %s (%d files)" % (section, num_files))
+
+    # the sections no longer enabled
+    for section, previous in previous_sections.items():
+        if section not in sections:
+            delete_section_files(section, 1, previous['files'])
+
+    locations = []
+    for section in sorted(sections):
+        for page in range(1, sections[section]['files'] + 1):
+            path = reverse('sitemap_section', args=[section, page])
+            locations.append('%s://%s%s' % (protocol, site.domain, path))
+    save_sitemap_file(SITEMAP_INDEX_FILE,
+                      render_to_string('sitemap_index.xml', {'sitemaps': locations}))
+
+    save_sitemap_file(SITEMAP_STATE_FILE, json.dumps({
+        'protocol': protocol,
+        'domain': site.domain,
+        'sections': sections}))
+    return sections
@@ -0,0 +1,2 @@
+# cache tag of the theme files contents read from S3
+THEME_FILES_CACHE_TAG = "theme_files"
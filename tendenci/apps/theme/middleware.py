@@ -12,3 +12,11 @@ def get_current_request():
 class RequestMiddleware(MiddlewareMixin):
     def process_request(self, request):
         _thread_locals.request = request
+
+    def process_response(self, request, response):
+        # don't leave the request to the next one handled by this thread
+        _thread_locals.request = None
+        return response
+
+    def process_exception(self, request, exception):
+        _thread_locals.request = None
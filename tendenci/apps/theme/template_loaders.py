@@ -14,10 +14,12 @@ from django.utils._os import safe_join
 from django.core.cache import cache
 from django.core.exceptions import SuspiciousFileOperation
 
+from tendenci.apps.base.cache import tagged_cache_key
 from tendenci.apps.theme.utils import (get_active_theme, get_theme,
                                        get_theme_search_order, is_builtin_theme,
                                        get_theme_root)
 from tendenci.apps.theme.middleware import get_current_request
+from tendenci.apps.theme.cache import THEME_FILES_CACHE_TAG
 from tendenci.libs.boto_s3.utils import read_theme_file_from_s3
 
 
@@ -96,6 +98,8 @@ class ThemeLoader(DjangoLoader):
 
         else:
             cache_key = ".".join([settings.SITE_CACHE_KEY, "theme", origin.name])
+            # tagged, so that clear_theme_cache invalidates all the theme files at once
+            cache_key = tagged_cache_key(cache_key, THEME_FILES_CACHE_TAG)
 
             cached_template = cache.get(cache_key)
             if cached_template == "tried":
@@ -111,14 +115,6 @@ class ThemeLoader(DjangoLoader):
                 raise TemplateDoesNotExist(origin)
             cache.set(cache_key, template)
 
-            cache_group_key = "%s.theme_files_cache_list" % settings.SITE_CACHE_KEY
-            cache_group_list = cache.get(cache_group_key)
-            if cache_group_list is None:
-                cache.set(cache_group_key, [cache_key])
-            else:
-                cache_group_list += [cache_key]
-                cache.set(cache_group_key, cache_group_list)
-
             return template
 
 
@@ -8,11 +8,19 @@ import simplejson as json
 
 
 class VersionManager(Manager):
-    def save_version(self, old_instance, new_instance, **kwargs):
+    def save_version(self, old_instance, new_instance, commit=True, **kwargs):
+        """
+        Creates a version of old_instance if new_instance has changes.
+        With commit=False, the version is returned without being saved.
+        """
         if old_instance and new_instance:
             version = self.model()
             changes = []
             for field in old_instance._meta.fields:
+                if field.is_relation and field.attname != field.name:
+                    # compare the ids, without fetching the related objects
+                    if getattr(old_instance, field.attname) == getattr(new_instance, field.attname):
+                        continue
                 field = str(field.name)
                 if "create_dt" in field or "update_dt" in field:
                     continue
@@ -35,7 +43,7 @@ class VersionManager(Manager):
                 version.content_type = ContentType.objects.get_for_model(old_instance)
                 version.object_id = old_instance.pk
                 version.object_repr = str(old_instance)[:50]
-                version.user = old_instance.owner
+                version.user_id = getattr(old_instance, 'owner_id', None)
                 version.create_dt = old_instance.update_dt
                 version.hash = str(uuid.uuid4())
 
@@ -44,7 +52,8 @@ class VersionManager(Manager):
                 object_json = serializers.serialize('json', [old_instance], ensure_ascii=False)
                 object_value = object_json[1:-1]
                 version.object_value = object_value
-                version.save()
+                if commit:
+                    version.save()
 
                 return version
         return None
@@ -77,6 +77,7 @@ DATABASES = {
 }
 
 MIDDLEWARE = [
+    'tendenci.apps.site_settings.middleware.SettingsSnapshotMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -554,11 +555,45 @@ TENDENCI_USER_AGENT = 'Tendenci/14 (+https://www.tendenci.com)'
 # Google Static Maps URL signing secret used to generate a digital signature
 GOOGLE_SMAPS_URL_SIGNING_SECRET = ''
 
+# Event Logs
+# Event logs are buffered in memory and written with bulk inserts by a
+# background thread every EVENTLOG_FLUSH_INTERVAL seconds, or as soon as
+# EVENTLOG_BUFFER_SIZE records are pending. Set EVENTLOG_BUFFER_SIZE to 0
+# to write each event log immediately.
+EVENTLOG_BUFFER_SIZE = 200
+EVENTLOG_FLUSH_INTERVAL = 5
+
+# 404 Reports
+# The 404s are counted by url in memory and the counts added to the
+# reports by a background thread every REPORT404_FLUSH_INTERVAL seconds,
+# or as soon as REPORT404_BUFFER_SIZE urls are pending. Set
+# REPORT404_BUFFER_SIZE to 0 to count each 404 immediately.
+REPORT404_BUFFER_SIZE = 500
+REPORT404_FLUSH_INTERVAL = 10
+
+# Event Registrations
+# The seats of a registration being checked out are held for
+# EVENT_SEAT_HOLD_TIMEOUT seconds, and the seats of an unpaid registration
+# until it's paid, or for EVENT_PAYMENT_HOLD_TIMEOUT seconds. The seats
+# available shown on the event pages are cached for EVENT_SEATS_CACHE_TIMEOUT
+# seconds (and refreshed as soon as a registrant is added or cancelled).
+EVENT_SEAT_HOLD_TIMEOUT = 600
+EVENT_PAYMENT_HOLD_TIMEOUT = 1800
+EVENT_SEATS_CACHE_TIMEOUT = 30
+
 # Files App
 ALLOW_MP3_UPLOAD = False
+# Let the web server send the files downloaded through files.views.details:
+# 'nginx' (X-Accel-Redirect, the internal location serving MEDIA_ROOT is
+# FILES_SENDFILE_URL_PREFIX) or 'apache' (X-Sendfile). Not used with S3.
+FILES_SENDFILE_BACKEND = None
+FILES_SENDFILE_URL_PREFIX = '/protected/'
 
 # Photos App
 PHOTOS_MAXBLOCK = 2 ** 20  # prevents 'IOError: encoder error -2'
+# Sizes pre-generated after upload and by the cache_photos command, e.g.
+# [{'size': '422x700', 'constrain': True}, {'size': '102x78', 'crop': True}]
+# PHOTOS_PREGENERATE_SIZES = [...]
 
 # Events
 # Turn on/off the Gratuity feature - per Ed, allow it to be adjusted in conf/settings.py rather than site settings